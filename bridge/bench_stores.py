@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Talimy Bridge store benchmark
+
+Mixed load over the file-backed stores: global lock vs striped locks, per-op throughput and latency.
+Usage: python3 bridge/bench_stores.py [--threads 3,6,12] [--seconds S] [--jobs N] [--lines N]
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bridge_server import EventStore, JsonStore, compact_json, server_log, shard_path  # noqa: E402
+
+
+def bench_stores(argv: list[str]) -> int:
+    """Mixed load over many jobs: live appends next to cold reads of large results/timelines (global lock vs striped)."""
+    threads_list = [3, 6, 12]
+    seconds = 3.0
+    jobs_n = 64
+    lines = 4000
+    it = iter(argv)
+    for arg in it:
+        if arg == "--threads":
+            threads_list = [int(x) for x in next(it, "").split(",") if x.strip()]
+        elif arg == "--seconds":
+            seconds = float(next(it, seconds))
+        elif arg == "--jobs":
+            jobs_n = max(1, int(next(it, jobs_n)))
+        elif arg == "--lines":
+            lines = max(1, int(next(it, lines)))
+    line = (compact_json({"event_type": "bench", "message": "x" * 200}) + "\n").encode("utf-8")
+    result = {"status": "success", "stage": "completed", "checks": [{"stdout": "x" * 2048}] * (lines // 20)}
+    # Thread t runs roles[t % 3]: CI appends to its own live job while others read unrelated finished jobs.
+    roles = ("append", "read_result", "read_events")
+    for threads in threads_list:
+        for label, stripes in (("global", 1), ("striped", 64)):
+            with tempfile.TemporaryDirectory(prefix="bridge-bench-") as tmp:
+                base = Path(tmp)
+                # cache_entries=0 and an index smaller than the job count keep reads on disk, under the job lock.
+                jobs = JsonStore(base / "results", lock_stripes=stripes, cache_entries=0)
+                events = EventStore(base / "events", lock_stripes=stripes, index_entries=max(1, jobs_n // 8))
+                for j in range(jobs_n):
+                    jobs.write(f"bench-{j}", result)
+                    path = shard_path(base / "events", f"bench-{j}", ".jsonl")
+                    path.parent.mkdir(exist_ok=True)
+                    path.write_bytes(line * lines)
+                latencies: dict[str, list[float]] = {role: [] for role in roles}
+                stop = threading.Event()
+
+                def work(t: int) -> None:
+                    role = roles[t % len(roles)]
+                    rng = random.Random(t)
+                    own: list[float] = []
+                    while not stop.is_set():
+                        job_id = f"bench-{rng.randrange(jobs_n)}"
+                        started = time.perf_counter()
+                        if role == "append":
+                            events.append(f"live-{t}", {"event_type": "bench", "i": len(own)})
+                        elif role == "read_result":
+                            jobs.read(job_id)
+                        else:
+                            events.read_page(job_id, after=lines - 20)
+                        own.append(time.perf_counter() - started)
+                    latencies[role].extend(own)
+
+                workers = [threading.Thread(target=work, args=(t,)) for t in range(threads)]
+                for worker in workers:
+                    worker.start()
+                time.sleep(seconds)
+                stop.set()
+                for worker in workers:
+                    worker.join()
+                for role in roles:
+                    samples = sorted(latencies[role])
+                    if not samples:
+                        continue
+                    server_log(
+                        "bridge",
+                        f"bench locks={label} threads={threads} op={role} ops_per_s={int(len(samples) / seconds)} "
+                        f"p50_ms={samples[len(samples) // 2] * 1000:.2f} "
+                        f"p99_ms={samples[min(len(samples) - 1, len(samples) * 99 // 100)] * 1000:.2f}",
+                    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(bench_stores(sys.argv[1:]))
@@ -1,52 +1,65 @@
-#!/usr/bin/env python3
-"""Talimy Bridge Client
-
-Laptop-side bridge client that pushes to GitHub, notifies bridge server, waits for result,
-and optionally helps pick the next task from docReja/Reja.md tracker table.
-"""
-
-from __future__ import annotations
-
-import json
-import hashlib
-import os
-import re
-import subprocess
-import sys
-import time
-import uuid
-from dataclasses import dataclass
-from pathlib import Path
-from threading import Event, Thread
-from typing import Any
+#!/usr/bin/env python3
+"""Talimy Bridge Client
+
+Laptop-side bridge client that pushes to GitHub, notifies bridge server, waits for result,
+and optionally helps pick the next task from docReja/Reja.md tracker table.
+"""
+
+from __future__ import annotations
+
+import atexit
+import gzip
+import http.client
+import json
+import hashlib
+import os
+import queue
+import re
+import select
+import shutil
+import subprocess
+import sys
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Event, Lock, Thread, get_ident
+from typing import Any
 from urllib import error, parse, request
-
-BASE_DIR = Path(__file__).resolve().parent
-DEFAULT_CONFIG_PATH = BASE_DIR / "bridge_config.json"
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_CONFIG_PATH = BASE_DIR / "bridge_config.json"
 LAST_RESULT_PATH = BASE_DIR / ".bridge-state" / "last_bridge_result.json"
+EVENT_SPOOL_PATH = BASE_DIR / ".bridge-state" / "event_spool.jsonl"
+EVENT_REJECTED_PATH = BASE_DIR / ".bridge-state" / "event_rejected.jsonl"
+CODEX_CAPS_PATH = BASE_DIR / ".bridge-state" / "codex_caps.json"
+# Server queue priority: manual `push` runs ahead of `bridge-push-next` batch runs.
+TRIGGER_PRIORITY_MANUAL = 10
+TRIGGER_PRIORITY_BATCH = 0
 LAST_TELEGRAM_STATUS = "not_sent"
-
-REJA_ROW_RE = re.compile(
-    r"^\|\s*(?P<task_no>2\.\d+)\s*\|\s*(?P<title>[^|]+?)\s*\|\s*(?P<status>[^|]+?)\s*\|",
-    re.UNICODE,
-)
+
+REJA_ROW_RE = re.compile(
+    r"^\|\s*(?P<task_no>2\.\d+)\s*\|\s*(?P<title>[^|]+?)\s*\|\s*(?P<status>[^|]+?)\s*\|",
+    re.UNICODE,
+)
 TASK_NUMBER_RE = re.compile(r"\b(?P<phase>\d+)\.(?P<task>\d+)\b")
 JSON_OBJECT_RE = re.compile(r"\{[\s\S]*\}")
 UUID_RE = re.compile(
     r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"
 )
-
-
-ENV_TOKEN_RE = re.compile(r"^\$\{([A-Z0-9_]+)\}$")
-ANSI_RESET = "\x1b[0m"
-
-
-def ansi_color(code: str, text: str) -> str:
-    if os.environ.get("NO_COLOR"):
-        return text
-    return f"\x1b[{code}m{text}{ANSI_RESET}"
-
-
+
+
+ENV_TOKEN_RE = re.compile(r"^\$\{([A-Z0-9_]+)\}$")
+ANSI_RESET = "\x1b[0m"
+
+
+def ansi_color(code: str, text: str) -> str:
+    if os.environ.get("NO_COLOR"):
+        return text
+    return f"\x1b[{code}m{text}{ANSI_RESET}"
+
+
 def resolve_config_path() -> Path:
     raw = os.environ.get("BRIDGE_CONFIG_PATH", "").strip()
     if not raw:
@@ -74,96 +87,96 @@ def _normalize_local_path(raw_path: str) -> Path:
             rest = m.group("rest").replace("\\", "/")
             return Path(f"/mnt/{drive}/{rest}")
     return Path(raw)
-
-
-def expand_env_placeholders(value: Any) -> Any:
-    if isinstance(value, dict):
-        return {k: expand_env_placeholders(v) for k, v in value.items()}
-    if isinstance(value, list):
-        return [expand_env_placeholders(v) for v in value]
-    if isinstance(value, str):
-        m = ENV_TOKEN_RE.match(value.strip())
-        if m:
-            value = os.environ.get(m.group(1), "")
-        lowered = value.strip().lower()
-        if lowered == "true":
-            return True
-        if lowered == "false":
-            return False
-    return value
-
-
-@dataclass
-class Config:
-    raw: dict[str, Any]
-
-    @property
-    def server_host(self) -> str:
-        return str(self.raw["server_host"])
-
-    @property
-    def bridge_port(self) -> int:
-        return int(self.raw.get("bridge_port", 8765))
-
-    @property
-    def branch(self) -> str:
-        return str(self.raw.get("branch", "main"))
-
-    @property
-    def shared_secret(self) -> str:
-        return str(self.raw.get("shared_secret", ""))
-
+
+
+def expand_env_placeholders(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: expand_env_placeholders(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [expand_env_placeholders(v) for v in value]
+    if isinstance(value, str):
+        m = ENV_TOKEN_RE.match(value.strip())
+        if m:
+            value = os.environ.get(m.group(1), "")
+        lowered = value.strip().lower()
+        if lowered == "true":
+            return True
+        if lowered == "false":
+            return False
+    return value
+
+
+@dataclass
+class Config:
+    raw: dict[str, Any]
+
+    @property
+    def server_host(self) -> str:
+        return str(self.raw["server_host"])
+
+    @property
+    def bridge_port(self) -> int:
+        return int(self.raw.get("bridge_port", 8765))
+
+    @property
+    def branch(self) -> str:
+        return str(self.raw.get("branch", "main"))
+
+    @property
+    def shared_secret(self) -> str:
+        return str(self.raw.get("shared_secret", ""))
+
     @property
     def laptop_repo_path(self) -> Path:
         return _normalize_local_path(str(self.raw.get("laptop_repo_path", ".")))
-
-    @property
-    def tasks_file(self) -> Path:
-        return Path(str(self.raw.get("tasks_file", "docReja/Reja.md")))
-
-    @property
-    def poll_interval_seconds(self) -> int:
-        return int(self.raw.get("poll_interval_seconds", 5))
-
-    @property
-    def request_timeout_seconds(self) -> int:
-        return int(self.raw.get("request_timeout_seconds", 15))
-
-    @property
-    def github_ci(self) -> dict[str, Any]:
-        return dict(self.raw.get("github_ci", {}))
-
-    @property
-    def telegram(self) -> dict[str, Any]:
-        return dict(self.raw.get("telegram", {}))
-
-    @property
-    def session_context(self) -> dict[str, Any]:
-        return dict(self.raw.get("session_context", {}))
-
-    @property
-    def dokploy(self) -> dict[str, Any]:
-        return dict(self.raw.get("dokploy", {}))
-
-    @property
-    def runtime_checks(self) -> dict[str, Any]:
-        return dict(self.raw.get("runtime_checks", {}))
-
-    @property
+
+    @property
+    def tasks_file(self) -> Path:
+        return Path(str(self.raw.get("tasks_file", "docReja/Reja.md")))
+
+    @property
+    def poll_interval_seconds(self) -> int:
+        return int(self.raw.get("poll_interval_seconds", 5))
+
+    @property
+    def request_timeout_seconds(self) -> int:
+        return int(self.raw.get("request_timeout_seconds", 15))
+
+    @property
+    def github_ci(self) -> dict[str, Any]:
+        return dict(self.raw.get("github_ci", {}))
+
+    @property
+    def telegram(self) -> dict[str, Any]:
+        return dict(self.raw.get("telegram", {}))
+
+    @property
+    def session_context(self) -> dict[str, Any]:
+        return dict(self.raw.get("session_context", {}))
+
+    @property
+    def dokploy(self) -> dict[str, Any]:
+        return dict(self.raw.get("dokploy", {}))
+
+    @property
+    def runtime_checks(self) -> dict[str, Any]:
+        return dict(self.raw.get("runtime_checks", {}))
+
+    @property
     def task_smoke_checks(self) -> dict[str, list[str]]:
         raw = dict(self.raw.get("task_smoke_checks", {}))
         return {str(k): [str(x) for x in list(v)] for k, v in raw.items() if isinstance(v, list)}
-
-    @property
-    def task_smoke_mapping(self) -> dict[str, str]:
-        raw = dict(self.raw.get("task_smoke_mapping", {}))
-        return {str(k): str(v) for k, v in raw.items()}
-
-    @property
-    def auto_fix(self) -> dict[str, Any]:
-        return dict(self.raw.get("auto_fix", {}))
-
-    @property
+
+    @property
+    def task_smoke_mapping(self) -> dict[str, str]:
+        raw = dict(self.raw.get("task_smoke_mapping", {}))
+        return {str(k): str(v) for k, v in raw.items()}
+
+    @property
+    def auto_fix(self) -> dict[str, Any]:
+        return dict(self.raw.get("auto_fix", {}))
+
+    @property
     def reja_auto_mark(self) -> dict[str, Any]:
         return dict(self.raw.get("reja_auto_mark", {}))
 
@@ -211,11 +224,23 @@ class Config:
     @property
     def dynamic_smoke(self) -> dict[str, Any]:
         return dict(self.raw.get("dynamic_smoke", {}))
-
-
+
+    @property
+    def event_stream(self) -> dict[str, Any]:
+        return dict(self.raw.get("event_stream", {}))
+
+    @property
+    def result_long_poll_seconds(self) -> int:
+        return int(self.raw.get("result_long_poll_seconds", 30))
+
+    @property
+    def event_sender(self) -> dict[str, Any]:
+        return dict(self.raw.get("event_sender", {}))
+
+
 def load_config() -> Config:
-    config_path = resolve_config_path()
-    raw = json.loads(config_path.read_text(encoding="utf-8"))
+    config_path = resolve_config_path()
+    raw = json.loads(config_path.read_text(encoding="utf-8"))
     return Config(raw=expand_env_placeholders(raw))
 
 
@@ -245,14 +270,21 @@ def extract_first_uuid(text: str) -> str | None:
     if not m:
         return None
     return m.group(0)
-
-
-def secret_fingerprint(secret: str) -> str:
-    if not secret:
-        return "none"
-    return hashlib.sha256(secret.encode("utf-8")).hexdigest()[:12]
-
-
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    """Write via a sibling temp file + os.replace so readers never observe a half-written file."""
+    tmp = path.with_name(f".{path.name}.{get_ident()}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def secret_fingerprint(secret: str) -> str:
+    if not secret:
+        return "none"
+    return hashlib.sha256(secret.encode("utf-8")).hexdigest()[:12]
+
+
 def client_log(channel: str, message: str) -> None:
     channel_l = channel.lower()
     message_l = message.lower()
@@ -282,19 +314,19 @@ def client_log(channel: str, message: str) -> None:
             channel_color = "91"  # bright red
 
     left = ansi_color("38;5;45", "[LAPTOP]")   # turquoise
-    right = ansi_color(channel_color or "37", f"[{channel}]")
+    right = ansi_color(channel_color or "37", f"[{channel}]")
     print(f"{left}{right} {_redact_sensitive_text(message)}")
-
-
+
+
 def server_log_on_client(channel: str, message: str) -> None:
-    channel_l = channel.lower()
-    channel_color = {
-        "bridge": "38;5;208",  # orange
-        "ack": "38;5;208",     # orange
-        "codex": "34",         # blue
-    }.get(channel_l, "33")
-    left = ansi_color("38;5;208", "[SERVER]")
-    right = ansi_color(channel_color, f"[{channel}]")
+    channel_l = channel.lower()
+    channel_color = {
+        "bridge": "38;5;208",  # orange
+        "ack": "38;5;208",     # orange
+        "codex": "34",         # blue
+    }.get(channel_l, "33")
+    left = ansi_color("38;5;208", "[SERVER]")
+    right = ansi_color(channel_color, f"[{channel}]")
     print(f"{left}{right} {_redact_sensitive_text(message)}")
 
 
@@ -310,35 +342,150 @@ def _redact_sensitive_text(text: str) -> str:
 
 def _redact_sensitive_list(items: list[str]) -> list[str]:
     return [_redact_sensitive_text(str(x)) for x in items]
-
-
-def http_json(
-    method: str,
-    url: str,
-    payload: dict[str, Any] | None,
-    timeout: int,
-    token: str,
-) -> tuple[int, dict[str, Any]]:
-    data = None if payload is None else json.dumps(payload).encode("utf-8")
-    req = request.Request(url, data=data, method=method)
-    req.add_header("Content-Type", "application/json")
-    if token:
-        req.add_header("X-Bridge-Token", token)
-    try:
-        with request.urlopen(req, timeout=timeout) as resp:
-            body = resp.read().decode("utf-8")
-            return resp.status, json.loads(body) if body else {}
-    except error.HTTPError as exc:
-        body = exc.read().decode("utf-8")
+
+
+class HTTPConnectionPool:
+    """Idle keep-alive http.client connections per (scheme, host, port), shared by pipeline and sender threads."""
+
+    def __init__(self, max_idle_per_host: int = 4) -> None:
+        self.max_idle_per_host = max_idle_per_host
+        self._idle: dict[tuple[str, str, int], list[http.client.HTTPConnection]] = {}
+        self._lock = Lock()
+
+    def request(
+        self, method: str, url: str, body: bytes | None, headers: dict[str, str], timeout: float
+    ) -> tuple[int, dict[str, str], bytes]:
+        """Send one request; returns status, lowercased headers and the (gunzipped) body."""
+        parts = parse.urlsplit(url)
+        scheme = parts.scheme or "http"
+        key = (scheme, parts.hostname or "", parts.port or (443 if scheme == "https" else 80))
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                conn = idle.pop() if idle else None
+            if conn is not None and self._dropped(conn):
+                conn.close()
+                continue
+            reused = conn is not None
+            if conn is None:
+                conn_cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+                conn = conn_cls(key[1], key[2], timeout=timeout)
+            elif conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            sent = False
+            try:
+                conn.request(method, target, body=body, headers=headers)
+                sent = True
+                resp = conn.getresponse()
+                data = resp.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                # A dropped idle socket (keep-alive timeout) is retried on a fresh one, but a POST that was fully
+                # sent may already have been processed: replaying /trigger or /events/batch would duplicate it.
+                if reused and (not sent or method in {"GET", "HEAD"}):
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+            self._release(key, conn, resp.will_close)
+            resp_headers = {name.lower(): value for name, value in resp.getheaders()}
+            if resp_headers.get("content-encoding", "").lower() == "gzip":
+                data = gzip.decompress(data)
+            return resp.status, resp_headers, data
+
+    @staticmethod
+    def _dropped(conn: http.client.HTTPConnection) -> bool:
+        # An idle keep-alive socket is readable only when the server closed it (EOF) or broke protocol.
+        if conn.sock is None:
+            return True
         try:
-            parsed = json.loads(body) if body else {"status": "http_error"}
-        except Exception:
-            parsed = {"status": "http_error", "body": body}
-        return exc.code, parsed
-    except error.URLError as exc:
+            return bool(select.select([conn.sock], [], [], 0)[0])
+        except (OSError, ValueError):
+            return True
+
+    def _release(self, key: tuple[str, str, int], conn: http.client.HTTPConnection, will_close: bool) -> None:
+        if not will_close:
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                if len(idle) < self.max_idle_per_host:
+                    idle.append(conn)
+                    return
+        conn.close()
+
+
+class ETagCache:
+    """cache_key -> (ETag, body) of the last 200 reply, LRU-bounded by entries and bytes; shared across threads."""
+
+    def __init__(self, max_entries: int = 64, max_bytes: int = 8 << 20) -> None:
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max(0, max_bytes)
+        self._entries: OrderedDict[str, tuple[str, bytes]] = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+
+    def get(self, key: str) -> tuple[str, bytes] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, etag: str, body: bytes) -> None:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[1])
+            if len(body) > self.max_bytes:
+                return
+            self._entries[key] = (etag, body)
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._bytes -= len(self._entries.popitem(last=False)[1][1])
+
+
+HTTP_POOL = HTTPConnectionPool()
+# A 304 replays the cached body without resending it.
+HTTP_ETAG_CACHE = ETagCache()
+
+
+def http_json(
+    method: str,
+    url: str,
+    payload: dict[str, Any] | None,
+    timeout: int,
+    token: str,
+    *,
+    cache_key: str = "",
+) -> tuple[int, dict[str, Any]]:
+    data = None if payload is None else json.dumps(payload).encode("utf-8")
+    headers = {"Content-Type": "application/json", "Accept-Encoding": "gzip"}
+    if token:
+        headers["X-Bridge-Token"] = token
+    cached = HTTP_ETAG_CACHE.get(cache_key) if cache_key else None
+    if cached is not None:
+        headers["If-None-Match"] = cached[0]
+    try:
+        code, resp_headers, raw = HTTP_POOL.request(method, url, data, headers, timeout)
+    except (OSError, http.client.HTTPException) as exc:
         return 599, {"status": "url_error", "error": str(exc)}
-
-
+    if code == 304 and cached is not None:
+        # Unchanged since the last reply: same payload, no body on the wire.
+        return 200, json.loads(cached[1].decode("utf-8"))
+    body = raw.decode("utf-8")
+    if 200 <= code < 300:
+        etag = resp_headers.get("etag", "")
+        if cache_key and etag:
+            HTTP_ETAG_CACHE.put(cache_key, etag, raw)
+        return code, json.loads(body) if body else {}
+    try:
+        parsed = json.loads(body) if body else {"status": "http_error"}
+    except Exception:
+        parsed = {"status": "http_error", "body": body}
+    return code, parsed
+
+
 def run_git(command: list[str], cwd: Path) -> subprocess.CompletedProcess[str]:
     return subprocess.run(command, cwd=str(cwd), capture_output=True, text=True, encoding="utf-8", errors="replace")
 
@@ -352,8 +499,8 @@ def run_cmd(command: list[str], cwd: Path | None = None) -> subprocess.Completed
         encoding="utf-8",
         errors="replace",
     )
-
-
+
+
 def run_shell(command: str, cwd: Path) -> subprocess.CompletedProcess[str]:
     if os.name == "nt":
         return subprocess.run(
@@ -383,115 +530,141 @@ def run_shell_or_direct(command: str, cwd: Path) -> subprocess.CompletedProcess[
             script = m.group(2)
             return run_cmd([exe, "-NoProfile", "-Command", script], cwd)
     return run_shell(command, cwd)
-
-
-def current_commit(cwd: Path) -> str:
-    res = run_git(["git", "rev-parse", "HEAD"], cwd)
-    if res.returncode != 0:
-        raise RuntimeError(res.stderr.strip() or "git rev-parse failed")
-    return res.stdout.strip()
-
-
-def changed_files_for_commit(cwd: Path, commit: str) -> list[str]:
-    res = run_git(["git", "diff-tree", "--no-commit-id", "--name-only", "-r", commit], cwd)
-    if res.returncode != 0:
-        return []
-    return [line.strip() for line in res.stdout.splitlines() if line.strip()]
-
-
-def predict_ci_trigger_for_commit(cfg: Config, commit: str) -> dict[str, Any]:
-    repo = cfg.laptop_repo_path
-    files = changed_files_for_commit(repo, commit)
-    if not files:
-        return {"known": False, "expect_runs": True, "reason": "changed files aniqlanmadi", "files": []}
-
-    normalized = [f.replace("\\", "/") for f in files]
-
-    docs_only_prefixes = ("bridge/", "docReja/")
-    docs_only_suffixes = (".md", ".txt")
-
-    all_docs_like = all(
-        p.startswith(docs_only_prefixes)
-        or p.endswith(docs_only_suffixes)
-        or p.startswith(".vscode/")
-        or p.startswith(".idea/")
-        for p in normalized
-    )
-    if all_docs_like:
-        return {
-            "known": True,
-            "expect_runs": False,
-            "reason": "docs/bridge-only commit (CI path filter trigger bo'lmasligi mumkin)",
-            "files": normalized,
-        }
-
-    workflow_files = [p for p in normalized if p.startswith(".github/workflows/")]
-    if workflow_files:
-        return {
-            "known": True,
-            "expect_runs": True,
-            "reason": "workflow files o'zgargan",
-            "files": normalized,
-        }
-
-    # Conservative default: application/package code changes may trigger CI/CD.
-    code_prefixes = ("apps/", "packages/", "tooling/")
-    if any(p.startswith(code_prefixes) for p in normalized):
-        return {
-            "known": True,
-            "expect_runs": True,
-            "reason": "app/package/tooling code changes topildi",
-            "files": normalized,
-        }
-
-    return {
-        "known": False,
-        "expect_runs": True,
-        "reason": "commit pathlari bo'yicha CI trigger holati noaniq",
-        "files": normalized,
-    }
-
-
-def push_commit(cfg: Config) -> str:
-    repo = cfg.laptop_repo_path
-    push = run_git(["git", "push", "origin", cfg.branch], repo)
-    if push.returncode != 0:
-        raise RuntimeError(push.stderr.strip() or push.stdout.strip() or "git push failed")
-    return current_commit(repo)
-
-
-def trigger_server(task: str, commit: str, cfg: Config, session_context: dict[str, Any] | None = None) -> str:
-    job_id = uuid.uuid4().hex
-    server = f"http://{cfg.server_host}:{cfg.bridge_port}"
-    code, resp = http_json(
-        "POST",
-        f"{server}/trigger",
-        {
-            "task": task,
-            "commit": commit,
-            "job_id": job_id,
-            "timestamp": int(time.time()),
-            "session_context": session_context or {},
-        },
-        cfg.request_timeout_seconds,
-        cfg.shared_secret,
-    )
-    if code != 200:
-        raise RuntimeError(f"bridge trigger failed ({code}): {resp}")
-    if resp.get("ack"):
-        server_log_on_client("ack", f"[trigger] {resp['ack']}")
-    return job_id
-
-
-def bridge_hello(cfg: Config) -> dict[str, Any]:
-    server = f"http://{cfg.server_host}:{cfg.bridge_port}"
-    code, resp = http_json(
-        "GET",
-        f"{server}/hello?side=laptop",
-        None,
-        cfg.request_timeout_seconds,
-        cfg.shared_secret,
-    )
+
+
+def current_commit(cwd: Path) -> str:
+    res = run_git(["git", "rev-parse", "HEAD"], cwd)
+    if res.returncode != 0:
+        raise RuntimeError(res.stderr.strip() or "git rev-parse failed")
+    return res.stdout.strip()
+
+
+def changed_files_for_commit(cwd: Path, commit: str) -> list[str]:
+    res = run_git(["git", "diff-tree", "--no-commit-id", "--name-only", "-r", commit], cwd)
+    if res.returncode != 0:
+        return []
+    return [line.strip() for line in res.stdout.splitlines() if line.strip()]
+
+
+def predict_ci_trigger_for_commit(cfg: Config, commit: str) -> dict[str, Any]:
+    repo = cfg.laptop_repo_path
+    files = changed_files_for_commit(repo, commit)
+    if not files:
+        return {"known": False, "expect_runs": True, "reason": "changed files aniqlanmadi", "files": []}
+
+    normalized = [f.replace("\\", "/") for f in files]
+
+    docs_only_prefixes = ("bridge/", "docReja/")
+    docs_only_suffixes = (".md", ".txt")
+
+    all_docs_like = all(
+        p.startswith(docs_only_prefixes)
+        or p.endswith(docs_only_suffixes)
+        or p.startswith(".vscode/")
+        or p.startswith(".idea/")
+        for p in normalized
+    )
+    if all_docs_like:
+        return {
+            "known": True,
+            "expect_runs": False,
+            "reason": "docs/bridge-only commit (CI path filter trigger bo'lmasligi mumkin)",
+            "files": normalized,
+        }
+
+    workflow_files = [p for p in normalized if p.startswith(".github/workflows/")]
+    if workflow_files:
+        return {
+            "known": True,
+            "expect_runs": True,
+            "reason": "workflow files o'zgargan",
+            "files": normalized,
+        }
+
+    # Conservative default: application/package code changes may trigger CI/CD.
+    code_prefixes = ("apps/", "packages/", "tooling/")
+    if any(p.startswith(code_prefixes) for p in normalized):
+        return {
+            "known": True,
+            "expect_runs": True,
+            "reason": "app/package/tooling code changes topildi",
+            "files": normalized,
+        }
+
+    return {
+        "known": False,
+        "expect_runs": True,
+        "reason": "commit pathlari bo'yicha CI trigger holati noaniq",
+        "files": normalized,
+    }
+
+
+def push_commit(cfg: Config) -> str:
+    repo = cfg.laptop_repo_path
+    push = run_git(["git", "push", "origin", cfg.branch], repo)
+    if push.returncode != 0:
+        raise RuntimeError(push.stderr.strip() or push.stdout.strip() or "git push failed")
+    return current_commit(repo)
+
+
+def trigger_server(
+    task: str,
+    commit: str,
+    cfg: Config,
+    session_context: dict[str, Any] | None = None,
+    *,
+    priority: int = TRIGGER_PRIORITY_MANUAL,
+    force_review: bool = False,
+) -> str:
+    job_id = uuid.uuid4().hex
+    server = f"http://{cfg.server_host}:{cfg.bridge_port}"
+    code, resp = http_json(
+        "POST",
+        f"{server}/trigger",
+        {
+            "task": task,
+            "commit": commit,
+            "job_id": job_id,
+            "timestamp": int(time.time()),
+            "session_context": session_context or {},
+            "priority": priority,
+            "force_review": force_review,
+        },
+        cfg.request_timeout_seconds,
+        cfg.shared_secret,
+    )
+    if code != 200:
+        raise RuntimeError(f"bridge trigger failed ({code}): {resp}")
+    if resp.get("ack"):
+        server_log_on_client("ack", f"[trigger] {resp['ack']}")
+    return job_id
+
+
+def cancel_server_job(job_id: str, cfg: Config, *, reason: str) -> None:
+    server = f"http://{cfg.server_host}:{cfg.bridge_port}"
+    code, resp = http_json(
+        "POST",
+        f"{server}/cancel?{parse.urlencode({'job_id': job_id})}",
+        {},
+        cfg.request_timeout_seconds,
+        cfg.shared_secret,
+    )
+    if code == 200:
+        client_log("bridge", f"server job cancelled job_id={job_id} reason={reason} state={resp.get('state')}")
+    elif code != 409:
+        client_log("bridge", f"server job cancel failed ({code}) job_id={job_id}: {resp}")
+
+
+def bridge_hello(cfg: Config, *, probe_codex: bool = False) -> dict[str, Any]:
+    server = f"http://{cfg.server_host}:{cfg.bridge_port}"
+    # Plain hello is answered from the server's cached greeting; only a forced probe waits for codex.
+    code, resp = http_json(
+        "GET",
+        f"{server}/hello?side=laptop" + ("&probe_codex=1" if probe_codex else ""),
+        None,
+        max(cfg.request_timeout_seconds, 120) if probe_codex else cfg.request_timeout_seconds,
+        cfg.shared_secret,
+    )
     if code != 200:
         if (
             code == 503
@@ -504,61 +677,255 @@ def bridge_hello(cfg: Config) -> dict[str, Any]:
             return resp
         raise RuntimeError(f"bridge hello failed ({code}): {resp}")
     return resp
-
-
+
+
+class BridgeEventSender:
+    """Background telemetry sender: batches events to /events/batch, retries with backoff, spools to disk."""
+
+    def __init__(self, cfg: Config) -> None:
+        opts = cfg.event_sender
+        self.server = f"http://{cfg.server_host}:{cfg.bridge_port}"
+        self.timeout = cfg.request_timeout_seconds
+        self.token = cfg.shared_secret
+        self.batch_size = max(1, int(opts.get("batch_size", 20)))
+        self.flush_interval = max(0.05, float(opts.get("flush_interval_seconds", 1.0)))
+        self.max_backoff = max(1.0, float(opts.get("max_backoff_seconds", 30)))
+        self.spool_max_events = max(1, int(opts.get("spool_max_events", 5000)))
+        self._queue: queue.Queue[dict[str, Any]] = queue.Queue()
+        self._closing = Event()
+        self._spool_lock = Lock()
+        self._backoff = 0.0
+        self._retry_at = 0.0
+        self._batch_supported = True
+        # Events left over from an earlier run go out first, before anything queued now.
+        self._spooled = EVENT_SPOOL_PATH.exists()
+        self._thread = Thread(target=self._run, name="bridge-event-sender", daemon=True)
+        self._thread.start()
+
+    def submit(self, event: dict[str, Any]) -> None:
+        self._queue.put(event)
+
+    def close(self, timeout: float) -> None:
+        """Flush what the server accepts within timeout; whatever is left is spooled for the next run."""
+        self._closing.set()
+        self._thread.join(timeout)
+        leftover = self._drain_queue()
+        if leftover:
+            self._spool_write(leftover)
+
+    def _drain_queue(self) -> list[dict[str, Any]]:
+        items: list[dict[str, Any]] = []
+        while True:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                return items
+
+    def _collect(self) -> list[dict[str, Any]]:
+        try:
+            first = self._queue.get(timeout=0 if self._closing.is_set() else self.flush_interval)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = 0 if self._closing.is_set() else deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=max(0.0, remaining)))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            closing = self._closing.is_set()
+            if self._spooled:
+                # Keep order: while the spool is non-empty, new events queue up behind it on disk.
+                if batch:
+                    self._spool_write(batch)
+                if time.monotonic() >= self._retry_at:
+                    self._drain_spool()
+                elif closing:
+                    self._spool_write(self._drain_queue())
+                    return
+            elif batch and not self._post(batch):
+                self._spool_write(batch)
+                self._schedule_retry()
+            if closing and not batch and not self._spooled:
+                return
+
+    def _schedule_retry(self) -> None:
+        self._backoff = min(self.max_backoff, self._backoff * 2 if self._backoff else 1.0)
+        self._retry_at = time.monotonic() + self._backoff
+
+    @staticmethod
+    def _retryable(code: int) -> bool:
+        # Transport errors (599) and 5xx are transient; any other 4xx would fail the same way on every retry.
+        return code >= 500 or code in {408, 429}
+
+    def _reject(self, events: list[dict[str, Any]], code: int, resp: dict[str, Any]) -> None:
+        """Quarantine events the server refused so they neither block the spool nor vanish silently."""
+        client_log("bridge", f"event rejected ({code}): {resp} quarantined={len(events)} path={EVENT_REJECTED_PATH}")
+        EVENT_REJECTED_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with EVENT_REJECTED_PATH.open("a", encoding="utf-8") as fh:
+            for event in events:
+                fh.write(json.dumps(event, ensure_ascii=True, separators=(",", ":")) + "\n")
+
+    def _post(self, batch: list[dict[str, Any]]) -> bool:
+        """Deliver batch; False (with batch trimmed to the unsent tail) means retry later."""
+        if self._batch_supported:
+            code, resp = http_json("POST", f"{self.server}/events/batch", {"events": batch}, self.timeout, self.token)
+            if code == 404:
+                # Older server without /events/batch: fall back to one POST /event per item.
+                self._batch_supported = False
+            elif code == 200:
+                results = resp.get("results") if isinstance(resp.get("results"), list) else []
+                for item in results:
+                    ack = str((item or {}).get("ack", "")).strip()
+                    if ack:
+                        server_log_on_client("ack", ack)
+                self._backoff = 0.0
+                return True
+            elif self._retryable(code):
+                client_log("bridge", f"event batch failed ({code}): {resp}")
+                return False
+            else:
+                self._reject(batch, code, resp)
+                self._backoff = 0.0
+                return True
+        for pos, event in enumerate(batch):
+            code, resp = http_json("POST", f"{self.server}/event", event, self.timeout, self.token)
+            if code != 200 and not self._retryable(code):
+                self._reject([event], code, resp)
+                continue
+            if code != 200:
+                client_log("bridge", f"event failed ({code}): {resp}")
+                # Keep only the unsent tail for the spool.
+                del batch[:pos]
+                return False
+            ack = str(resp.get("ack", "")).strip()
+            if ack:
+                server_log_on_client("ack", ack)
+        self._backoff = 0.0
+        return True
+
+    def _spool_write(self, batch: list[dict[str, Any]]) -> None:
+        if not batch:
+            return
+        with self._spool_lock:
+            EVENT_SPOOL_PATH.parent.mkdir(parents=True, exist_ok=True)
+            with EVENT_SPOOL_PATH.open("a", encoding="utf-8") as fh:
+                for event in batch:
+                    fh.write(json.dumps(event, ensure_ascii=True, separators=(",", ":")) + "\n")
+            self._spooled = True
+
+    def _drain_spool(self) -> None:
+        with self._spool_lock:
+            try:
+                lines = EVENT_SPOOL_PATH.read_text(encoding="utf-8").splitlines()
+            except FileNotFoundError:
+                lines = []
+            events = []
+            for raw in lines:
+                try:
+                    events.append(json.loads(raw))
+                except json.JSONDecodeError:
+                    continue
+            if len(events) > self.spool_max_events:
+                client_log("bridge", f"event spool trimmed dropped={len(events) - self.spool_max_events}")
+                events = events[-self.spool_max_events :]
+            sent = 0
+            while sent < len(events):
+                batch = events[sent : sent + self.batch_size]
+                size = len(batch)
+                if not self._post(batch):
+                    sent += size - len(batch)
+                    break
+                sent += size
+            remaining = events[sent:]
+            if remaining:
+                EVENT_SPOOL_PATH.write_text(
+                    "".join(json.dumps(e, ensure_ascii=True, separators=(",", ":")) + "\n" for e in remaining),
+                    encoding="utf-8",
+                )
+                self._schedule_retry()
+                return
+            EVENT_SPOOL_PATH.unlink(missing_ok=True)
+            self._spooled = False
+            if sent:
+                client_log("bridge", f"event spool flushed events={sent}")
+
+
+_EVENT_SENDER: BridgeEventSender | None = None
+_EVENT_SENDER_LOCK = Lock()
+
+
+def get_event_sender(cfg: Config) -> BridgeEventSender:
+    global _EVENT_SENDER
+    with _EVENT_SENDER_LOCK:
+        if _EVENT_SENDER is None:
+            _EVENT_SENDER = BridgeEventSender(cfg)
+            atexit.register(flush_bridge_events, cfg)
+        return _EVENT_SENDER
+
+
+def flush_bridge_events(cfg: Config) -> None:
+    if _EVENT_SENDER is not None:
+        _EVENT_SENDER.close(float(cfg.event_sender.get("exit_flush_seconds", 10)))
+
+
 def send_bridge_event(
-    cfg: Config,
-    *,
-    job_id: str,
-    event_type: str,
-    task: str,
-    commit: str,
-    message: str,
-    workflow: str = "",
-    status: str = "",
-    conclusion: str = "",
-) -> dict[str, Any] | None:
-    server = f"http://{cfg.server_host}:{cfg.bridge_port}"
-    code, resp = http_json(
-        "POST",
-        f"{server}/event",
-        {
-            "job_id": job_id,
-            "event_type": event_type,
-            "task": task,
-            "commit": commit,
-            "message": _redact_sensitive_text(message),
-            "workflow": workflow,
-            "status": status,
-            "conclusion": conclusion,
-            "timestamp": int(time.time()),
-        },
-        cfg.request_timeout_seconds,
-        cfg.shared_secret,
-    )
+    cfg: Config,
+    *,
+    job_id: str,
+    event_type: str,
+    task: str,
+    commit: str,
+    message: str,
+    workflow: str = "",
+    status: str = "",
+    conclusion: str = "",
+) -> None:
+    """Queue a timeline event; the background sender delivers it and logs the server ack."""
+    event = {
+        "job_id": job_id,
+        "event_type": event_type,
+        "task": task,
+        "commit": commit,
+        "message": _redact_sensitive_text(message),
+        "workflow": workflow,
+        "status": status,
+        "conclusion": conclusion,
+        "timestamp": int(time.time()),
+    }
+    if cfg.event_sender.get("enabled", True):
+        get_event_sender(cfg).submit(event)
+        return
+    server = f"http://{cfg.server_host}:{cfg.bridge_port}"
+    code, resp = http_json("POST", f"{server}/event", event, cfg.request_timeout_seconds, cfg.shared_secret)
     if code == 200:
         ack = str(resp.get("ack", "")).strip()
         if ack:
             server_log_on_client("ack", ack)
-        return resp
+        return
     client_log("bridge", f"event failed ({code}): {resp}")
-    return None
-
-
+
+
 def _detect_task_key(task: str, mapping: dict[str, Any]) -> str | None:
-    task_l = task.lower()
-    match = TASK_NUMBER_RE.search(task)
-    if match:
-        task_no = f"{match.group('phase')}.{match.group('task')}"
-        phase_no = match.group("phase")
-        for key in (task_no, f"{phase_no}.x", phase_no):
-            if key in mapping:
-                return key
-    for token in ("api", "web", "platform"):
-        if token in task_l and token in mapping:
-            return token
-    if "default" in mapping:
-        return "default"
+    task_l = task.lower()
+    match = TASK_NUMBER_RE.search(task)
+    if match:
+        task_no = f"{match.group('phase')}.{match.group('task')}"
+        phase_no = match.group("phase")
+        for key in (task_no, f"{phase_no}.x", phase_no):
+            if key in mapping:
+                return key
+    for token in ("api", "web", "platform"):
+        if token in task_l and token in mapping:
+            return token
+    if "default" in mapping:
+        return "default"
     return None
 
 
@@ -585,12 +952,12 @@ def _git_diff_excerpt_for_prompt(cfg: Config, max_chars: int = 6000) -> str:
     if len(joined) > max_chars:
         joined = joined[: max_chars - 3] + "..."
     return joined
-
-
-def _today_iso_date() -> str:
-    return time.strftime("%Y-%m-%d")
-
-
+
+
+def _today_iso_date() -> str:
+    return time.strftime("%Y-%m-%d")
+
+
 def _select_task_command_set(
     task: str,
     *,
@@ -600,11 +967,11 @@ def _select_task_command_set(
     if not checks:
         return None, []
     task_key = _detect_task_key(task, mapping) if mapping else None
-    if task_key:
-        smoke_key = mapping.get(task_key)
-        if smoke_key and smoke_key in checks:
-            return smoke_key, checks[smoke_key]
-    task_l = task.lower()
+    if task_key:
+        smoke_key = mapping.get(task_key)
+        if smoke_key and smoke_key in checks:
+            return smoke_key, checks[smoke_key]
+    task_l = task.lower()
     for key in ("api", "web", "platform", "default"):
         if key in checks and (key == "default" or key in task_l):
             return key, checks[key]
@@ -1176,8 +1543,8 @@ def _run_command_set(
             if stderr_text and stderr_text != detail:
                 errors.append(f"stderr excerpt: {stderr_text[:800]}")
             break
-
-    ok = not errors
+
+    ok = not errors
     warnings: list[str] = []
     if dynamic_meta and dynamic_meta.get("generated"):
         note = str(dynamic_meta.get("notes", "")).strip()
@@ -1214,12 +1581,12 @@ def run_local_task_smoke(task: str, cfg: Config) -> dict[str, Any] | None:
         missing_mapping_error="Task {task_no} uchun explicit pre-push smoke mapping topilmadi.",
         missing_mapping_suggestion="bridge_config.laptop.json ichiga pre_push_mapping va pre_push_checks qo'shing.",
     )
-
-
+
+
 def _extract_task_no(task: str) -> str | None:
-    m = TASK_NUMBER_RE.search(task)
-    if not m:
-        return None
+    m = TASK_NUMBER_RE.search(task)
+    if not m:
+        return None
     return f"{m.group('phase')}.{m.group('task')}"
 
 
@@ -1688,8 +2055,8 @@ def _run_task_implementation_verifier(task: str, cfg: Config) -> dict[str, Any]
         write_last_result(result)
         return result
     return None
-
-
+
+
 def _standardize_reja_evidence(task: str, cfg: Config, result: dict[str, Any] | None) -> str:
     if not isinstance(result, dict):
         return "-"
@@ -1755,61 +2122,61 @@ def _standardize_reja_evidence(task: str, cfg: Config, result: dict[str, Any] |
 
 
 def mark_reja_task_completed(task: str, cfg: Config, result: dict[str, Any] | None = None) -> bool:
-    mark_cfg = cfg.reja_auto_mark
-    if not bool(mark_cfg.get("enabled", False)):
-        return False
-    task_no = _extract_task_no(task)
-    if not task_no:
-        return False
-    path = cfg.tasks_file
-    if not path.exists():
-        return False
-
-    target_date = str(mark_cfg.get("date_override", "")).strip() or _today_iso_date()
-    lines = path.read_text(encoding="utf-8", errors="ignore").splitlines()
-    changed = False
-    out_lines: list[str] = []
+    mark_cfg = cfg.reja_auto_mark
+    if not bool(mark_cfg.get("enabled", False)):
+        return False
+    task_no = _extract_task_no(task)
+    if not task_no:
+        return False
+    path = cfg.tasks_file
+    if not path.exists():
+        return False
+
+    target_date = str(mark_cfg.get("date_override", "")).strip() or _today_iso_date()
+    lines = path.read_text(encoding="utf-8", errors="ignore").splitlines()
+    changed = False
+    out_lines: list[str] = []
     evidence = _standardize_reja_evidence(task, cfg, result)
     row_re = re.compile(
         rf"^(\|\s*{re.escape(task_no)}\s*\|\s*[^|]+\|\s*)([^|]+?)(\s*\|\s*)([^|]+?)(\s*\|\s*)([^|]*?)(\s*\|.*)$"
     )
-    for line in lines:
-        m = row_re.match(line)
-        if not m:
-            out_lines.append(line)
-            continue
+    for line in lines:
+        m = row_re.match(line)
+        if not m:
+            out_lines.append(line)
+            continue
         new_line = (
             f"{m.group(1)}\U0001F7E2 Completed"
             f"{m.group(3)}{target_date}"
             f"{m.group(5)}{evidence}"
             f"{m.group(7)}"
         )
-        out_lines.append(new_line)
-        changed = changed or (new_line != line)
-    if not changed:
-        return False
-    path.write_text("\n".join(out_lines) + "\n", encoding="utf-8")
-    client_log("bridge", f"Reja marked completed: {task_no} ({path})")
-    return True
-
-
-def git_commit_if_needed(cfg: Config, message: str) -> bool:
-    repo = cfg.laptop_repo_path
-    status = run_git(["git", "status", "--porcelain"], repo)
-    if status.returncode != 0:
-        return False
-    if not status.stdout.strip():
-        return False
-    add = run_git(["git", "add", str(cfg.tasks_file)], repo)
-    if add.returncode != 0:
-        return False
-    commit = run_git(["git", "commit", "-m", message], repo)
-    if commit.returncode != 0:
-        return False
-    client_log("git", f"committed: {message}")
-    return True
-
-
+        out_lines.append(new_line)
+        changed = changed or (new_line != line)
+    if not changed:
+        return False
+    path.write_text("\n".join(out_lines) + "\n", encoding="utf-8")
+    client_log("bridge", f"Reja marked completed: {task_no} ({path})")
+    return True
+
+
+def git_commit_if_needed(cfg: Config, message: str) -> bool:
+    repo = cfg.laptop_repo_path
+    status = run_git(["git", "status", "--porcelain"], repo)
+    if status.returncode != 0:
+        return False
+    if not status.stdout.strip():
+        return False
+    add = run_git(["git", "add", str(cfg.tasks_file)], repo)
+    if add.returncode != 0:
+        return False
+    commit = run_git(["git", "commit", "-m", message], repo)
+    if commit.returncode != 0:
+        return False
+    client_log("git", f"committed: {message}")
+    return True
+
+
 def _run_local_codex_args(
     args: list[str],
     *,
@@ -1878,6 +2245,139 @@ def _run_local_codex_args(
     return subprocess.CompletedProcess(args=args, returncode=rc, stdout="".join(stdout_chunks), stderr="".join(stderr_chunks))
 
 
+# argv between `codex` and the prompt, newest CLI first; the capability probe picks one per binary.
+CODEX_ARGV_VARIANTS: list[list[str]] = [
+    ["-s", "danger-full-access", "-a", "never", "exec", "--skip-git-repo-check", "--color", "never"],
+    ["-s", "danger-full-access", "-a", "never", "exec", "--color", "never"],
+    ["exec", "--dangerously-bypass-approvals-and-sandbox", "--skip-git-repo-check", "--color", "never"],
+    ["exec", "--dangerously-bypass-approvals-and-sandbox", "--color", "never"],
+    ["-s", "danger-full-access", "-a", "never", "--no-interactive", "-q"],
+    ["-s", "danger-full-access", "-a", "never", "-q"],
+    ["-s", "danger-full-access", "-a", "never"],
+    ["--no-interactive", "-q"],
+    ["-q"],
+    [],
+]
+CODEX_REJECTED_ARG_MARKERS = (
+    "unexpected argument '--no-interactive'",
+    "unknown option '--no-interactive'",
+    "unexpected argument '-q'",
+    "unknown option '-q'",
+    "unrecognized subcommand 'exec'",
+)
+
+
+def _help_has_flag(help_text: str, flag: str) -> bool:
+    return re.search(rf"(?<![\w-]){re.escape(flag)}(?![\w-])", help_text) is not None
+
+
+class CodexCapabilities:
+    """Argv template per codex binary, chosen from `--help` output; persisted and re-probed when the binary changes."""
+
+    def __init__(self, path: Path, variants: list[list[str]]) -> None:
+        self.path = path
+        self.variants = variants
+        self._lock = Lock()
+        self._entries: dict[str, dict[str, Any]] | None = None
+        # Binaries being probed right now; concurrent callers fall back to walking every variant meanwhile.
+        self._probing: set[str] = set()
+
+    def _load(self) -> dict[str, dict[str, Any]]:
+        if self._entries is None:
+            try:
+                raw = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError):
+                raw = {}
+            self._entries = {str(k): v for k, v in raw.items() if isinstance(v, dict)}
+        return self._entries
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(self.path, json.dumps(self._load(), indent=2))
+
+    @staticmethod
+    def _fingerprint(codex_bin: str) -> tuple[str, str]:
+        # npm installs symlink the shim into the package, so the real path changes mtime on upgrade.
+        real = os.path.realpath(shutil.which(codex_bin) or codex_bin)
+        st = os.stat(real)
+        return real, f"{st.st_mtime_ns}:{st.st_size}"
+
+    def _probe(self, codex_bin: str, cwd: Path) -> dict[str, Any]:
+        def run(args: list[str]) -> str:
+            try:
+                res = subprocess.run(
+                    [codex_bin, *args],
+                    cwd=str(cwd),
+                    capture_output=True,
+                    text=True,
+                    timeout=30,
+                    encoding="utf-8",
+                    errors="replace",
+                )
+            except (OSError, subprocess.TimeoutExpired):
+                return ""
+            return (res.stdout or "") + (res.stderr or "") if res.returncode == 0 else ""
+
+        version = next((line.strip() for line in run(["--version"]).splitlines() if line.strip()), "")
+        top_help = run(["--help"])
+        has_exec = re.search(r"^\s+exec\b", top_help, re.MULTILINE) is not None
+        exec_help = run(["exec", "--help"]) if has_exec else ""
+        argv: list[str] | None = None
+        for variant in self.variants if top_help else []:
+            if "exec" in variant:
+                split = variant.index("exec")
+                before, after = variant[:split], variant[split + 1 :]
+                if not has_exec:
+                    continue
+            else:
+                before, after = variant, []
+            if all(_help_has_flag(top_help, f) for f in before if f.startswith("-")) and all(
+                _help_has_flag(exec_help, f) or _help_has_flag(top_help, f) for f in after if f.startswith("-")
+            ):
+                argv = variant
+                break
+        return {"version": version, "argv": argv, "probed_at": int(time.time())}
+
+    def template(self, codex_bin: str, cwd: Path) -> list[str] | None:
+        """Probed argv for this binary, or None when the probe could not decide (callers walk all variants)."""
+        try:
+            real, fingerprint = self._fingerprint(codex_bin)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._load().get(real)
+            stale = entry is None or entry.get("fingerprint") != fingerprint
+            if stale and real in self._probing:
+                return None
+            if stale:
+                self._probing.add(real)
+        if stale:
+            # The probe spawns codex up to three times; it runs unlocked so other reviews are not held up.
+            try:
+                entry = {**self._probe(codex_bin, cwd), "fingerprint": fingerprint}
+                with self._lock:
+                    self._load()[real] = entry
+                    self._save()
+            finally:
+                with self._lock:
+                    self._probing.discard(real)
+            client_log("codex", f"capability probe version={entry['version'] or '-'} argv={entry['argv']}")
+        argv = (entry or {}).get("argv")
+        return list(argv) if isinstance(argv, list) else None
+
+    def forget(self, codex_bin: str) -> None:
+        try:
+            real, _ = self._fingerprint(codex_bin)
+        except OSError:
+            return
+        with self._lock:
+            if self._load().pop(real, None) is not None:
+                self._save()
+
+
+CODEX_CAPS = CodexCapabilities(CODEX_CAPS_PATH, CODEX_ARGV_VARIANTS)
+
+
 def run_local_codex_prompt(
     prompt: str,
     cfg: Config,
@@ -1886,21 +2386,16 @@ def run_local_codex_prompt(
     stream_output: bool = False,
 ) -> subprocess.CompletedProcess[str]:
     repo = cfg.laptop_repo_path
-    variants = [
-        ["codex", "-s", "danger-full-access", "-a", "never", "exec", "--color", "never", prompt],
-        ["codex", "exec", "--dangerously-bypass-approvals-and-sandbox", "--color", "never", prompt],
-        ["codex", "-s", "danger-full-access", "-a", "never", "--no-interactive", "-q", prompt],
-        ["codex", "-s", "danger-full-access", "-a", "never", "-q", prompt],
-        ["codex", "-s", "danger-full-access", "-a", "never", prompt],
-        ["codex", "--no-interactive", "-q", prompt],
-        ["codex", "-q", prompt],
-        ["codex", prompt],
-    ]
-    last: subprocess.CompletedProcess[str] | None = None
-    for args in variants:
+    template = CODEX_CAPS.template("codex", repo)
+    variants = CODEX_ARGV_VARIANTS
+    if template is not None:
+        # The probed template goes first, so a working CLI costs exactly one spawn.
+        variants = [template] + [v for v in CODEX_ARGV_VARIANTS if v != template]
+    last: subprocess.CompletedProcess[str] | None = None
+    for argv in variants:
         try:
             res = _run_local_codex_args(
-                args,
+                ["codex", *argv, prompt],
                 cwd=repo,
                 timeout_seconds=timeout_seconds,
                 stream_output=stream_output,
@@ -1908,16 +2403,14 @@ def run_local_codex_prompt(
         except FileNotFoundError:
             raise
         last = res
-        stderr_l = (res.stderr or "").lower()
-        if res.returncode == 0:
-            return res
-        if "unexpected argument '--no-interactive'" in stderr_l or "unknown option '--no-interactive'" in stderr_l:
-            continue
-        if "unexpected argument '-q'" in stderr_l or "unknown option '-q'" in stderr_l:
-            continue
-        if "unrecognized subcommand 'exec'" in stderr_l:
-            continue
-        return res
+        stderr_l = (res.stderr or "").lower()
+        if res.returncode == 0:
+            return res
+        if any(marker in stderr_l for marker in CODEX_REJECTED_ARG_MARKERS):
+            if argv is variants[0] and template is not None:
+                CODEX_CAPS.forget("codex")
+            continue
+        return res
     if last is None:
         raise RuntimeError("codex invocation failed")
     return last
@@ -2075,14 +2568,14 @@ def _auto_fix_target_hints(task: str, stage: str, failure_result: dict[str, Any]
 
 
 def maybe_auto_fix_failure(task: str, cfg: Config, failure_result: dict[str, Any], attempt: int) -> bool:
-    af = cfg.auto_fix
-    if not bool(af.get("enabled", False)):
-        return False
-
-    max_retries = int(af.get("max_retries", 2))
-    if attempt >= max_retries:
-        return False
-
+    af = cfg.auto_fix
+    if not bool(af.get("enabled", False)):
+        return False
+
+    max_retries = int(af.get("max_retries", 2))
+    if attempt >= max_retries:
+        return False
+
     timeout = int(af.get("codex_timeout_seconds", 900))
     stage = str(failure_result.get("stage", "unknown"))
     commit = str(failure_result.get("commit", ""))
@@ -2140,7 +2633,7 @@ def maybe_auto_fix_failure(task: str, cfg: Config, failure_result: dict[str, Any
         "2. Lokal smoke/lint/typecheck zarur bo'lsa ishlat\n"
         "3. Kerakli o'zgarishlarni commit qil (inglizcha commit message)\n"
         "4. Push QILMA (bridge client push qiladi)\n"
-        "5. FAQAT qisqa yakun yoz: nima tuzatding\n"
+        "5. FAQAT qisqa yakun yoz: nima tuzatding\n"
     )
     client_log("bridge", f"auto-fix start attempt={attempt + 1}/{max_retries} stage={stage}")
     head_before = current_commit(cfg.laptop_repo_path)
@@ -2232,245 +2725,245 @@ def maybe_auto_fix_failure(task: str, cfg: Config, failure_result: dict[str, Any
     if summary:
         client_log("bridge", f"auto-fix summary: {summary[-1][:240]}")
     return True
-
-
-def _select_dokploy_targets(task: str, dk: dict[str, Any]) -> list[dict[str, str]]:
-    hooks = dk.get("hooks", {})
-    if isinstance(hooks, dict) and hooks:
-        normalized_hooks: dict[str, str] = {
-            str(k): str(v).strip() for k, v in hooks.items() if str(v).strip()
-        }
-        mapping = dk.get("task_deploy_mapping", {})
-        selected_aliases: list[str] = []
-        if isinstance(mapping, dict):
-            task_key = _detect_task_key(task, mapping)
-            if task_key:
-                mapped = mapping.get(task_key)
-                if isinstance(mapped, list):
-                    selected_aliases = [str(x) for x in mapped]
-                elif isinstance(mapped, str):
-                    selected_aliases = [mapped]
-
-        if not selected_aliases:
-            if "default" in normalized_hooks:
-                selected_aliases = ["default"]
-            elif "api" in normalized_hooks and "api" in task.lower():
-                selected_aliases = ["api"]
-            elif "web" in normalized_hooks and "web" in task.lower():
-                selected_aliases = ["web"]
-            elif "platform" in normalized_hooks and "platform" in task.lower():
-                selected_aliases = ["platform"]
-
-        targets: list[dict[str, str]] = []
-        for alias in selected_aliases:
-            hook = normalized_hooks.get(alias, "").strip()
-            if hook:
-                targets.append({"alias": alias, "url": hook})
-        return targets
-
-    # legacy single-hook fallback
-    hook = str(dk.get("deploy_hook_url", "")).strip()
-    if hook:
-        return [{"alias": "default", "url": hook}]
-    return []
-
-
-def trigger_dokploy_deploy(task: str, commit: str, cfg: Config, job_id: str) -> dict[str, Any] | None:
-    dk = cfg.dokploy
-    if not bool(dk.get("enabled", False)):
-        return None
-
-    targets = _select_dokploy_targets(task, dk)
-    if not targets:
-        return {
-            "status": "failure",
-            "tests_passed": False,
-            "errors": ["Dokploy deploy hook configured emas (hooks/deploy_hook_url topilmadi)."],
-            "warnings": [],
-            "suggestions": [
-                "bridge_config.laptop.json -> dokploy.hooks yoki dokploy.deploy_hook_url ni to'ldiring."
-            ],
-            "next_action": "fix_required",
-            "task": task,
-            "commit": commit,
-            "stage": "dokploy_deploy",
-        }
-
-    headers: dict[str, str] = {}
-    secret = str(dk.get("auth_header_value", "")).strip()
-    header_name = str(dk.get("auth_header_name", "")).strip()
-    if secret and header_name:
-        headers[header_name] = secret
-
-    responses: list[dict[str, Any]] = []
-    errors: list[str] = []
-    timeout_s = int(dk.get("request_timeout_seconds", cfg.request_timeout_seconds))
-
-    for target in targets:
-        alias = target["alias"]
-        hook = target["url"]
-        workflow_name = f"Dokploy:{alias}"
-        send_bridge_event(
-            cfg,
-            job_id=job_id,
-            event_type="dokploy_status",
-            task=task,
-            commit=commit,
-            message=f"{workflow_name} deploy hook yuborilyapti.",
-            workflow=workflow_name,
-            status="in_progress",
-        )
-        try:
-            req = request.Request(hook, data=b"", method="POST")
-            for k, v in headers.items():
-                req.add_header(k, v)
-            with request.urlopen(req, timeout=timeout_s) as resp:
-                body = resp.read().decode("utf-8", errors="ignore")
-                responses.append(
-                    {
-                        "alias": alias,
-                        "response_status": resp.status,
-                        "response_body": body[:1000],
-                    }
-                )
-                send_bridge_event(
-                    cfg,
-                    job_id=job_id,
-                    event_type="dokploy_status",
-                    task=task,
-                    commit=commit,
-                    message=f"{workflow_name} deploy hook accepted.",
-                    workflow=workflow_name,
-                    status="completed",
-                    conclusion="success",
-                )
-        except Exception as exc:
-            errors.append(f"{alias}: {exc}")
-            send_bridge_event(
-                cfg,
-                job_id=job_id,
-                event_type="dokploy_status",
-                task=task,
-                commit=commit,
-                message=f"{workflow_name} deploy hook xato bo'ldi, men uni tuzatib senga qayta yuboraman",
-                workflow=workflow_name,
-                status="completed",
-                conclusion="failure",
-            )
-
-    if errors:
-        return {
-            "status": "failure",
-            "tests_passed": False,
-            "errors": [f"Dokploy deploy hook failed: {e}" for e in errors],
-            "warnings": [],
-            "suggestions": ["Dokploy hook URL/headerlar va mappingni tekshiring."],
-            "next_action": "fix_required",
-            "task": task,
-            "commit": commit,
-            "stage": "dokploy_deploy",
-            "targets": [t["alias"] for t in targets],
-            "responses": responses,
-        }
-
-    return {"status": "success", "targets": [t["alias"] for t in targets], "responses": responses}
-
-
-def run_runtime_health_checks(task: str, commit: str, cfg: Config, job_id: str) -> dict[str, Any] | None:
-    rc = cfg.runtime_checks
-    if not bool(rc.get("enabled", False)):
-        return None
-
-    urls = [u for u in rc.get("urls", []) if isinstance(u, dict) and str(u.get("url", "")).strip()]
-    if not urls:
-        return None
-
-    timeout_seconds = int(rc.get("timeout_seconds", 300))
-    interval_seconds = int(rc.get("poll_interval_seconds", 5))
-    request_timeout = int(rc.get("request_timeout_seconds", cfg.request_timeout_seconds))
-
-    pending = {str(u.get("name") or u["url"]): dict(u) for u in urls}
-    last_errors: dict[str, str] = {}
-    started = time.time()
-
-    for name in pending:
-        send_bridge_event(
-            cfg,
-            job_id=job_id,
-            event_type="runtime_status",
-            task=task,
-            commit=commit,
-            message=f"{name} health check boshlandi.",
-            workflow=name,
-            status="queued",
-        )
-
-    while time.time() - started < timeout_seconds:
-        completed_now: list[str] = []
-        for name, item in list(pending.items()):
-            url = str(item.get("url", ""))
-            expect_status = int(item.get("expect_status", 200))
-            try:
-                req = request.Request(url, method="GET")
-                with request.urlopen(req, timeout=request_timeout) as resp:
-                    status_code = int(resp.status)
-                    if status_code == expect_status:
-                        send_bridge_event(
-                            cfg,
-                            job_id=job_id,
-                            event_type="runtime_status",
-                            task=task,
-                            commit=commit,
-                            message=f"{name} OK ({status_code})",
-                            workflow=name,
-                            status="completed",
-                            conclusion="success",
-                        )
-                        completed_now.append(name)
-                    else:
-                        last_errors[name] = f"unexpected status {status_code}, expected {expect_status}"
-            except Exception as exc:
-                last_errors[name] = str(exc)
-
-        for name in completed_now:
-            pending.pop(name, None)
-
-        if not pending:
-            return {
-                "status": "success",
-                "checks": [{"name": str(u.get("name") or u["url"]), "url": u["url"]} for u in urls],
-            }
-
-        time.sleep(interval_seconds)
-
-    for name in pending:
-        send_bridge_event(
-            cfg,
-            job_id=job_id,
-            event_type="runtime_status",
-            task=task,
-            commit=commit,
-            message=f"{name} runtime check timeout/failure",
-            workflow=name,
-            status="completed",
-            conclusion="failure",
-        )
-    return {
-        "status": "failure",
-        "tests_passed": False,
-        "errors": [f"Runtime health check failed: {name}: {last_errors.get(name, 'timeout')}" for name in pending],
-        "warnings": [],
-        "suggestions": ["Dokploy logs va domain health endpointlarni tekshiring."],
-        "next_action": "fix_required",
-        "task": task,
-        "commit": commit,
-        "stage": "runtime_health",
-    }
 
 
-def _post_deploy_settle_wait(task: str, commit: str, cfg: Config, job_id: str) -> None:
-    seconds = int(cfg.dokploy.get("post_deploy_settle_seconds", 0) or 0)
-    if seconds <= 0:
+def _select_dokploy_targets(task: str, dk: dict[str, Any]) -> list[dict[str, str]]:
+    hooks = dk.get("hooks", {})
+    if isinstance(hooks, dict) and hooks:
+        normalized_hooks: dict[str, str] = {
+            str(k): str(v).strip() for k, v in hooks.items() if str(v).strip()
+        }
+        mapping = dk.get("task_deploy_mapping", {})
+        selected_aliases: list[str] = []
+        if isinstance(mapping, dict):
+            task_key = _detect_task_key(task, mapping)
+            if task_key:
+                mapped = mapping.get(task_key)
+                if isinstance(mapped, list):
+                    selected_aliases = [str(x) for x in mapped]
+                elif isinstance(mapped, str):
+                    selected_aliases = [mapped]
+
+        if not selected_aliases:
+            if "default" in normalized_hooks:
+                selected_aliases = ["default"]
+            elif "api" in normalized_hooks and "api" in task.lower():
+                selected_aliases = ["api"]
+            elif "web" in normalized_hooks and "web" in task.lower():
+                selected_aliases = ["web"]
+            elif "platform" in normalized_hooks and "platform" in task.lower():
+                selected_aliases = ["platform"]
+
+        targets: list[dict[str, str]] = []
+        for alias in selected_aliases:
+            hook = normalized_hooks.get(alias, "").strip()
+            if hook:
+                targets.append({"alias": alias, "url": hook})
+        return targets
+
+    # legacy single-hook fallback
+    hook = str(dk.get("deploy_hook_url", "")).strip()
+    if hook:
+        return [{"alias": "default", "url": hook}]
+    return []
+
+
+def trigger_dokploy_deploy(task: str, commit: str, cfg: Config, job_id: str) -> dict[str, Any] | None:
+    dk = cfg.dokploy
+    if not bool(dk.get("enabled", False)):
+        return None
+
+    targets = _select_dokploy_targets(task, dk)
+    if not targets:
+        return {
+            "status": "failure",
+            "tests_passed": False,
+            "errors": ["Dokploy deploy hook configured emas (hooks/deploy_hook_url topilmadi)."],
+            "warnings": [],
+            "suggestions": [
+                "bridge_config.laptop.json -> dokploy.hooks yoki dokploy.deploy_hook_url ni to'ldiring."
+            ],
+            "next_action": "fix_required",
+            "task": task,
+            "commit": commit,
+            "stage": "dokploy_deploy",
+        }
+
+    headers: dict[str, str] = {}
+    secret = str(dk.get("auth_header_value", "")).strip()
+    header_name = str(dk.get("auth_header_name", "")).strip()
+    if secret and header_name:
+        headers[header_name] = secret
+
+    responses: list[dict[str, Any]] = []
+    errors: list[str] = []
+    timeout_s = int(dk.get("request_timeout_seconds", cfg.request_timeout_seconds))
+
+    for target in targets:
+        alias = target["alias"]
+        hook = target["url"]
+        workflow_name = f"Dokploy:{alias}"
+        send_bridge_event(
+            cfg,
+            job_id=job_id,
+            event_type="dokploy_status",
+            task=task,
+            commit=commit,
+            message=f"{workflow_name} deploy hook yuborilyapti.",
+            workflow=workflow_name,
+            status="in_progress",
+        )
+        try:
+            req = request.Request(hook, data=b"", method="POST")
+            for k, v in headers.items():
+                req.add_header(k, v)
+            with request.urlopen(req, timeout=timeout_s) as resp:
+                body = resp.read().decode("utf-8", errors="ignore")
+                responses.append(
+                    {
+                        "alias": alias,
+                        "response_status": resp.status,
+                        "response_body": body[:1000],
+                    }
+                )
+                send_bridge_event(
+                    cfg,
+                    job_id=job_id,
+                    event_type="dokploy_status",
+                    task=task,
+                    commit=commit,
+                    message=f"{workflow_name} deploy hook accepted.",
+                    workflow=workflow_name,
+                    status="completed",
+                    conclusion="success",
+                )
+        except Exception as exc:
+            errors.append(f"{alias}: {exc}")
+            send_bridge_event(
+                cfg,
+                job_id=job_id,
+                event_type="dokploy_status",
+                task=task,
+                commit=commit,
+                message=f"{workflow_name} deploy hook xato bo'ldi, men uni tuzatib senga qayta yuboraman",
+                workflow=workflow_name,
+                status="completed",
+                conclusion="failure",
+            )
+
+    if errors:
+        return {
+            "status": "failure",
+            "tests_passed": False,
+            "errors": [f"Dokploy deploy hook failed: {e}" for e in errors],
+            "warnings": [],
+            "suggestions": ["Dokploy hook URL/headerlar va mappingni tekshiring."],
+            "next_action": "fix_required",
+            "task": task,
+            "commit": commit,
+            "stage": "dokploy_deploy",
+            "targets": [t["alias"] for t in targets],
+            "responses": responses,
+        }
+
+    return {"status": "success", "targets": [t["alias"] for t in targets], "responses": responses}
+
+
+def run_runtime_health_checks(task: str, commit: str, cfg: Config, job_id: str) -> dict[str, Any] | None:
+    rc = cfg.runtime_checks
+    if not bool(rc.get("enabled", False)):
+        return None
+
+    urls = [u for u in rc.get("urls", []) if isinstance(u, dict) and str(u.get("url", "")).strip()]
+    if not urls:
+        return None
+
+    timeout_seconds = int(rc.get("timeout_seconds", 300))
+    interval_seconds = int(rc.get("poll_interval_seconds", 5))
+    request_timeout = int(rc.get("request_timeout_seconds", cfg.request_timeout_seconds))
+
+    pending = {str(u.get("name") or u["url"]): dict(u) for u in urls}
+    last_errors: dict[str, str] = {}
+    started = time.time()
+
+    for name in pending:
+        send_bridge_event(
+            cfg,
+            job_id=job_id,
+            event_type="runtime_status",
+            task=task,
+            commit=commit,
+            message=f"{name} health check boshlandi.",
+            workflow=name,
+            status="queued",
+        )
+
+    while time.time() - started < timeout_seconds:
+        completed_now: list[str] = []
+        for name, item in list(pending.items()):
+            url = str(item.get("url", ""))
+            expect_status = int(item.get("expect_status", 200))
+            try:
+                req = request.Request(url, method="GET")
+                with request.urlopen(req, timeout=request_timeout) as resp:
+                    status_code = int(resp.status)
+                    if status_code == expect_status:
+                        send_bridge_event(
+                            cfg,
+                            job_id=job_id,
+                            event_type="runtime_status",
+                            task=task,
+                            commit=commit,
+                            message=f"{name} OK ({status_code})",
+                            workflow=name,
+                            status="completed",
+                            conclusion="success",
+                        )
+                        completed_now.append(name)
+                    else:
+                        last_errors[name] = f"unexpected status {status_code}, expected {expect_status}"
+            except Exception as exc:
+                last_errors[name] = str(exc)
+
+        for name in completed_now:
+            pending.pop(name, None)
+
+        if not pending:
+            return {
+                "status": "success",
+                "checks": [{"name": str(u.get("name") or u["url"]), "url": u["url"]} for u in urls],
+            }
+
+        time.sleep(interval_seconds)
+
+    for name in pending:
+        send_bridge_event(
+            cfg,
+            job_id=job_id,
+            event_type="runtime_status",
+            task=task,
+            commit=commit,
+            message=f"{name} runtime check timeout/failure",
+            workflow=name,
+            status="completed",
+            conclusion="failure",
+        )
+    return {
+        "status": "failure",
+        "tests_passed": False,
+        "errors": [f"Runtime health check failed: {name}: {last_errors.get(name, 'timeout')}" for name in pending],
+        "warnings": [],
+        "suggestions": ["Dokploy logs va domain health endpointlarni tekshiring."],
+        "next_action": "fix_required",
+        "task": task,
+        "commit": commit,
+        "stage": "runtime_health",
+    }
+
+
+def _post_deploy_settle_wait(task: str, commit: str, cfg: Config, job_id: str) -> None:
+    seconds = int(cfg.dokploy.get("post_deploy_settle_seconds", 0) or 0)
+    if seconds <= 0:
         return
     send_bridge_event(
         cfg,
@@ -2794,292 +3287,292 @@ def run_post_deploy_feature_smoke(task: str, commit: str, cfg: Config, job_id: s
         conclusion="success" if ok else "failure",
     )
     return result
-
-
-def repo_slug_from_git_remote(repo: Path) -> str | None:
-    remote = run_git(["git", "remote", "get-url", "origin"], repo)
-    if remote.returncode != 0:
-        return None
-    url = remote.stdout.strip()
-    if not url:
-        return None
-    # https://github.com/owner/repo(.git)
-    m = re.search(r"github\.com[:/](?P<owner>[^/]+)/(?P<repo>[^/]+?)(?:\.git)?$", url)
-    if not m:
-        return None
-    return f"{m.group('owner')}/{m.group('repo')}"
-
-
-def write_last_result(payload: dict[str, Any]) -> None:
-    LAST_RESULT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    LAST_RESULT_PATH.write_text(json.dumps(payload, indent=2), encoding="utf-8")
-
-
-def read_last_result() -> dict[str, Any] | None:
-    if not LAST_RESULT_PATH.exists():
-        return None
-    try:
-        data = json.loads(LAST_RESULT_PATH.read_text(encoding="utf-8"))
-    except Exception:
-        return None
-    return data if isinstance(data, dict) else None
-
-
-def _extract_text_from_message_content(content: Any) -> str:
-    parts: list[str] = []
-    if isinstance(content, list):
-        for item in content:
-            if not isinstance(item, dict):
-                continue
-            text = item.get("text")
-            if isinstance(text, str) and text.strip():
-                parts.append(text.strip())
-    elif isinstance(content, str) and content.strip():
-        parts.append(content.strip())
-    return "\n".join(parts).strip()
-
-
-def resolve_session_jsonl_path(sc: dict[str, Any]) -> Path | None:
-    raw_path = str(sc.get("path", "")).strip()
-    if raw_path:
-        path = Path(os.path.expandvars(os.path.expanduser(raw_path)))
-        return path
-
-    session_id = str(sc.get("session_id", "")).strip().lower()
-    if not session_id:
-        return None
-
-    sessions_root = Path(os.path.expandvars(os.path.expanduser(str(sc.get("sessions_root", "~/.codex/sessions")))))
-    if not sessions_root.exists():
-        return sessions_root / f"*{session_id}*.jsonl"
-
-    matches = sorted(
-        [p for p in sessions_root.rglob("*.jsonl") if session_id in p.name.lower()],
-        key=lambda p: p.stat().st_mtime,
-        reverse=True,
-    )
-    return matches[0] if matches else sessions_root / f"*{session_id}*.jsonl"
-
-
-def build_session_context_excerpt(
-    cfg: Config,
-    *,
-    session_id_override: str | None = None,
-    disable_session_context: bool = False,
-) -> dict[str, Any] | None:
-    sc = dict(cfg.session_context)
-    if disable_session_context:
-        return None
-    if session_id_override:
-        sc["enabled"] = True
-        sc.pop("path", None)
-        sc["session_id"] = session_id_override
-    if not bool(sc.get("enabled", False)):
-        return None
-
-    path = resolve_session_jsonl_path(sc)
-    if path is None:
-        return None
-    if not path.exists():
-        return {
-            "enabled": True,
-            "source_path": str(path),
-            "error": "session file not found",
-            "excerpt": "",
-        }
-
-    max_messages = int(sc.get("max_messages", 12))
-    max_chars = int(sc.get("max_chars", 4000))
-    include_roles = {str(x).strip() for x in sc.get("roles", ["user", "assistant"]) if str(x).strip()}
-
-    extracted: list[dict[str, str]] = []
-    try:
-        for raw_line in path.read_text(encoding="utf-8", errors="ignore").splitlines():
-            raw_line = raw_line.strip()
-            if not raw_line:
-                continue
-            try:
-                row = json.loads(raw_line)
-            except json.JSONDecodeError:
-                continue
-
-            row_type = str(row.get("type", ""))
-            payload = row.get("payload", {})
-            if not isinstance(payload, dict):
-                continue
-
-            role: str | None = None
-            text: str = ""
-            if row_type == "response_item" and payload.get("type") == "message":
-                role_val = payload.get("role")
-                role = str(role_val) if isinstance(role_val, str) else None
-                text = _extract_text_from_message_content(payload.get("content"))
-            elif row_type == "event_msg":
-                evt = str(payload.get("type", ""))
-                if evt == "user_message":
-                    role = "user"
-                    text = str(payload.get("message", "")).strip()
-
-            if not role or role not in include_roles or not text:
-                continue
-            extracted.append({"role": role, "text": text})
-    except Exception as exc:
-        return {
-            "enabled": True,
-            "source_path": str(path),
-            "error": f"session read failed: {exc}",
-            "excerpt": "",
-        }
-
-    extracted = extracted[-max_messages:]
-    lines: list[str] = []
-    remaining = max_chars
-    for item in reversed(extracted):
-        block = f"{item['role'].upper()}: {item['text']}"
-        if len(block) > remaining:
-            block = block[: max(0, remaining - 3)] + "..."
-        if block:
-            lines.append(block)
-            remaining -= len(block) + 2
-        if remaining <= 0:
-            break
-    lines.reverse()
-
-    return {
-        "enabled": True,
-        "source_path": str(path),
-        "message_count": len(extracted),
-        "excerpt": "\n\n".join(lines),
-    }
-
-
+
+
+def repo_slug_from_git_remote(repo: Path) -> str | None:
+    remote = run_git(["git", "remote", "get-url", "origin"], repo)
+    if remote.returncode != 0:
+        return None
+    url = remote.stdout.strip()
+    if not url:
+        return None
+    # https://github.com/owner/repo(.git)
+    m = re.search(r"github\.com[:/](?P<owner>[^/]+)/(?P<repo>[^/]+?)(?:\.git)?$", url)
+    if not m:
+        return None
+    return f"{m.group('owner')}/{m.group('repo')}"
+
+
+def write_last_result(payload: dict[str, Any]) -> None:
+    LAST_RESULT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    LAST_RESULT_PATH.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+
+def read_last_result() -> dict[str, Any] | None:
+    if not LAST_RESULT_PATH.exists():
+        return None
+    try:
+        data = json.loads(LAST_RESULT_PATH.read_text(encoding="utf-8"))
+    except Exception:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _extract_text_from_message_content(content: Any) -> str:
+    parts: list[str] = []
+    if isinstance(content, list):
+        for item in content:
+            if not isinstance(item, dict):
+                continue
+            text = item.get("text")
+            if isinstance(text, str) and text.strip():
+                parts.append(text.strip())
+    elif isinstance(content, str) and content.strip():
+        parts.append(content.strip())
+    return "\n".join(parts).strip()
+
+
+def resolve_session_jsonl_path(sc: dict[str, Any]) -> Path | None:
+    raw_path = str(sc.get("path", "")).strip()
+    if raw_path:
+        path = Path(os.path.expandvars(os.path.expanduser(raw_path)))
+        return path
+
+    session_id = str(sc.get("session_id", "")).strip().lower()
+    if not session_id:
+        return None
+
+    sessions_root = Path(os.path.expandvars(os.path.expanduser(str(sc.get("sessions_root", "~/.codex/sessions")))))
+    if not sessions_root.exists():
+        return sessions_root / f"*{session_id}*.jsonl"
+
+    matches = sorted(
+        [p for p in sessions_root.rglob("*.jsonl") if session_id in p.name.lower()],
+        key=lambda p: p.stat().st_mtime,
+        reverse=True,
+    )
+    return matches[0] if matches else sessions_root / f"*{session_id}*.jsonl"
+
+
+def build_session_context_excerpt(
+    cfg: Config,
+    *,
+    session_id_override: str | None = None,
+    disable_session_context: bool = False,
+) -> dict[str, Any] | None:
+    sc = dict(cfg.session_context)
+    if disable_session_context:
+        return None
+    if session_id_override:
+        sc["enabled"] = True
+        sc.pop("path", None)
+        sc["session_id"] = session_id_override
+    if not bool(sc.get("enabled", False)):
+        return None
+
+    path = resolve_session_jsonl_path(sc)
+    if path is None:
+        return None
+    if not path.exists():
+        return {
+            "enabled": True,
+            "source_path": str(path),
+            "error": "session file not found",
+            "excerpt": "",
+        }
+
+    max_messages = int(sc.get("max_messages", 12))
+    max_chars = int(sc.get("max_chars", 4000))
+    include_roles = {str(x).strip() for x in sc.get("roles", ["user", "assistant"]) if str(x).strip()}
+
+    extracted: list[dict[str, str]] = []
+    try:
+        for raw_line in path.read_text(encoding="utf-8", errors="ignore").splitlines():
+            raw_line = raw_line.strip()
+            if not raw_line:
+                continue
+            try:
+                row = json.loads(raw_line)
+            except json.JSONDecodeError:
+                continue
+
+            row_type = str(row.get("type", ""))
+            payload = row.get("payload", {})
+            if not isinstance(payload, dict):
+                continue
+
+            role: str | None = None
+            text: str = ""
+            if row_type == "response_item" and payload.get("type") == "message":
+                role_val = payload.get("role")
+                role = str(role_val) if isinstance(role_val, str) else None
+                text = _extract_text_from_message_content(payload.get("content"))
+            elif row_type == "event_msg":
+                evt = str(payload.get("type", ""))
+                if evt == "user_message":
+                    role = "user"
+                    text = str(payload.get("message", "")).strip()
+
+            if not role or role not in include_roles or not text:
+                continue
+            extracted.append({"role": role, "text": text})
+    except Exception as exc:
+        return {
+            "enabled": True,
+            "source_path": str(path),
+            "error": f"session read failed: {exc}",
+            "excerpt": "",
+        }
+
+    extracted = extracted[-max_messages:]
+    lines: list[str] = []
+    remaining = max_chars
+    for item in reversed(extracted):
+        block = f"{item['role'].upper()}: {item['text']}"
+        if len(block) > remaining:
+            block = block[: max(0, remaining - 3)] + "..."
+        if block:
+            lines.append(block)
+            remaining -= len(block) + 2
+        if remaining <= 0:
+            break
+    lines.reverse()
+
+    return {
+        "enabled": True,
+        "source_path": str(path),
+        "message_count": len(extracted),
+        "excerpt": "\n\n".join(lines),
+    }
+
+
 def wait_for_github_ci(commit: str, task: str, cfg: Config, job_id: str) -> dict[str, Any] | None:
-    ci_cfg = cfg.github_ci
-    if not bool(ci_cfg.get("enabled", False)):
-        return None
-
-    repo = cfg.laptop_repo_path
-    repo_slug = str(ci_cfg.get("repo", "")).strip() or repo_slug_from_git_remote(repo)
-    if not repo_slug:
-        return {
-            "status": "failure",
-            "tests_passed": False,
-            "errors": ["GitHub repo slug aniqlanmadi (origin remote)."],
-            "warnings": [],
-            "suggestions": ["bridge_config.json ichiga github_ci.repo = \"owner/repo\" qo'shing."],
-            "next_action": "fix_required",
-            "task": task,
-            "commit": commit,
-            "stage": "github_ci",
-        }
-
+    ci_cfg = cfg.github_ci
+    if not bool(ci_cfg.get("enabled", False)):
+        return None
+
+    repo = cfg.laptop_repo_path
+    repo_slug = str(ci_cfg.get("repo", "")).strip() or repo_slug_from_git_remote(repo)
+    if not repo_slug:
+        return {
+            "status": "failure",
+            "tests_passed": False,
+            "errors": ["GitHub repo slug aniqlanmadi (origin remote)."],
+            "warnings": [],
+            "suggestions": ["bridge_config.json ichiga github_ci.repo = \"owner/repo\" qo'shing."],
+            "next_action": "fix_required",
+            "task": task,
+            "commit": commit,
+            "stage": "github_ci",
+        }
+
     timeout_seconds = int(ci_cfg.get("timeout_seconds", 1800))
     interval_seconds = int(ci_cfg.get("poll_interval_seconds", cfg.poll_interval_seconds))
     max_transient_errors = int(ci_cfg.get("max_transient_errors", 6))
     no_run_grace_seconds = int(ci_cfg.get("no_run_grace_seconds", 45))
-    require_runs = bool(ci_cfg.get("require_runs", False))
-    watch_workflows = {str(x).strip() for x in ci_cfg.get("workflows", []) if str(x).strip()}
-    prediction = predict_ci_trigger_for_commit(cfg, commit)
-    if prediction.get("known") and not prediction.get("expect_runs"):
-        msg = (
-            "Commit pathlari bo'yicha GitHub CI trigger kutilmaydi "
-            f"({prediction.get('reason', 'path prediction')}); CI skip qilinmoqda"
-        )
-        send_bridge_event(
-            cfg,
-            job_id=job_id,
-            event_type="ci_status",
-            task=task,
-            commit=commit,
-            message=msg,
-            workflow="github-ci",
-            status="completed",
-            conclusion="skipped",
-        )
-        return {
-            "status": "success",
-            "tests_passed": True,
-            "errors": [],
-            "warnings": [msg],
-            "suggestions": [],
-            "next_action": "proceed",
-            "task": task,
-            "commit": commit,
-            "stage": "github_ci",
-            "github_ci": {
-                "repo": repo_slug,
-                "runs": [],
-                "skipped_no_runs": True,
-                "path_prediction": prediction,
-            },
-        }
-
-    try:
-        gh_check = run_cmd(["gh", "--version"], repo)
-    except FileNotFoundError:
-        return {
-            "status": "failure",
-            "tests_passed": False,
-            "errors": ["GitHub CLI (gh) topilmadi (PATH)."],
-            "warnings": [],
-            "suggestions": [
-                "Laptopga GitHub CLI o'rnating: https://cli.github.com/",
-                "O'rnatilgandan keyin yangi terminal oching va `gh auth status` ni tekshiring.",
-            ],
-            "next_action": "fix_required",
-            "task": task,
-            "commit": commit,
-            "stage": "github_ci",
-        }
-    if gh_check.returncode != 0:
-        return {
-            "status": "failure",
-            "tests_passed": False,
-            "errors": ["GitHub CLI (gh) ishlamadi.", gh_check.stderr.strip() or gh_check.stdout.strip()],
-            "warnings": [],
-            "suggestions": ["`gh auth status` ni tekshiring va login qiling."],
-            "next_action": "fix_required",
-            "task": task,
-            "commit": commit,
-            "stage": "github_ci",
-        }
-
+    require_runs = bool(ci_cfg.get("require_runs", False))
+    watch_workflows = {str(x).strip() for x in ci_cfg.get("workflows", []) if str(x).strip()}
+    prediction = predict_ci_trigger_for_commit(cfg, commit)
+    if prediction.get("known") and not prediction.get("expect_runs"):
+        msg = (
+            "Commit pathlari bo'yicha GitHub CI trigger kutilmaydi "
+            f"({prediction.get('reason', 'path prediction')}); CI skip qilinmoqda"
+        )
+        send_bridge_event(
+            cfg,
+            job_id=job_id,
+            event_type="ci_status",
+            task=task,
+            commit=commit,
+            message=msg,
+            workflow="github-ci",
+            status="completed",
+            conclusion="skipped",
+        )
+        return {
+            "status": "success",
+            "tests_passed": True,
+            "errors": [],
+            "warnings": [msg],
+            "suggestions": [],
+            "next_action": "proceed",
+            "task": task,
+            "commit": commit,
+            "stage": "github_ci",
+            "github_ci": {
+                "repo": repo_slug,
+                "runs": [],
+                "skipped_no_runs": True,
+                "path_prediction": prediction,
+            },
+        }
+
+    try:
+        gh_check = run_cmd(["gh", "--version"], repo)
+    except FileNotFoundError:
+        return {
+            "status": "failure",
+            "tests_passed": False,
+            "errors": ["GitHub CLI (gh) topilmadi (PATH)."],
+            "warnings": [],
+            "suggestions": [
+                "Laptopga GitHub CLI o'rnating: https://cli.github.com/",
+                "O'rnatilgandan keyin yangi terminal oching va `gh auth status` ni tekshiring.",
+            ],
+            "next_action": "fix_required",
+            "task": task,
+            "commit": commit,
+            "stage": "github_ci",
+        }
+    if gh_check.returncode != 0:
+        return {
+            "status": "failure",
+            "tests_passed": False,
+            "errors": ["GitHub CLI (gh) ishlamadi.", gh_check.stderr.strip() or gh_check.stdout.strip()],
+            "warnings": [],
+            "suggestions": ["`gh auth status` ni tekshiring va login qiling."],
+            "next_action": "fix_required",
+            "task": task,
+            "commit": commit,
+            "stage": "github_ci",
+        }
+
     started = time.time()
     dots = 0
     last_runs: list[dict[str, Any]] = []
     announced_states: dict[str, str] = {}
     transient_errors = 0
     while time.time() - started < timeout_seconds:
-        cmd = [
-            "gh",
-            "run",
-            "list",
-            "--repo",
-            repo_slug,
-            "--commit",
-            commit,
-            "--limit",
-            "20",
-            "--json",
-            "databaseId,workflowName,status,conclusion,url,headSha,displayTitle",
-        ]
-        try:
-            res = run_cmd(cmd, repo)
-        except FileNotFoundError:
-            return {
-                "status": "failure",
-                "tests_passed": False,
-                "errors": ["GitHub CLI (gh) topilmadi (PATH)."],
-                "warnings": [],
-                "suggestions": [
-                    "Laptopga GitHub CLI o'rnating: https://cli.github.com/",
-                    "O'rnatilgandan keyin yangi terminal oching va `gh auth status` ni tekshiring.",
-                ],
-                "next_action": "fix_required",
-                "task": task,
-                "commit": commit,
-                "stage": "github_ci",
-            }
+        cmd = [
+            "gh",
+            "run",
+            "list",
+            "--repo",
+            repo_slug,
+            "--commit",
+            commit,
+            "--limit",
+            "20",
+            "--json",
+            "databaseId,workflowName,status,conclusion,url,headSha,displayTitle",
+        ]
+        try:
+            res = run_cmd(cmd, repo)
+        except FileNotFoundError:
+            return {
+                "status": "failure",
+                "tests_passed": False,
+                "errors": ["GitHub CLI (gh) topilmadi (PATH)."],
+                "warnings": [],
+                "suggestions": [
+                    "Laptopga GitHub CLI o'rnating: https://cli.github.com/",
+                    "O'rnatilgandan keyin yangi terminal oching va `gh auth status` ni tekshiring.",
+                ],
+                "next_action": "fix_required",
+                "task": task,
+                "commit": commit,
+                "stage": "github_ci",
+            }
         if res.returncode != 0:
             err_text = (res.stderr.strip() or res.stdout.strip())
             err_l = err_text.lower()
@@ -3116,247 +3609,460 @@ def wait_for_github_ci(commit: str, task: str, cfg: Config, job_id: str) -> dict
                 "stage": "github_ci",
             }
         transient_errors = 0
-
-        try:
-            runs = json.loads(res.stdout or "[]")
-        except json.JSONDecodeError:
-            runs = []
-        runs = [r for r in runs if str(r.get("headSha", "")).startswith(commit)]
-        if watch_workflows:
-            runs = [r for r in runs if str(r.get("workflowName", "")) in watch_workflows]
-        last_runs = runs
-        for run in runs:
-            run_id = str(run.get("databaseId", ""))
-            workflow = str(run.get("workflowName", ""))
-            status = str(run.get("status", ""))
-            conclusion = str(run.get("conclusion", ""))
-            signature = f"{status}|{conclusion}"
-            if announced_states.get(run_id) == signature:
-                continue
-            announced_states[run_id] = signature
-
-            if status != "completed":
-                msg = f"{workflow} holati: {status}"
-            elif str(conclusion).lower() == "success":
-                msg = f"{workflow} success bo'ldi"
-            else:
-                msg = f"{workflow} xato bo'ldi, men uni tuzatib senga qayta yuboraman"
-
-            send_bridge_event(
-                cfg,
-                job_id=job_id,
-                event_type="ci_status",
-                task=task,
-                commit=commit,
-                message=msg,
-                workflow=workflow,
-                status=status,
-                conclusion=conclusion,
-            )
-
-        if runs:
-            pending = [r for r in runs if str(r.get("status", "")) != "completed"]
-            if not pending:
-                failed = [
-                    r
-                    for r in runs
-                    if str(r.get("conclusion", "")).lower() not in {"success", "skipped", "neutral"}
-                ]
-                if failed:
-                    return {
-                        "status": "failure",
-                        "tests_passed": False,
-                        "errors": [
-                            f"GitHub CI failed: {r.get('workflowName')} ({r.get('conclusion')})"
-                            for r in failed
-                        ],
-                        "warnings": [],
-                        "suggestions": [
-                            "gh run view <run-id> --log-failed bilan CI logni ko'ring.",
-                            "Xatoni tuzatib qayta commit/push qiling.",
-                        ],
-                        "next_action": "fix_required",
-                        "task": task,
-                        "commit": commit,
-                        "stage": "github_ci",
-                        "github_ci": {"repo": repo_slug, "runs": runs},
-                    }
-                return {
-                    "status": "success",
-                    "tests_passed": True,
-                    "errors": [],
-                    "warnings": [],
-                    "suggestions": [],
-                    "next_action": "proceed",
-                    "task": task,
-                    "commit": commit,
-                    "stage": "github_ci",
-                    "github_ci": {"repo": repo_slug, "runs": runs},
-                }
-        else:
-            elapsed = time.time() - started
-            if elapsed >= no_run_grace_seconds:
-                msg = (
-                    "Commit uchun GitHub Actions run topilmadi (path filter yoki trigger yo'q), "
-                    "keyingi bosqichga o'tyapman"
-                )
-                send_bridge_event(
-                    cfg,
-                    job_id=job_id,
-                    event_type="ci_status",
-                    task=task,
-                    commit=commit,
-                    message=msg,
-                    workflow="github-ci",
-                    status="completed",
-                    conclusion="skipped",
-                )
-                if require_runs:
-                    return {
-                        "status": "failure",
-                        "tests_passed": False,
-                        "errors": ["GitHub CI run topilmadi (grace timeout)."],
-                        "warnings": [],
-                        "suggestions": [
-                            "Workflow trigger/path filtersni tekshiring.",
-                            "Agar bu task CI trigger qilmasligi normal bo'lsa github_ci.require_runs=false qiling.",
-                        ],
-                        "next_action": "fix_required",
-                        "task": task,
-                        "commit": commit,
-                        "stage": "github_ci",
-                        "github_ci": {"repo": repo_slug, "runs": [], "path_prediction": prediction},
-                    }
-                return {
-                    "status": "success",
-                    "tests_passed": True,
-                    "errors": [],
-                    "warnings": ["GitHub CI run topilmadi; CI bosqichi skip qilindi."],
-                    "suggestions": [],
-                    "next_action": "proceed",
-                    "task": task,
-                    "commit": commit,
-                    "stage": "github_ci",
-                    "github_ci": {"repo": repo_slug, "runs": [], "skipped_no_runs": True, "path_prediction": prediction},
-                }
-
-        dots = (dots + 1) % 4
-        print(f"\r[bridge-client] waiting for GitHub CI{'.' * dots}   ", end="", flush=True)
-        time.sleep(interval_seconds)
-
-    return {
-        "status": "failure",
-        "tests_passed": False,
-        "errors": ["GitHub CI wait timeout."],
-        "warnings": [],
-        "suggestions": ["GitHub Actions run holatini tekshiring (gh run list / GitHub UI)."],
-        "next_action": "fix_required",
-        "task": task,
-        "commit": commit,
-        "stage": "github_ci",
-        "github_ci": {"repo": repo_slug, "runs": last_runs, "path_prediction": prediction},
-    }
-
-
-def wait_for_result(job_id: str, cfg: Config, timeout_seconds: int = 900) -> dict[str, Any] | None:
-    server = f"http://{cfg.server_host}:{cfg.bridge_port}"
-    started = time.time()
-    dots = 0
-    while time.time() - started < timeout_seconds:
-        code, resp = http_json(
-            "GET",
-            f"{server}/result?job_id={parse.quote(job_id)}",
-            None,
-            cfg.request_timeout_seconds,
-            cfg.shared_secret,
-        )
-        if code == 200:
-            stage = str(resp.get("stage", "")).strip().lower()
-            status = str(resp.get("status", "")).strip().lower()
-            if stage == "completed" or status in {"success", "failure", "error"}:
-                write_last_result(resp)
-                print("\n[bridge-client] result received")
-                return resp
-            dots = (dots + 1) % 4
-            print(f"\r[bridge-client] waiting for server result{'.' * dots}   ", end="", flush=True)
-            time.sleep(cfg.poll_interval_seconds)
-            continue
-        if code not in (404,):
-            print(f"\n[bridge-client] unexpected response {code}: {resp}")
-        dots = (dots + 1) % 4
-        print(f"\r[bridge-client] waiting for server result{'.' * dots}   ", end="", flush=True)
-        time.sleep(cfg.poll_interval_seconds)
-    print("\n[bridge-client] timeout waiting for result")
-    return None
-
-
-def get_bridge_events(job_id: str, cfg: Config) -> dict[str, Any]:
-    server = f"http://{cfg.server_host}:{cfg.bridge_port}"
-    code, resp = http_json(
-        "GET",
-        f"{server}/events?job_id={parse.quote(job_id)}",
-        None,
-        cfg.request_timeout_seconds,
-        cfg.shared_secret,
-    )
-    if code != 200:
-        raise RuntimeError(f"bridge events failed ({code}): {resp}")
-    return resp
-
-
-def watch_bridge_events(
-    job_id: str,
-    cfg: Config,
-    timeout_seconds: int = 1800,
-    *,
-    stop_event: Event | None = None,
-    label: str = "",
-) -> int:
-    started = time.time()
-    seen = 0
-    dots = 0
-    prefix = f"[{label}] " if label else ""
-    while time.time() - started < timeout_seconds:
-        if stop_event is not None and stop_event.is_set():
-            client_log("watch", f"{prefix.strip() or 'events'} stopped")
-            return 0
-        try:
-            payload = get_bridge_events(job_id, cfg)
-        except Exception as exc:
-            client_log("watch", f"{prefix.strip() or 'events'} error: {exc}")
-            time.sleep(cfg.poll_interval_seconds)
-            continue
-
-        events = list(payload.get("events", []))
-        if len(events) > seen:
-            for event in events[seen:]:
-                ts = event.get("timestamp", "")
-                event_type = event.get("event_type", "")
-                workflow = event.get("workflow", "")
-                status = event.get("status", "")
-                conclusion = event.get("conclusion", "")
-                message = event.get("message", "")
-                parts = [str(ts)]
-                if workflow:
-                    parts.append(str(workflow))
-                if status:
-                    parts.append(f"status={status}")
-                if conclusion:
-                    parts.append(f"conclusion={conclusion}")
-                if message:
-                    parts.append(f"- {message}")
-                timeline_channel = f"timeline:{label}" if label else "timeline"
-                client_log(timeline_channel, " | ".join(parts))
-            seen = len(events)
-        else:
-            dots = (dots + 1) % 4
-            print(f"\r[LAPTOP][watch] {prefix}watching events{'.' * dots}   ", end="", flush=True)
-        time.sleep(cfg.poll_interval_seconds)
-
-    client_log("watch", f"{prefix.strip() or 'events'} timeout")
-    return 0
-
-
+
+        try:
+            runs = json.loads(res.stdout or "[]")
+        except json.JSONDecodeError:
+            runs = []
+        runs = [r for r in runs if str(r.get("headSha", "")).startswith(commit)]
+        if watch_workflows:
+            runs = [r for r in runs if str(r.get("workflowName", "")) in watch_workflows]
+        last_runs = runs
+        for run in runs:
+            run_id = str(run.get("databaseId", ""))
+            workflow = str(run.get("workflowName", ""))
+            status = str(run.get("status", ""))
+            conclusion = str(run.get("conclusion", ""))
+            signature = f"{status}|{conclusion}"
+            if announced_states.get(run_id) == signature:
+                continue
+            announced_states[run_id] = signature
+
+            if status != "completed":
+                msg = f"{workflow} holati: {status}"
+            elif str(conclusion).lower() == "success":
+                msg = f"{workflow} success bo'ldi"
+            else:
+                msg = f"{workflow} xato bo'ldi, men uni tuzatib senga qayta yuboraman"
+
+            send_bridge_event(
+                cfg,
+                job_id=job_id,
+                event_type="ci_status",
+                task=task,
+                commit=commit,
+                message=msg,
+                workflow=workflow,
+                status=status,
+                conclusion=conclusion,
+            )
+
+        if runs:
+            pending = [r for r in runs if str(r.get("status", "")) != "completed"]
+            if not pending:
+                failed = [
+                    r
+                    for r in runs
+                    if str(r.get("conclusion", "")).lower() not in {"success", "skipped", "neutral"}
+                ]
+                if failed:
+                    return {
+                        "status": "failure",
+                        "tests_passed": False,
+                        "errors": [
+                            f"GitHub CI failed: {r.get('workflowName')} ({r.get('conclusion')})"
+                            for r in failed
+                        ],
+                        "warnings": [],
+                        "suggestions": [
+                            "gh run view <run-id> --log-failed bilan CI logni ko'ring.",
+                            "Xatoni tuzatib qayta commit/push qiling.",
+                        ],
+                        "next_action": "fix_required",
+                        "task": task,
+                        "commit": commit,
+                        "stage": "github_ci",
+                        "github_ci": {"repo": repo_slug, "runs": runs},
+                    }
+                return {
+                    "status": "success",
+                    "tests_passed": True,
+                    "errors": [],
+                    "warnings": [],
+                    "suggestions": [],
+                    "next_action": "proceed",
+                    "task": task,
+                    "commit": commit,
+                    "stage": "github_ci",
+                    "github_ci": {"repo": repo_slug, "runs": runs},
+                }
+        else:
+            elapsed = time.time() - started
+            if elapsed >= no_run_grace_seconds:
+                msg = (
+                    "Commit uchun GitHub Actions run topilmadi (path filter yoki trigger yo'q), "
+                    "keyingi bosqichga o'tyapman"
+                )
+                send_bridge_event(
+                    cfg,
+                    job_id=job_id,
+                    event_type="ci_status",
+                    task=task,
+                    commit=commit,
+                    message=msg,
+                    workflow="github-ci",
+                    status="completed",
+                    conclusion="skipped",
+                )
+                if require_runs:
+                    return {
+                        "status": "failure",
+                        "tests_passed": False,
+                        "errors": ["GitHub CI run topilmadi (grace timeout)."],
+                        "warnings": [],
+                        "suggestions": [
+                            "Workflow trigger/path filtersni tekshiring.",
+                            "Agar bu task CI trigger qilmasligi normal bo'lsa github_ci.require_runs=false qiling.",
+                        ],
+                        "next_action": "fix_required",
+                        "task": task,
+                        "commit": commit,
+                        "stage": "github_ci",
+                        "github_ci": {"repo": repo_slug, "runs": [], "path_prediction": prediction},
+                    }
+                return {
+                    "status": "success",
+                    "tests_passed": True,
+                    "errors": [],
+                    "warnings": ["GitHub CI run topilmadi; CI bosqichi skip qilindi."],
+                    "suggestions": [],
+                    "next_action": "proceed",
+                    "task": task,
+                    "commit": commit,
+                    "stage": "github_ci",
+                    "github_ci": {"repo": repo_slug, "runs": [], "skipped_no_runs": True, "path_prediction": prediction},
+                }
+
+        dots = (dots + 1) % 4
+        print(f"\r[bridge-client] waiting for GitHub CI{'.' * dots}   ", end="", flush=True)
+        time.sleep(interval_seconds)
+
+    return {
+        "status": "failure",
+        "tests_passed": False,
+        "errors": ["GitHub CI wait timeout."],
+        "warnings": [],
+        "suggestions": ["GitHub Actions run holatini tekshiring (gh run list / GitHub UI)."],
+        "next_action": "fix_required",
+        "task": task,
+        "commit": commit,
+        "stage": "github_ci",
+        "github_ci": {"repo": repo_slug, "runs": last_runs, "path_prediction": prediction},
+    }
+
+
+def wait_for_result(
+    job_id: str,
+    cfg: Config,
+    timeout_seconds: int = 900,
+    *,
+    cancel_on_exit: bool = False,
+) -> dict[str, Any] | None:
+    """Wait for a terminal result; with cancel_on_exit the server job is cancelled on Ctrl-C or timeout."""
+    # _wait_for_result follows superseded_by hops in place, so an interrupt cancels the job still running.
+    current = [job_id]
+    try:
+        result = _wait_for_result(current, cfg, timeout_seconds)
+    except KeyboardInterrupt:
+        if cancel_on_exit:
+            cancel_server_job(current[0], cfg, reason="interrupted")
+        raise
+    if result is None and cancel_on_exit:
+        cancel_server_job(current[0], cfg, reason="timeout")
+    return result
+
+
+def _wait_for_result(current: list[str], cfg: Config, timeout_seconds: int) -> dict[str, Any] | None:
+    """Wait on current[0]; a superseded job is replaced in current[0] by the job that superseded it."""
+    server = f"http://{cfg.server_host}:{cfg.bridge_port}"
+    started = time.time()
+    dots = 0
+    long_poll_s = max(0, cfg.result_long_poll_seconds)
+    while time.time() - started < timeout_seconds:
+        remaining = timeout_seconds - (time.time() - started)
+        wait_s = int(min(long_poll_s, max(0, remaining)))
+        job_id = current[0]
+        query = {"job_id": job_id}
+        if wait_s > 0:
+            # Server parks the request until the job turns terminal or wait_s elapses.
+            query["wait"] = str(wait_s)
+        requested_at = time.time()
+        code, resp = http_json(
+            "GET",
+            f"{server}/result?{parse.urlencode(query)}",
+            None,
+            cfg.request_timeout_seconds + wait_s,
+            cfg.shared_secret,
+            cache_key=f"result:{job_id}",
+        )
+        # Servers without long-poll support answer immediately; fall back to the poll interval then.
+        answered_early = time.time() - requested_at < wait_s / 2
+        if code == 200:
+            stage = str(resp.get("stage", "")).strip().lower()
+            status = str(resp.get("status", "")).strip().lower()
+            superseded_by = str(resp.get("superseded_by") or "").strip()
+            if status == "superseded" and superseded_by:
+                # A newer commit for the same task replaced this queued job; its result is the one to wait for.
+                print(f"\n[bridge-client] job {job_id} superseded by {superseded_by}, following")
+                current[0] = superseded_by
+                continue
+            if stage == "completed" or status in {"success", "failure", "error", "superseded", "cancelled"}:
+                write_last_result(resp)
+                print("\n[bridge-client] result received")
+                return resp
+            dots = (dots + 1) % 4
+            print(f"\r[bridge-client] waiting for server result{'.' * dots}   ", end="", flush=True)
+            if wait_s <= 0 or answered_early:
+                time.sleep(cfg.poll_interval_seconds)
+            continue
+        if code not in (404,):
+            print(f"\n[bridge-client] unexpected response {code}: {resp}")
+        dots = (dots + 1) % 4
+        print(f"\r[bridge-client] waiting for server result{'.' * dots}   ", end="", flush=True)
+        if wait_s <= 0 or answered_early or code != 404:
+            time.sleep(cfg.poll_interval_seconds)
+    print("\n[bridge-client] timeout waiting for result")
+    return None
+
+
+def get_bridge_events(
+    job_id: str,
+    cfg: Config,
+    *,
+    after: int = 0,
+    event_type: str = "",
+    limit: int = 0,
+) -> dict[str, Any]:
+    server = f"http://{cfg.server_host}:{cfg.bridge_port}"
+    query = {"job_id": job_id}
+    if after:
+        query["after"] = str(after)
+    if event_type:
+        query["event_type"] = event_type
+    if limit:
+        query["limit"] = str(limit)
+    code, resp = http_json(
+        "GET",
+        f"{server}/events?{parse.urlencode(query)}",
+        None,
+        cfg.request_timeout_seconds,
+        cfg.shared_secret,
+    )
+    if code != 200:
+        raise RuntimeError(f"bridge events failed ({code}): {resp}")
+    return resp
+
+
+ARTIFACT_CHUNK_BYTES = 1 << 20
+
+
+def _fetch_artifact_range(digest: str, cfg: Config, start: int, end: int) -> tuple[bytes, int]:
+    """One Range request to /artifact/<sha256>; returns the bytes and the artifact's total size."""
+    server = f"http://{cfg.server_host}:{cfg.bridge_port}"
+    headers = {"Range": f"bytes={start}-{end}"}
+    if cfg.shared_secret:
+        headers["X-Bridge-Token"] = cfg.shared_secret
+    try:
+        code, resp_headers, body = HTTP_POOL.request(
+            "GET", f"{server}/artifact/{digest}", None, headers, cfg.request_timeout_seconds
+        )
+    except (OSError, http.client.HTTPException) as exc:
+        raise RuntimeError(f"artifact fetch failed: {exc}")
+    content_range = resp_headers.get("content-range", "")
+    if code in {206, 416} and "/" in content_range:
+        return body if code == 206 else b"", int(content_range.rsplit("/", 1)[1])
+    if code == 200:
+        return body, len(body)
+    raise RuntimeError(f"artifact fetch failed ({code}): {body.decode('utf-8', errors='replace')}")
+
+
+def fetch_artifact(digest: str, cfg: Config, out: Any, *, start: int = 0, end: int | None = None) -> int:
+    """Copy a check output artifact into the binary file `out` in ranged chunks; returns bytes written."""
+    pos = start
+    while end is None or pos <= end:
+        stop = pos + ARTIFACT_CHUNK_BYTES - 1 if end is None else min(end, pos + ARTIFACT_CHUNK_BYTES - 1)
+        chunk, total = _fetch_artifact_range(digest, cfg, pos, stop)
+        out.write(chunk)
+        pos += len(chunk)
+        if not chunk or pos >= total:
+            break
+    return pos - start
+
+
+def check_output_artifact(job_id: str, check_no: int, stream: str, cfg: Config) -> tuple[str, dict[str, Any] | None]:
+    """Inline text and artifact ref (or None) of one check's stdout/stderr in a server result."""
+    server = f"http://{cfg.server_host}:{cfg.bridge_port}"
+    code, resp = http_json(
+        "GET",
+        f"{server}/result?{parse.urlencode({'job_id': job_id})}",
+        None,
+        cfg.request_timeout_seconds,
+        cfg.shared_secret,
+    )
+    if code != 200:
+        raise RuntimeError(f"bridge result failed ({code}): {resp}")
+    checks = resp.get("checks") if isinstance(resp.get("checks"), list) else []
+    if not 0 <= check_no < len(checks):
+        raise RuntimeError(f"check {check_no} not found (job has {len(checks)} checks)")
+    check = checks[check_no]
+    refs = check.get("artifacts") if isinstance(check.get("artifacts"), dict) else {}
+    return str(check.get(stream) or ""), refs.get(stream)
+
+
+def _log_timeline_event(event: dict[str, Any], label: str) -> None:
+    ts = event.get("timestamp", "")
+    workflow = event.get("workflow", "")
+    status = event.get("status", "")
+    conclusion = event.get("conclusion", "")
+    message = event.get("message", "")
+    parts = [str(ts)]
+    if workflow:
+        parts.append(str(workflow))
+    if status:
+        parts.append(f"status={status}")
+    if conclusion:
+        parts.append(f"conclusion={conclusion}")
+    if message:
+        parts.append(f"- {message}")
+    timeline_channel = f"timeline:{label}" if label else "timeline"
+    client_log(timeline_channel, " | ".join(parts))
+
+
+def stream_bridge_events(
+    job_id: str,
+    cfg: Config,
+    *,
+    after: int,
+    deadline: float,
+    stop_event: Event | None = None,
+    label: str = "",
+) -> tuple[int, str]:
+    """Consume /events/stream (SSE) until stop/deadline/drop.
+
+    Returns (cursor, outcome) with outcome one of: stopped, timeout, unsupported, dropped, ended.
+    """
+    heartbeat_s = int(cfg.event_stream.get("heartbeat_seconds", 5))
+    server = f"http://{cfg.server_host}:{cfg.bridge_port}"
+    query = parse.urlencode({"job_id": job_id, "heartbeat": str(heartbeat_s)})
+    req = request.Request(f"{server}/events/stream?{query}", method="GET")
+    req.add_header("Accept", "text/event-stream")
+    if cfg.shared_secret:
+        req.add_header("X-Bridge-Token", cfg.shared_secret)
+    if after:
+        req.add_header("Last-Event-ID", str(after))
+    cursor = after
+    try:
+        # Read timeout well above the heartbeat interval: silence longer than that means a dead link.
+        with request.urlopen(req, timeout=heartbeat_s * 3 + cfg.request_timeout_seconds) as resp:
+            data_lines: list[str] = []
+            event_id = ""
+            event_name = ""
+            while True:
+                if stop_event is not None and stop_event.is_set():
+                    return cursor, "stopped"
+                if time.time() >= deadline:
+                    return cursor, "timeout"
+                raw = resp.readline()
+                if not raw:
+                    return cursor, "dropped"
+                line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+                if line.startswith(":"):
+                    continue
+                if line:
+                    field, _, value = line.partition(":")
+                    value = value[1:] if value.startswith(" ") else value
+                    if field == "data":
+                        data_lines.append(value)
+                    elif field == "id":
+                        event_id = value
+                    elif field == "event":
+                        event_name = value
+                    continue
+                if not data_lines:
+                    continue
+                if event_name == "end":
+                    # Server closes the stream after the job's terminal result; nothing more will arrive.
+                    return cursor, "ended"
+                event_name = ""
+                try:
+                    event = json.loads("\n".join(data_lines))
+                except json.JSONDecodeError:
+                    event = {"event_type": "parse_error", "message": "\n".join(data_lines)[:240]}
+                data_lines = []
+                if event_id.isdigit():
+                    cursor = max(cursor, int(event_id))
+                _log_timeline_event(event, label)
+    except error.HTTPError as exc:
+        if exc.code == 404:
+            return cursor, "unsupported"
+        return cursor, "dropped"
+    except (error.URLError, OSError):
+        return cursor, "dropped"
+
+
+def watch_bridge_events(
+    job_id: str,
+    cfg: Config,
+    timeout_seconds: int = 1800,
+    *,
+    stop_event: Event | None = None,
+    label: str = "",
+) -> int:
+    started = time.time()
+    deadline = started + timeout_seconds
+    cursor = 0
+    dots = 0
+    prefix = f"[{label}] " if label else ""
+    use_stream = bool(cfg.event_stream.get("enabled", True))
+    while time.time() < deadline:
+        if stop_event is not None and stop_event.is_set():
+            client_log("watch", f"{prefix.strip() or 'events'} stopped")
+            return 0
+        if use_stream:
+            cursor, outcome = stream_bridge_events(
+                job_id, cfg, after=cursor, deadline=deadline, stop_event=stop_event, label=label
+            )
+            if outcome == "stopped":
+                client_log("watch", f"{prefix.strip() or 'events'} stopped")
+                return 0
+            if outcome == "timeout":
+                break
+            if outcome == "ended":
+                client_log("watch", f"{prefix.strip() or 'events'} job finished")
+                return 0
+            if outcome == "unsupported":
+                use_stream = False
+                client_log("watch", f"{prefix.strip() or 'events'} stream unsupported by server; polling")
+            else:
+                # One poll cycle catches up through the cursor, then the stream is retried.
+                client_log("watch", f"{prefix.strip() or 'events'} stream dropped; polling fallback")
+        try:
+            payload = get_bridge_events(job_id, cfg, after=cursor)
+        except Exception as exc:
+            client_log("watch", f"{prefix.strip() or 'events'} error: {exc}")
+            time.sleep(cfg.poll_interval_seconds)
+            continue
+
+        events = list(payload.get("events", []))
+        if "next_after" in payload:
+            new_events = events
+            cursor = int(payload.get("next_after") or cursor)
+        else:
+            # Older bridge server without cursor support returns the full timeline.
+            new_events = events[cursor:]
+            cursor = max(cursor, len(events))
+        if new_events:
+            for event in new_events:
+                _log_timeline_event(event, label)
+        elif not use_stream:
+            dots = (dots + 1) % 4
+            print(f"\r[LAPTOP][watch] {prefix}watching events{'.' * dots}   ", end="", flush=True)
+        time.sleep(cfg.poll_interval_seconds)
+
+    client_log("watch", f"{prefix.strip() or 'events'} timeout")
+    return 0
+
+
 def send_telegram_notification(result: dict[str, Any], cfg: Config) -> None:
     global LAST_TELEGRAM_STATUS
     tg = cfg.telegram
@@ -3371,28 +4077,28 @@ def send_telegram_notification(result: dict[str, Any], cfg: Config) -> None:
         LAST_TELEGRAM_STATUS = "skipped_missing_config"
         client_log("telegram", "skip (missing TELEGRAM_BOT_TOKEN or TELEGRAM_CHAT_ID)")
         return
-
-    status = str(result.get("status", "unknown")).upper()
-    task = str(result.get("task", ""))
-    commit = str(result.get("commit", ""))[:12]
-    next_action = str(result.get("next_action", "unknown"))
-    stage = str(result.get("stage", ""))
+
+    status = str(result.get("status", "unknown")).upper()
+    task = str(result.get("task", ""))
+    commit = str(result.get("commit", ""))[:12]
+    next_action = str(result.get("next_action", "unknown"))
+    stage = str(result.get("stage", ""))
     errors = _redact_sensitive_list([str(x) for x in result.get("errors", [])][:5])
-    check_set = str(result.get("check_set", ""))
-
-    lines = [
-        f"Talimy Bridge: {status}",
-        f"Task: {task}",
-        f"Commit: {commit}",
-        f"Stage: {stage}",
-    ]
-    if check_set:
-        lines.append(f"Check set: {check_set}")
-    lines.append(f"Next action: {next_action}")
-    if errors:
-        lines.append("Errors:")
-        lines.extend([f"- {e}" for e in errors])
-
+    check_set = str(result.get("check_set", ""))
+
+    lines = [
+        f"Talimy Bridge: {status}",
+        f"Task: {task}",
+        f"Commit: {commit}",
+        f"Stage: {stage}",
+    ]
+    if check_set:
+        lines.append(f"Check set: {check_set}")
+    lines.append(f"Next action: {next_action}")
+    if errors:
+        lines.append("Errors:")
+        lines.extend([f"- {e}" for e in errors])
+
     payload = {"chat_id": chat_id, "text": "\n".join(lines)}
     url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
     try:
@@ -3542,12 +4248,14 @@ def prompt_continue_next_task(cfg: Config, *, task: str = "") -> bool:
 
 
 def run_push_ci_server_flow(
-    task: str,
-    cfg: Config,
-    *,
-    watch: bool = False,
-    session_id_override: str | None = None,
-    disable_session_context: bool = False,
+    task: str,
+    cfg: Config,
+    *,
+    watch: bool = False,
+    session_id_override: str | None = None,
+    disable_session_context: bool = False,
+    priority: int = TRIGGER_PRIORITY_MANUAL,
+    force_review: bool = False,
 ) -> int:
     client_log("task", f"pipeline start: {ansi_color('91', task)}")
     _log_task_checklist(task, cfg)
@@ -3562,10 +4270,10 @@ def run_push_ci_server_flow(
 
     client_log("stage", "local_smoke")
     smoke_result = run_local_task_smoke(task, cfg)
-    if smoke_result is not None and smoke_result.get("next_action") != "proceed":
-        send_telegram_notification(smoke_result, cfg)
-        return summarize_result(smoke_result)
-
+    if smoke_result is not None and smoke_result.get("next_action") != "proceed":
+        send_telegram_notification(smoke_result, cfg)
+        return summarize_result(smoke_result)
+
     client_log("stage", "bridge_hello")
     try:
         hello = bridge_hello(cfg)
@@ -3588,74 +4296,77 @@ def run_push_ci_server_flow(
         send_telegram_notification(result, cfg)
         return summarize_result(result)
     hello_reply = str(hello.get("reply") or "").strip()
-    hello_src = str(hello.get("reply_source") or "").strip()
-    msg = hello.get("message", "ok")
-    if hello_reply:
-        client_log("hello", msg)
-        if hello_src == "server_codex":
-            server_log_on_client("codex", hello_reply)
-        else:
-            server_log_on_client("bridge", f"hello reply source={hello_src} | {hello_reply}")
+    hello_src = str(hello.get("reply_source") or "").strip()
+    msg = hello.get("message", "ok")
+    if hello_reply:
+        client_log("hello", msg)
+        if hello_src in {"server_codex", "server_codex_cached"}:
+            server_log_on_client("codex", hello_reply)
+        else:
+            server_log_on_client("bridge", f"hello reply source={hello_src} | {hello_reply}")
     else:
         client_log("hello", str(msg))
     if hello_src == "server_codex_error":
         client_log("hello", "server codex hello unavailable; bridge server reachable, davom etiladi")
-    session_context = build_session_context_excerpt(
-        cfg,
-        session_id_override=session_id_override,
-        disable_session_context=disable_session_context,
-    )
-    if session_context and session_context.get("excerpt"):
-        client_log("context", f"session context loaded ({session_context.get('message_count', 0)} messages)")
+    hello_queue = hello.get("queue") if isinstance(hello.get("queue"), dict) else {}
+    if hello_queue:
+        client_log("hello", f"server queue depth={hello_queue.get('depth', 0)} running={hello_queue.get('running', 0)}")
+    session_context = build_session_context_excerpt(
+        cfg,
+        session_id_override=session_id_override,
+        disable_session_context=disable_session_context,
+    )
+    if session_context and session_context.get("excerpt"):
+        client_log("context", f"session context loaded ({session_context.get('message_count', 0)} messages)")
     client_log("stage", "git_push")
     commit = push_commit(cfg)
-    client_log("git", f"pushed commit={commit[:12]}")
-
-    ci_job_id = f"ci-{uuid.uuid4().hex}"
+    client_log("git", f"pushed commit={commit[:12]}")
+
+    ci_job_id = f"ci-{uuid.uuid4().hex}"
     client_log("jobs", "ci watch started")
-    send_bridge_event(
-        cfg,
-        job_id=ci_job_id,
-        event_type="hello",
-        task=task,
-        commit=commit,
-        message="Laptop Codex bridge ulandi, CI ni kuzatishni boshlayman.",
-    )
-
-    ci_watch_stop: Event | None = None
-    ci_watch_thread: Thread | None = None
-    if watch:
-        ci_watch_stop = Event()
-        ci_watch_thread = Thread(
-            target=watch_bridge_events,
-            args=(ci_job_id, cfg),
-            kwargs={"stop_event": ci_watch_stop, "label": "ci"},
-            daemon=True,
-        )
-        ci_watch_thread.start()
-
+    send_bridge_event(
+        cfg,
+        job_id=ci_job_id,
+        event_type="hello",
+        task=task,
+        commit=commit,
+        message="Laptop Codex bridge ulandi, CI ni kuzatishni boshlayman.",
+    )
+
+    ci_watch_stop: Event | None = None
+    ci_watch_thread: Thread | None = None
+    if watch:
+        ci_watch_stop = Event()
+        ci_watch_thread = Thread(
+            target=watch_bridge_events,
+            args=(ci_job_id, cfg),
+            kwargs={"stop_event": ci_watch_stop, "label": "ci"},
+            daemon=True,
+        )
+        ci_watch_thread.start()
+
     client_log("stage", "github_ci")
     ci_result = wait_for_github_ci(commit, task, cfg, ci_job_id)
-    if ci_watch_stop is not None:
-        ci_watch_stop.set()
-    if ci_watch_thread is not None:
-        ci_watch_thread.join(timeout=2)
-    if ci_result is not None:
-        print("")
-        if ci_result.get("next_action") != "proceed":
-            write_last_result(ci_result)
-            send_telegram_notification(ci_result, cfg)
-            return summarize_result(ci_result)
-
-    deploy_job_id = f"deploy-{uuid.uuid4().hex}"
+    if ci_watch_stop is not None:
+        ci_watch_stop.set()
+    if ci_watch_thread is not None:
+        ci_watch_thread.join(timeout=2)
+    if ci_result is not None:
+        print("")
+        if ci_result.get("next_action") != "proceed":
+            write_last_result(ci_result)
+            send_telegram_notification(ci_result, cfg)
+            return summarize_result(ci_result)
+
+    deploy_job_id = f"deploy-{uuid.uuid4().hex}"
     client_log("jobs", "deploy stage started")
     client_log("stage", "dokploy_deploy")
     dokploy_result = trigger_dokploy_deploy(task, commit, cfg, deploy_job_id)
-    if dokploy_result is not None and dokploy_result.get("status") == "failure":
-        write_last_result(dokploy_result)
-        send_telegram_notification(dokploy_result, cfg)
-        return summarize_result(dokploy_result)
-
+    if dokploy_result is not None and dokploy_result.get("status") == "failure":
+        write_last_result(dokploy_result)
+        send_telegram_notification(dokploy_result, cfg)
+        return summarize_result(dokploy_result)
+
     client_log("stage", "runtime_health")
     runtime_result = run_runtime_health_checks(task, commit, cfg, deploy_job_id)
     if runtime_result is not None and runtime_result.get("status") == "failure":
@@ -3663,7 +4374,7 @@ def run_push_ci_server_flow(
         send_telegram_notification(runtime_result, cfg)
         return summarize_result(runtime_result)
     _post_deploy_settle_wait(task, commit, cfg, deploy_job_id)
-
+
     # Run feature smoke after deploy/runtime health, before server runtime/Codex review,
     # so server review sees a more final event timeline.
     feature_job_id = f"feature-{uuid.uuid4().hex}"
@@ -3679,7 +4390,9 @@ def run_push_ci_server_flow(
             client_log("bridge", "post_deploy_smoke route-not-ready detected; continuing to server_runtime_review")
 
     client_log("stage", "server_runtime_review")
-    job_id = trigger_server(task, commit, cfg, session_context=session_context)
+    job_id = trigger_server(
+        task, commit, cfg, session_context=session_context, priority=priority, force_review=force_review
+    )
     client_log("jobs", "server runtime checks queued")
     ci_status_text = "completed"
     ci_conclusion = "success"
@@ -3715,7 +4428,7 @@ def run_push_ci_server_flow(
         )
         srv_watch_thread.start()
 
-    result = wait_for_result(job_id, cfg)
+    result = wait_for_result(job_id, cfg, cancel_on_exit=True)
     if srv_watch_stop is not None:
         srv_watch_stop.set()
     if srv_watch_thread is not None:
@@ -3751,33 +4464,35 @@ def run_push_ci_server_flow(
     write_last_result(result)
     send_telegram_notification(result, cfg)
     return summarize_result(result)
-
-
+
+
 def _maybe_mark_reja_and_push(task: str, cfg: Config, result: dict[str, Any] | None = None) -> None:
     if not mark_reja_task_completed(task, cfg, result):
-        return
-    task_no = _extract_task_no(task) or "task"
-    msg = f"docs(reja): mark {task_no} completed"
-    if not git_commit_if_needed(cfg, msg):
-        return
-    try:
-        commit = push_commit(cfg)
-        client_log("git", f"pushed reja mark commit={commit[:12]}")
-    except Exception as exc:
-        client_log("bridge", f"reja mark push failed: {exc}")
-
-
+        return
+    task_no = _extract_task_no(task) or "task"
+    msg = f"docs(reja): mark {task_no} completed"
+    if not git_commit_if_needed(cfg, msg):
+        return
+    try:
+        commit = push_commit(cfg)
+        client_log("git", f"pushed reja mark commit={commit[:12]}")
+    except Exception as exc:
+        client_log("bridge", f"reja mark push failed: {exc}")
+
+
 def run_task_pipeline_with_retries(
-    task: str,
-    cfg: Config,
-    *,
-    watch: bool = False,
-    session_id_override: str | None = None,
-    disable_session_context: bool = False,
-) -> int:
-    af = cfg.auto_fix
-    max_attempts = max(1, int(af.get("max_retries", 2)) + 1) if bool(af.get("enabled", False)) else 1
-
+    task: str,
+    cfg: Config,
+    *,
+    watch: bool = False,
+    session_id_override: str | None = None,
+    disable_session_context: bool = False,
+    priority: int = TRIGGER_PRIORITY_MANUAL,
+    force_review: bool = False,
+) -> int:
+    af = cfg.auto_fix
+    max_attempts = max(1, int(af.get("max_retries", 2)) + 1) if bool(af.get("enabled", False)) else 1
+
     for attempt in range(max_attempts):
         current_cfg = load_config()
         if attempt > 0:
@@ -3788,6 +4503,8 @@ def run_task_pipeline_with_retries(
             watch=watch,
             session_id_override=session_id_override,
             disable_session_context=disable_session_context,
+            priority=priority,
+            force_review=force_review,
         )
         if rc == 0:
             client_log("task", "pipeline result=SUCCESS")
@@ -3796,9 +4513,9 @@ def run_task_pipeline_with_retries(
             return 0
 
         failure_result = read_last_result() or {
-            "status": "failure",
-            "next_action": "fix_required",
-            "task": task,
+            "status": "failure",
+            "next_action": "fix_required",
+            "task": task,
             "errors": ["Bridge flow failed but no structured result file found."],
             "stage": "bridge_client",
         }
@@ -3808,153 +4525,213 @@ def run_task_pipeline_with_retries(
         )
         if not maybe_auto_fix_failure(task, current_cfg, failure_result, attempt):
             return rc
-
+
     return 1
 
 
 def summarize_result(result: dict[str, Any]) -> int:
-    print("=" * 60)
-    print(f"STATUS: {str(result.get('status', 'unknown')).upper()}")
-    print(f"TESTS:  {'PASS' if result.get('tests_passed') else 'FAIL'}")
-    print(f"TASK:   {result.get('task', '')}")
-    print(f"COMMIT: {str(result.get('commit', ''))[:12]}")
+    print("=" * 60)
+    print(f"STATUS: {str(result.get('status', 'unknown')).upper()}")
+    print(f"TESTS:  {'PASS' if result.get('tests_passed') else 'FAIL'}")
+    print(f"TASK:   {result.get('task', '')}")
+    print(f"COMMIT: {str(result.get('commit', ''))[:12]}")
     errors = _redact_sensitive_list([str(x) for x in result.get("errors", [])])
     warnings = _redact_sensitive_list([str(x) for x in result.get("warnings", [])])
     suggestions = _redact_sensitive_list([str(x) for x in result.get("suggestions", [])])
-    if errors:
-        print("ERRORS:")
-        for item in errors:
-            print(f"- {item}")
-    if warnings:
-        print("WARNINGS:")
-        for item in warnings:
-            print(f"- {item}")
-    if suggestions:
-        print("SUGGESTIONS:")
-        for item in suggestions:
-            print(f"- {item}")
-    print(f"NEXT_ACTION: {result.get('next_action', 'unknown')}")
-    print("=" * 60)
-    return 0 if result.get("next_action") == "proceed" else 1
-
-
-def next_reja_task(tasks_file: Path) -> tuple[str, str] | None:
-    if not tasks_file.exists():
-        raise FileNotFoundError(f"tasks file not found: {tasks_file}")
-    for raw_line in tasks_file.read_text(encoding="utf-8", errors="ignore").splitlines():
-        match = REJA_ROW_RE.match(raw_line.strip())
-        if not match:
-            continue
-        status = match.group("status").strip()
-        if "?" in status or "Not Started" in status:
-            task_no = match.group("task_no").strip()
-            title = match.group("title").strip()
-            return task_no, title
-    return None
-
-
-def usage() -> int:
-    print("Usage:")
-    print("  python bridge/bridge_client.py hello")
-    print("  python bridge/bridge_client.py push \"task description\" [--watch] [--session-id <id>] [--no-session-context]")
-    print("  python bridge/bridge_client.py wait <job_id>")
-    print("  python bridge/bridge_client.py events <job_id>")
-    print("  python bridge/bridge_client.py watch-events <job_id>")
-    print("  python bridge/bridge_client.py next-task")
-    print("  python bridge/bridge_client.py bridge-push-next [--watch] [--session-id <id>] [--no-session-context]")
-    return 1
-
-
-def parse_common_push_flags(args: list[str]) -> dict[str, Any]:
-    watch = False
-    no_session_context = False
-    session_id: str | None = None
-    i = 0
-    while i < len(args):
-        token = args[i]
-        if token == "--watch":
-            watch = True
-            i += 1
-            continue
-        if token == "--no-session-context":
-            no_session_context = True
-            i += 1
-            continue
-        if token == "--session-id":
-            if i + 1 >= len(args):
-                raise ValueError("--session-id value required")
-            session_id = args[i + 1].strip()
-            i += 2
-            continue
-        raise ValueError(f"Unknown flag: {token}")
-    return {
-        "watch": watch,
-        "session_id_override": session_id,
-        "disable_session_context": no_session_context,
-    }
-
-
-def main() -> int:
-    cfg = load_config()
-    cfg_path = resolve_config_path()
-    client_log(
-        "config",
-        f"path={cfg_path} server={cfg.server_host}:{cfg.bridge_port} secret_fp={secret_fingerprint(cfg.shared_secret)}",
-    )
-    if len(sys.argv) < 2:
-        return usage()
-
-    cmd = sys.argv[1]
-    if cmd == "hello":
-        resp = bridge_hello(cfg)
-        print(json.dumps(resp, indent=2))
-        return 0
-
-    if cmd == "next-task":
-        nxt = next_reja_task(cfg.tasks_file)
-        if not nxt:
-            print("No not-started Phase 2 task found in docReja/Reja.md tracker")
-            return 1
-        task_no, title = nxt
-        print(json.dumps({"task_no": task_no, "title": title}, ensure_ascii=False))
-        return 0
-
-    if cmd == "push":
-        if len(sys.argv) < 3:
-            print("Task description required")
-            return 1
-        task = sys.argv[2]
-        try:
-            flags = parse_common_push_flags(sys.argv[3:])
-        except ValueError as exc:
-            print(str(exc))
-            return 1
+    if errors:
+        print("ERRORS:")
+        for item in errors:
+            print(f"- {item}")
+    if warnings:
+        print("WARNINGS:")
+        for item in warnings:
+            print(f"- {item}")
+    if suggestions:
+        print("SUGGESTIONS:")
+        for item in suggestions:
+            print(f"- {item}")
+    print(f"NEXT_ACTION: {result.get('next_action', 'unknown')}")
+    print("=" * 60)
+    return 0 if result.get("next_action") == "proceed" else 1
+
+
+def next_reja_task(tasks_file: Path) -> tuple[str, str] | None:
+    if not tasks_file.exists():
+        raise FileNotFoundError(f"tasks file not found: {tasks_file}")
+    for raw_line in tasks_file.read_text(encoding="utf-8", errors="ignore").splitlines():
+        match = REJA_ROW_RE.match(raw_line.strip())
+        if not match:
+            continue
+        status = match.group("status").strip()
+        if "?" in status or "Not Started" in status:
+            task_no = match.group("task_no").strip()
+            title = match.group("title").strip()
+            return task_no, title
+    return None
+
+
+def usage() -> int:
+    print("Usage:")
+    print("  python bridge/bridge_client.py hello [--probe-codex]")
+    print("  python bridge/bridge_client.py push \"task description\" [--watch] [--session-id <id>] [--no-session-context] [--force-review]")
+    print("  python bridge/bridge_client.py wait <job_id>")
+    print("  python bridge/bridge_client.py events <job_id>")
+    print("  python bridge/bridge_client.py watch-events <job_id>")
+    print("  python bridge/bridge_client.py artifact <sha256> [--out FILE] [--range START-END]")
+    print("  python bridge/bridge_client.py check-output <job_id> <check_no> [--stderr] [--out FILE]")
+    print("  python bridge/bridge_client.py next-task")
+    print("  python bridge/bridge_client.py bridge-push-next [--watch] [--session-id <id>] [--no-session-context] [--force-review]")
+    return 1
+
+
+def parse_common_push_flags(args: list[str]) -> dict[str, Any]:
+    watch = False
+    no_session_context = False
+    force_review = False
+    session_id: str | None = None
+    i = 0
+    while i < len(args):
+        token = args[i]
+        if token == "--watch":
+            watch = True
+            i += 1
+            continue
+        if token == "--force-review":
+            force_review = True
+            i += 1
+            continue
+        if token == "--no-session-context":
+            no_session_context = True
+            i += 1
+            continue
+        if token == "--session-id":
+            if i + 1 >= len(args):
+                raise ValueError("--session-id value required")
+            session_id = args[i + 1].strip()
+            i += 2
+            continue
+        raise ValueError(f"Unknown flag: {token}")
+    return {
+        "watch": watch,
+        "session_id_override": session_id,
+        "disable_session_context": no_session_context,
+        "force_review": force_review,
+    }
+
+
+def main() -> int:
+    cfg = load_config()
+    cfg_path = resolve_config_path()
+    client_log(
+        "config",
+        f"path={cfg_path} server={cfg.server_host}:{cfg.bridge_port} secret_fp={secret_fingerprint(cfg.shared_secret)}",
+    )
+    if len(sys.argv) < 2:
+        return usage()
+
+    cmd = sys.argv[1]
+    if cmd == "hello":
+        resp = bridge_hello(cfg, probe_codex="--probe-codex" in sys.argv[2:])
+        print(json.dumps(resp, indent=2))
+        return 0
+
+    if cmd == "next-task":
+        nxt = next_reja_task(cfg.tasks_file)
+        if not nxt:
+            print("No not-started Phase 2 task found in docReja/Reja.md tracker")
+            return 1
+        task_no, title = nxt
+        print(json.dumps({"task_no": task_no, "title": title}, ensure_ascii=False))
+        return 0
+
+    if cmd == "push":
+        if len(sys.argv) < 3:
+            print("Task description required")
+            return 1
+        task = sys.argv[2]
+        try:
+            flags = parse_common_push_flags(sys.argv[3:])
+        except ValueError as exc:
+            print(str(exc))
+            return 1
         return run_task_pipeline_with_retries(task, cfg, **flags)
-
-    if cmd == "wait":
-        if len(sys.argv) < 3:
-            print("job_id required")
-            return 1
-        result = wait_for_result(sys.argv[2], cfg)
-        if result is None:
-            return 1
-        print(json.dumps(result, indent=2))
-        return 0
-
-    if cmd == "events":
-        if len(sys.argv) < 3:
-            print("job_id required")
-            return 1
-        events = get_bridge_events(sys.argv[2], cfg)
-        print(json.dumps(events, indent=2))
-        return 0
-
-    if cmd == "watch-events":
-        if len(sys.argv) < 3:
-            print("job_id required")
-            return 1
-        return watch_bridge_events(sys.argv[2], cfg)
-
+
+    if cmd == "wait":
+        if len(sys.argv) < 3:
+            print("job_id required")
+            return 1
+        result = wait_for_result(sys.argv[2], cfg)
+        if result is None:
+            return 1
+        print(json.dumps(result, indent=2))
+        return 0
+
+    if cmd == "events":
+        if len(sys.argv) < 3:
+            print("job_id required")
+            return 1
+        events = get_bridge_events(sys.argv[2], cfg)
+        print(json.dumps(events, indent=2))
+        return 0
+
+    if cmd == "watch-events":
+        if len(sys.argv) < 3:
+            print("job_id required")
+            return 1
+        return watch_bridge_events(sys.argv[2], cfg)
+
+    if cmd in {"artifact", "check-output"}:
+        args = sys.argv[2:]
+        out_path: Path | None = None
+        start, end = 0, None
+        stream = "stdout"
+        positional: list[str] = []
+        try:
+            i = 0
+            while i < len(args):
+                token = args[i]
+                if token == "--stderr":
+                    stream = "stderr"
+                    i += 1
+                    continue
+                if token in {"--out", "--range"}:
+                    if i + 1 >= len(args):
+                        raise ValueError(f"{token} value required")
+                    if token == "--out":
+                        out_path = Path(args[i + 1])
+                    else:
+                        first, _, last = args[i + 1].partition("-")
+                        start, end = int(first or 0), (int(last) if last else None)
+                    i += 2
+                    continue
+                positional.append(token)
+                i += 1
+            if len(positional) != (1 if cmd == "artifact" else 2):
+                raise ValueError("sha256 required" if cmd == "artifact" else "job_id and check_no required")
+            if cmd == "artifact":
+                digest = positional[0]
+            else:
+                text, ref = check_output_artifact(positional[0], int(positional[1]), stream, cfg)
+                if ref is None:
+                    # Small outputs stay inline in the result; there is nothing to fetch.
+                    if out_path is not None:
+                        out_path.write_text(text, encoding="utf-8")
+                    else:
+                        print(text)
+                    return 0
+                digest = str(ref.get("sha256") or "")
+            if out_path is not None:
+                with out_path.open("wb") as fh:
+                    written = fetch_artifact(digest, cfg, fh, start=start, end=end)
+                client_log("bridge", f"artifact sha256={digest[:12]} bytes={written} saved={out_path}")
+            else:
+                fetch_artifact(digest, cfg, sys.stdout.buffer, start=start, end=end)
+                sys.stdout.buffer.flush()
+        except (ValueError, RuntimeError, OSError) as exc:
+            print(str(exc))
+            return 1
+        return 0
+
     if cmd == "bridge-push-next":
         try:
             flags = parse_common_push_flags(sys.argv[2:])
@@ -3970,7 +4747,7 @@ def main() -> int:
             task_no, title = nxt
             task = f"{task_no} {title}"
             print(f"[bridge-client] next task selected: {task}")
-            rc = run_task_pipeline_with_retries(task, current_cfg, **flags)
+            rc = run_task_pipeline_with_retries(task, current_cfg, priority=TRIGGER_PRIORITY_BATCH, **flags)
             if rc != 0:
                 return rc
             client_log("bridge", f"Task success. Telegram status: {LAST_TELEGRAM_STATUS}")
@@ -3979,11 +4756,11 @@ def main() -> int:
                 return 0
 
     return usage()
-
-
-if __name__ == "__main__":
-    try:
-        raise SystemExit(main())
-    except KeyboardInterrupt:
-        client_log("bridge", "To'xtatildi.")
-        raise SystemExit(130)
+
+
+if __name__ == "__main__":
+    try:
+        raise SystemExit(main())
+    except KeyboardInterrupt:
+        client_log("bridge", "To'xtatildi.")
+        raise SystemExit(130)
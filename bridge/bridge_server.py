@@ -7,20 +7,31 @@ checks, optionally runs Codex review, and exposes JSON results over HTTP.
 
 from __future__ import annotations
 
+import asyncio
+import gzip
+import http.client
 import json
 import hashlib
 import os
-import queue
 import re
+import shutil
+import signal
+import socket
+import sqlite3
 import subprocess
 import sys
 import threading
 import time
-from dataclasses import dataclass
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from email.utils import formatdate
+from http import HTTPStatus
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from typing import Any
-from urllib.parse import parse_qs, urlparse
+from typing import Any, BinaryIO, Callable, Iterator
+from urllib.parse import parse_qs, quote, urlencode, urlparse
 
 BASE_DIR = Path(__file__).resolve().parent
 DEFAULT_CONFIG_PATH = BASE_DIR / "bridge_config.json"
@@ -28,6 +39,14 @@ SERVER_CODEX_POLICY_PATH = BASE_DIR / "server_codex_policy.md"
 STATE_DIR = BASE_DIR / ".bridge-state"
 RESULTS_DIR = STATE_DIR / "results"
 EVENTS_DIR = STATE_DIR / "events"
+ARCHIVE_DIR = STATE_DIR / "archive"
+SPOOL_DIR = STATE_DIR / "spool"
+REVIEW_CACHE_PATH = STATE_DIR / "review_cache.json"
+CODEX_CAPS_PATH = STATE_DIR / "codex_caps.json"
+QUEUE_JOURNAL_PATH = STATE_DIR / "queue_journal.jsonl"
+TIMINGS_DIR = STATE_DIR / "timings"
+ARTIFACTS_DIR = STATE_DIR / "artifacts"
+SQLITE_DEFAULT_PATH = STATE_DIR / "bridge.sqlite3"
 ENV_TOKEN_RE = re.compile(r"^\$\{([A-Z0-9_]+)\}$")
 ANSI_RESET = "\x1b[0m"
 
@@ -102,13 +121,83 @@ class BridgeConfig:
         return dict(self.raw.get("server_codex", {}))
 
     @property
-    def server_checks(self) -> dict[str, list[str]]:
+    def server_checks(self) -> dict[str, list[Any]]:
         return {k: list(v) for k, v in dict(self.raw.get("server_checks", {})).items()}
 
     @property
     def server_check_timeout_seconds(self) -> int:
         return int(self.raw.get("server_check_timeout_seconds", 240))
 
+    @property
+    def check_output(self) -> dict[str, Any]:
+        return dict(self.raw.get("check_output", {}))
+
+    @property
+    def check_output_max_bytes(self) -> int:
+        return max(0, int(self.check_output.get("max_bytes", 65536)))
+
+    @property
+    def check_output_spool(self) -> bool:
+        return bool(self.check_output.get("spool", False))
+
+    @property
+    def log_analyzers(self) -> dict[str, Any]:
+        return dict(self.raw.get("log_analyzers", {}))
+
+    @property
+    def server_check_parallelism(self) -> int:
+        return max(1, int(self.raw.get("server_check_parallelism", 4)))
+
+    @property
+    def service_discovery_ttl_seconds(self) -> float:
+        return float(self.raw.get("service_discovery_ttl_seconds", 30))
+
+    @property
+    def docker_engine(self) -> dict[str, Any]:
+        return dict(self.raw.get("docker_engine", {}))
+
+    @property
+    def docker_socket_path(self) -> str:
+        return str(self.docker_engine.get("socket_path") or "/var/run/docker.sock")
+
+    @property
+    def worker_count(self) -> int:
+        return max(1, int(self.raw.get("worker_count", 2)))
+
+    @property
+    def server_core(self) -> dict[str, Any]:
+        return dict(self.raw.get("server_core", {}))
+
+    @property
+    def server_core_mode(self) -> str:
+        mode = str(self.server_core.get("mode", "threading")).strip().lower()
+        return mode if mode in {"threading", "asyncio"} else "threading"
+
+    @property
+    def async_max_connections(self) -> int:
+        return max(1, int(self.server_core.get("max_connections", 512)))
+
+    @property
+    def keepalive_seconds(self) -> float:
+        return max(1.0, float(self.server_core.get("keepalive_seconds", 15)))
+
+    @property
+    def send_timeout_seconds(self) -> float:
+        return max(1.0, float(self.server_core.get("send_timeout_seconds", 300)))
+
+    @property
+    def async_io_threads(self) -> int:
+        return max(1, int(self.server_core.get("io_threads", 4)))
+
+    @property
+    def async_check_concurrency(self) -> int:
+        default = self.worker_count * self.server_check_parallelism
+        return max(1, int(self.server_core.get("check_concurrency", default)))
+
+    @property
+    def concurrency_keys(self) -> dict[str, list[str]]:
+        return {str(k): [str(x) for x in v] for k, v in dict(self.raw.get("concurrency_keys", {})).items()}
+
     @property
     def task_check_mapping(self) -> dict[str, str]:
         return {
@@ -132,66 +221,1584 @@ class BridgeConfig:
         raw = str(self.raw.get("server_codex_policy_path", "")).strip()
         return Path(raw) if raw else SERVER_CODEX_POLICY_PATH
 
+    @property
+    def result_wait_max_seconds(self) -> int:
+        return int(self.raw.get("result_wait_max_seconds", 60))
+
+    @property
+    def event_stream(self) -> dict[str, Any]:
+        return dict(self.raw.get("event_stream", {}))
+
+    @property
+    def state_store(self) -> dict[str, Any]:
+        return dict(self.raw.get("state_store", {}))
+
+    @property
+    def state_backend(self) -> str:
+        backend = str(self.state_store.get("backend", "files")).strip().lower()
+        return backend if backend in {"files", "sqlite"} else "files"
+
+    @property
+    def sqlite_path(self) -> Path:
+        raw = str(self.state_store.get("sqlite_path", "")).strip()
+        if not raw:
+            return SQLITE_DEFAULT_PATH
+        path = Path(raw)
+        return path if path.is_absolute() else BASE_DIR / path
+
+    @property
+    def sqlite_pool_size(self) -> int:
+        return max(1, int(self.state_store.get("sqlite_pool_size", 8)))
+
+    @property
+    def retention(self) -> dict[str, Any]:
+        return dict(self.raw.get("retention", {}))
+
+    @property
+    def job_queue(self) -> dict[str, Any]:
+        return dict(self.raw.get("job_queue", {}))
+
+    @property
+    def metrics(self) -> dict[str, Any]:
+        return dict(self.raw.get("metrics", {}))
+
+    @property
+    def timings(self) -> dict[str, Any]:
+        return dict(self.raw.get("timings", {}))
+
+    @property
+    def artifacts(self) -> dict[str, Any]:
+        return dict(self.raw.get("artifacts", {}))
+
+
+TERMINAL_JOB_STATUSES = {"success", "failure", "error", "superseded", "cancelled"}
+
+
+def is_terminal_result(payload: dict[str, Any] | None) -> bool:
+    if not payload:
+        return False
+    stage = str(payload.get("stage", "")).strip().lower()
+    status = str(payload.get("status", "")).strip().lower()
+    return stage == "completed" or status in TERMINAL_JOB_STATUSES
+
+
+class JobWaiters:
+    """Parks /result?wait= requests on a per-job condition until the job result is terminal."""
+
+    def __init__(self, read: Callable[[str], dict[str, Any] | None]) -> None:
+        # read(job_id) is the owning store's result read, re-checked after a waiter registers.
+        self._read = read
+        self._lock = threading.Lock()
+        self._conds: dict[str, threading.Condition] = {}
+        self._waiting: dict[str, int] = {}
+        # Terminal results published per waited-on job; entries go with the job's last waiter.
+        self._terminal: dict[str, int] = {}
+        self._listeners: list[Callable[[str], None]] = []
+
+    def add_listener(self, callback: Callable[[str], None]) -> None:
+        """Call callback(job_id) from the writing thread whenever a job turns terminal (asyncio front end)."""
+        self._listeners.append(callback)
+
+    def publish(self, job_id: str, payload: dict[str, Any]) -> None:
+        if not is_terminal_result(payload):
+            return
+        with self._lock:
+            cond = self._conds.get(job_id)
+            if cond is not None:
+                self._terminal[job_id] = self._terminal.get(job_id, 0) + 1
+                cond.notify_all()
+        for callback in self._listeners:
+            callback(job_id)
+
+    def wait(self, job_id: str, timeout: float) -> bool:
+        with self._lock:
+            cond = self._conds.get(job_id)
+            if cond is None:
+                # All per-job conditions share one mutex; notify_all only wakes this job's waiters.
+                cond = self._conds[job_id] = threading.Condition(self._lock)
+            self._waiting[job_id] = self._waiting.get(job_id, 0) + 1
+            seen = self._terminal.get(job_id, 0)
+        try:
+            # Registered first, read second: a result written before registering is seen here, one after is published.
+            if is_terminal_result(self._read(job_id)):
+                return True
+            with self._lock:
+                return cond.wait_for(lambda: self._terminal.get(job_id, 0) != seen, timeout)
+        finally:
+            with self._lock:
+                self._waiting[job_id] -= 1
+                if not self._waiting[job_id]:
+                    del self._waiting[job_id]
+                    del self._conds[job_id]
+                    self._terminal.pop(job_id, None)
+
+
+def shard_path(base_dir: Path, job_id: str, suffix: str) -> Path:
+    """<base_dir>/<2 hex>/<job_id><suffix>; 256 buckets keep every directory listing small."""
+    shard = hashlib.sha1(job_id.encode("utf-8")).hexdigest()[:2]
+    return base_dir / shard / f"{job_id}{suffix}"
+
+
+def state_files(base_dir: Path, suffix: str) -> list[Path]:
+    """Live state files in both the legacy flat layout and the sharded layout."""
+    return [*base_dir.glob(f"*{suffix}"), *base_dir.glob(f"*/*{suffix}")]
+
+
+def compact_json(payload: Any) -> str:
+    return json.dumps(payload, ensure_ascii=True, separators=(",", ":"))
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    """Write via a sibling temp file + os.replace so readers never observe a half-written file."""
+    tmp = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+METRIC_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+MetricLabels = tuple[tuple[str, str], ...]
+
+
+def _metric_labels(labels: dict[str, Any] | None) -> MetricLabels:
+    return tuple(sorted((str(k), str(v)) for k, v in (labels or {}).items()))
+
+
+def _format_metric_labels(labels: MetricLabels, extra: tuple[str, str] | None = None) -> str:
+    pairs = [*labels, *([extra] if extra else [])]
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_metric_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class MetricsRegistry:
+    """In-process counters, histograms and collected gauges, rendered as Prometheus text by GET /metrics."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._meta: dict[str, tuple[str, str]] = {}
+        self._counters: dict[str, dict[MetricLabels, float]] = {}
+        # Per label set: bucket counts (same order as METRIC_BUCKETS), then sum and count.
+        self._histograms: dict[str, dict[MetricLabels, list[float]]] = {}
+        self._gauges: dict[str, Callable[[], list[tuple[dict[str, Any], float]]]] = {}
+
+    def describe(self, name: str, kind: str, help_text: str) -> None:
+        self._meta[name] = (kind, help_text)
+
+    def inc(self, name: str, labels: dict[str, Any] | None = None, value: float = 1.0) -> None:
+        key = _metric_labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, labels: dict[str, Any] | None = None) -> None:
+        key = _metric_labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            cells = series.get(key)
+            if cells is None:
+                cells = series[key] = [0.0] * (len(METRIC_BUCKETS) + 2)
+            for pos, bound in enumerate(METRIC_BUCKETS):
+                if value <= bound:
+                    cells[pos] += 1
+            cells[-2] += value
+            cells[-1] += 1
+
+    def gauge(self, name: str, help_text: str, collect: Callable[[], list[tuple[dict[str, Any], float]]]) -> None:
+        """Register a gauge whose samples are read from collect() at scrape time."""
+        self.describe(name, "gauge", help_text)
+        self._gauges[name] = collect
+
+    def render(self) -> str:
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {name: {key: list(cells) for key, cells in series.items()} for name, series in self._histograms.items()}
+        lines: list[str] = []
+
+        def header(name: str, default_kind: str) -> None:
+            kind, help_text = self._meta.get(name, (default_kind, ""))
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for name, collect in sorted(self._gauges.items()):
+            header(name, "gauge")
+            for labels, value in collect():
+                lines.append(f"{name}{_format_metric_labels(_metric_labels(labels))} {_format_metric_value(value)}")
+        for name, series in sorted(counters.items()):
+            header(name, "counter")
+            for key, value in sorted(series.items()):
+                lines.append(f"{name}{_format_metric_labels(key)} {_format_metric_value(value)}")
+        for name, series in sorted(histograms.items()):
+            header(name, "histogram")
+            for key, cells in sorted(series.items()):
+                for bound, count in zip(METRIC_BUCKETS, cells):
+                    lines.append(f"{name}_bucket{_format_metric_labels(key, ('le', repr(bound)))} {int(count)}")
+                lines.append(f"{name}_bucket{_format_metric_labels(key, ('le', '+Inf'))} {int(cells[-1])}")
+                lines.append(f"{name}_sum{_format_metric_labels(key)} {_format_metric_value(round(cells[-2], 6))}")
+                lines.append(f"{name}_count{_format_metric_labels(key)} {int(cells[-1])}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+METRICS.describe("bridge_jobs_finished_total", "counter", "Jobs that reached a terminal status.")
+METRICS.describe("bridge_job_duration_seconds", "histogram", "process_trigger wall time per check set and status.")
+METRICS.describe("bridge_check_set_duration_seconds", "histogram", "Time spent in all check steps of a job.")
+METRICS.describe("bridge_check_duration_seconds", "histogram", "Duration of one check command (duration_seconds).")
+METRICS.describe("bridge_checks_total", "counter", "Check commands by check set and outcome.")
+METRICS.describe("bridge_codex_duration_seconds", "histogram", "Server codex invocation latency (review, hello).")
+METRICS.describe("bridge_codex_invocations_total", "counter", "Server codex invocations by kind and return code.")
+METRICS.describe("bridge_events_appended_total", "counter", "Events appended to job timelines by event type.")
+METRICS.describe("bridge_artifact_writes_total", "counter", "Check output blobs written or deduplicated by hash.")
+METRICS.describe("bridge_http_response_bytes_total", "counter", "Response body bytes sent by path and content encoding.")
+METRICS.describe("bridge_http_request_duration_seconds", "histogram", "HTTP request latency by method, path and code.")
+
+# Label values for /metrics paths; anything else is reported as "other" to keep cardinality bounded.
+METRIC_HTTP_PATHS = {
+    "/health", "/hello", "/result", "/jobs", "/events", "/events/stream", "/events/batch", "/event",
+    "/trigger", "/cancel", "/metrics", "/artifact",
+}
+
+
+def observe_http_request(
+    method: str, target: str, code: int, started: float, sent_bytes: int = 0, encoding: str = "identity"
+) -> None:
+    path = urlparse(target).path
+    if path.startswith("/artifact/"):
+        path = "/artifact"
+    path = path if path in METRIC_HTTP_PATHS else "other"
+    METRICS.observe(
+        "bridge_http_request_duration_seconds", time.monotonic() - started, {"method": method, "path": path, "code": code}
+    )
+    METRICS.inc("bridge_http_response_bytes_total", {"path": path, "encoding": encoding}, sent_bytes)
+
+
+class SpanRecorder:
+    """Millisecond span tree of one job from time.monotonic(); spans nest under the calling thread's open span."""
+
+    def __init__(self, name: str) -> None:
+        self._origin = time.monotonic()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.root: dict[str, Any] = {"name": name, "start_ms": 0.0, "duration_ms": 0.0}
+
+    def _ms(self, seconds: float) -> float:
+        return round(seconds * 1000, 3)
+
+    def _stack(self) -> list[dict[str, Any]]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def current(self) -> dict[str, Any]:
+        stack = self._stack()
+        return stack[-1] if stack else self.root
+
+    def add(self, name: str, start_ms: float, duration_ms: float, parent: dict[str, Any] | None = None, **attrs: Any) -> None:
+        """Attach an already measured span (e.g. queue wait, known only from wall-clock timestamps)."""
+        node = {"name": name, "start_ms": round(start_ms, 3), "duration_ms": round(duration_ms, 3), **attrs}
+        with self._lock:
+            (parent or self.current()).setdefault("children", []).append(node)
+
+    @contextmanager
+    def span(self, name: str, parent: dict[str, Any] | None = None, **attrs: Any) -> Iterator[dict[str, Any]]:
+        """Time a block; pass parent for work on pool threads or the event loop, where the stack is not the job's."""
+        owner = parent or self.current()
+        started = time.monotonic()
+        node = {"name": name, "start_ms": self._ms(started - self._origin), "duration_ms": 0.0, **attrs}
+        with self._lock:
+            owner.setdefault("children", []).append(node)
+        stack = self._stack()
+        stack.append(node)
+        try:
+            yield node
+        finally:
+            # remove(), not pop(): coroutines sharing the loop thread close their spans out of order.
+            stack.remove(node)
+            node["duration_ms"] = self._ms(time.monotonic() - started)
+
+    def finish(self) -> dict[str, Any]:
+        self.root["duration_ms"] = self._ms(time.monotonic() - self._origin)
+
+        def order(node: dict[str, Any]) -> None:
+            children = node.get("children")
+            if children:
+                children.sort(key=lambda child: child["start_ms"])
+                for child in children:
+                    order(child)
+
+        with self._lock:
+            order(self.root)
+        return self.root
+
+
+def job_span(spans: SpanRecorder | None, name: str, **attrs: Any) -> Any:
+    """spans.span(...) or a no-op context yielding a throwaway dict, so call sites need no None checks."""
+    return spans.span(name, **attrs) if spans is not None else nullcontext({})
+
+
+def export_job_timings(job_id: str, result: dict[str, Any]) -> None:
+    """Append the job's timings tree to .bridge-state/timings/<day>.jsonl for offline analysis."""
+    timings = result.get("timings")
+    if not isinstance(timings, dict):
+        return
+    record = {
+        "job_id": job_id,
+        "task": result.get("task"),
+        "commit": result.get("commit"),
+        "check_set": result.get("check_set"),
+        "status": result.get("status"),
+        "finished_at": result.get("finished_at"),
+        "timings": timings,
+    }
+    path = TIMINGS_DIR / f"{time.strftime('%Y-%m-%d', time.localtime(result.get('finished_at') or time.time()))}.jsonl"
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("a", encoding="utf-8") as fh:
+            fh.write(compact_json(record) + "\n")
+    except OSError as exc:
+        server_log("bridge", f"timings export failed job_id={job_id} error={exc}")
+
+
+class LockStripes:
+    """Fixed pool of locks picked by job_id hash: same job serializes, different jobs rarely contend."""
+
+    def __init__(self, stripes: int = 64) -> None:
+        self._locks = [threading.Lock() for _ in range(max(1, stripes))]
+
+    def for_job(self, job_id: str) -> threading.Lock:
+        return self._locks[hash(job_id) % len(self._locks)]
+
+
+class StateArchive:
+    """Daily gzip archives of compacted jobs: one gzip member per job plus a JSONL index per day."""
+
+    def __init__(self, archive_dir: Path) -> None:
+        self.archive_dir = archive_dir
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # job_id -> {"day", "offset", "length", "summary"}; later entries win (re-archived jobs).
+        self._index: dict[str, dict[str, Any]] = {}
+        for idx_path in sorted(self.archive_dir.glob("*.idx.jsonl")):
+            for raw in idx_path.read_text(encoding="utf-8").splitlines():
+                try:
+                    entry = json.loads(raw)
+                except json.JSONDecodeError:
+                    continue
+                self._index[str(entry.get("job_id"))] = entry
+
+    def _data_path(self, day: str) -> Path:
+        return self.archive_dir / f"{day}.jsonl.gz"
+
+    def _idx_path(self, day: str) -> Path:
+        return self.archive_dir / f"{day}.idx.jsonl"
+
+    def add(self, job_id: str, day: str, result: dict[str, Any] | None, events_raw: bytes) -> None:
+        record = {"job_id": job_id, "result": result, "events": events_raw.decode("utf-8", errors="replace")}
+        blob = gzip.compress(json.dumps(record, ensure_ascii=True, separators=(",", ":")).encode("utf-8"))
+        with self._lock:
+            # Concatenated gzip members stay a valid gzip stream (zcat prints one record per line).
+            with self._data_path(day).open("ab") as fh:
+                offset = fh.tell()
+                fh.write(blob)
+                fh.flush()
+                os.fsync(fh.fileno())
+            entry = {
+                "job_id": job_id,
+                "day": day,
+                "offset": offset,
+                "length": len(blob),
+                "summary": _job_summary(result) if result else None,
+            }
+            with self._idx_path(day).open("a", encoding="utf-8") as fh:
+                fh.write(compact_json(entry) + "\n")
+            self._index[job_id] = entry
+
+    def _record(self, job_id: str) -> dict[str, Any] | None:
+        with self._lock:
+            entry = self._index.get(job_id)
+        if entry is None:
+            return None
+        try:
+            with self._data_path(str(entry["day"])).open("rb") as fh:
+                fh.seek(int(entry["offset"]))
+                blob = fh.read(int(entry["length"]))
+            return json.loads(gzip.decompress(blob))
+        except (OSError, EOFError, json.JSONDecodeError):
+            return None
+
+    def has(self, job_id: str) -> bool:
+        with self._lock:
+            return job_id in self._index
+
+    def read_result(self, job_id: str) -> dict[str, Any] | None:
+        record = self._record(job_id)
+        return record.get("result") if record else None
+
+    def read_events(self, job_id: str) -> bytes:
+        record = self._record(job_id)
+        return str(record.get("events") or "").encode("utf-8") if record else b""
+
+    def job_ids(self) -> list[str]:
+        with self._lock:
+            return list(self._index)
+
+    def summaries(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return [dict(entry["summary"]) for entry in self._index.values() if entry.get("summary")]
+
+    def days(self) -> list[str]:
+        return sorted(path.name[: -len(".jsonl.gz")] for path in self.archive_dir.glob("*.jsonl.gz"))
+
+    def usage_bytes(self) -> int:
+        return sum(path.stat().st_size for path in self.archive_dir.iterdir() if path.is_file())
+
+    def drop_day(self, day: str) -> None:
+        with self._lock:
+            self._data_path(day).unlink(missing_ok=True)
+            self._idx_path(day).unlink(missing_ok=True)
+            for job_id in [k for k, v in self._index.items() if v.get("day") == day]:
+                del self._index[job_id]
+
 
 class JsonStore:
-    def __init__(self, results_dir: Path) -> None:
+    def __init__(
+        self,
+        results_dir: Path,
+        archive: StateArchive | None = None,
+        *,
+        lock_stripes: int = 64,
+        cache_entries: int = 256,
+    ) -> None:
         self.results_dir = results_dir
         self.results_dir.mkdir(parents=True, exist_ok=True)
-        self._lock = threading.Lock()
+        self.archive = archive
+        self._locks = LockStripes(lock_stripes)
+        # Write-through cache of the latest serialized result per job (LRU); hot /result reads skip disk.
+        self._cache: OrderedDict[str, str] = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._cache_entries = max(0, cache_entries)
+        self.waiters = JobWaiters(self.read)
+
+    def _cache_put(self, job_id: str, text: str | None) -> None:
+        with self._cache_lock:
+            if text is None or not self._cache_entries:
+                self._cache.pop(job_id, None)
+                return
+            self._cache[job_id] = text
+            self._cache.move_to_end(job_id)
+            while len(self._cache) > self._cache_entries:
+                self._cache.popitem(last=False)
+
+    def _cache_get(self, job_id: str) -> str | None:
+        with self._cache_lock:
+            text = self._cache.get(job_id)
+            if text is not None:
+                self._cache.move_to_end(job_id)
+            return text
+
+    def _live_path(self, job_id: str) -> Path | None:
+        for path in (shard_path(self.results_dir, job_id, ".json"), self.results_dir / f"{job_id}.json"):
+            if path.exists():
+                return path
+        return None
 
     def write(self, job_id: str, payload: dict[str, Any]) -> None:
-        with self._lock:
-            (self.results_dir / f"{job_id}.json").write_text(
-                json.dumps(payload, ensure_ascii=True, indent=2), encoding="utf-8"
-            )
+        path = shard_path(self.results_dir, job_id, ".json")
+        text = compact_json(payload)
+        with self._locks.for_job(job_id):
+            path.parent.mkdir(exist_ok=True)
+            atomic_write_text(path, text)
+            # Results written before sharding move into their shard on the next write.
+            (self.results_dir / f"{job_id}.json").unlink(missing_ok=True)
+            self._cache_put(job_id, text)
+        self.waiters.publish(job_id, payload)
 
     def read(self, job_id: str) -> dict[str, Any] | None:
-        path = self.results_dir / f"{job_id}.json"
-        if not path.exists():
-            return None
+        text = self._cache_get(job_id)
+        if text is None:
+            # Cache miss: load under the job's stripe so a concurrent write cannot be cached over.
+            with self._locks.for_job(job_id):
+                text = self._cache_get(job_id)
+                path = self._live_path(job_id) if text is None else None
+                if path is not None:
+                    text = path.read_text(encoding="utf-8")
+                    self._cache_put(job_id, text)
+        if text is not None:
+            return json.loads(text)
+        return self.archive.read_result(job_id) if self.archive else None
+
+    def exists(self, job_id: str) -> bool:
+        return self._live_path(job_id) is not None
+
+    def discard(self, job_id: str, mtime_ns: int) -> bool:
+        """Remove the live result after archiving unless it was rewritten in the meantime."""
+        with self._locks.for_job(job_id):
+            path = self._live_path(job_id)
+            if path is None or path.stat().st_mtime_ns != mtime_ns:
+                return False
+            path.unlink()
+            self._cache_put(job_id, None)
+            return True
+
+    def find(
+        self,
+        *,
+        commit: str = "",
+        task_no: str = "",
+        status: str = "",
+        limit: int = 50,
+    ) -> list[dict[str, Any]]:
+        # Walks live results only (bounded by retention); archived jobs are matched from the in-memory index.
+        matches: dict[str, dict[str, Any]] = {}
+        for path in state_files(self.results_dir, ".json"):
+            try:
+                payload = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError):
+                continue
+            if _job_matches(payload, commit=commit, task_no=task_no, status=status):
+                summary = _job_summary(payload)
+                matches[str(summary.get("job_id") or path.stem)] = summary
+        for summary in self.archive.summaries() if self.archive else []:
+            job_id = str(summary.get("job_id") or "")
+            if job_id in matches:
+                continue
+            if _job_matches(summary, commit=commit, task_no=task_no, status=status):
+                matches[job_id] = summary
+        ordered = sorted(matches.values(), key=lambda item: int(item.get("updated_at") or 0), reverse=True)
+        return ordered[:limit]
+
+
+class EventNotifier:
+    """Wakes /events/stream subscribers of a job when it gets a new event."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # Per-job state lives only while a stream is subscribed; publishing for unwatched jobs keeps nothing.
+        self._conds: dict[str, threading.Condition] = {}
+        self._subscribers: dict[str, int] = {}
+        self._latest: dict[str, int] = {}
+        # Count of terminal results per subscribed job; a change wakes wait() once, even if the job is re-run later.
+        self._finished: dict[str, int] = {}
+        self._listeners: list[Callable[[str], None]] = []
+
+    def add_listener(self, callback: Callable[[str], None]) -> None:
+        """Call callback(job_id) from the appending thread on every new event (asyncio front end)."""
+        self._listeners.append(callback)
+
+    def finish(self, job_id: str) -> None:
+        """Wake job_id's subscribers because its result turned terminal, so streams can end without a heartbeat."""
+        with self._lock:
+            cond = self._conds.get(job_id)
+            if cond is not None:
+                self._finished[job_id] = self._finished.get(job_id, 0) + 1
+                cond.notify_all()
+        for callback in self._listeners:
+            callback(job_id)
+
+    def publish(self, job_id: str, seq: int) -> None:
+        with self._lock:
+            cond = self._conds.get(job_id)
+            if cond is not None:
+                self._latest[job_id] = max(seq, self._latest.get(job_id, 0))
+                cond.notify_all()
+        for callback in self._listeners:
+            callback(job_id)
+
+    @contextmanager
+    def subscribe(self, job_id: str) -> Iterator[None]:
+        """Track job_id for wait(); enter before the first read so an append in between is not missed."""
+        with self._lock:
+            if job_id not in self._conds:
+                # All per-job conditions share one mutex; notify_all only wakes this job's subscribers.
+                self._conds[job_id] = threading.Condition(self._lock)
+            self._subscribers[job_id] = self._subscribers.get(job_id, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._subscribers[job_id] -= 1
+                if not self._subscribers[job_id]:
+                    del self._subscribers[job_id]
+                    del self._conds[job_id]
+                    self._latest.pop(job_id, None)
+                    self._finished.pop(job_id, None)
+
+    def wait(self, job_id: str, after: int, timeout: float) -> bool:
+        """Block a subscriber until job_id has an event with seq > after or has finished; False on timeout."""
         with self._lock:
-            return json.loads(path.read_text(encoding="utf-8"))
+            finished = self._finished.get(job_id, 0)
+            return self._conds[job_id].wait_for(
+                lambda: self._latest.get(job_id, 0) > after or self._finished.get(job_id, 0) != finished, timeout
+            )
 
 
 class EventStore:
-    def __init__(self, events_dir: Path) -> None:
+    """Append-only JSONL event log per job; events carry ``seq`` (line number) and byte ``offset``."""
+
+    def __init__(
+        self,
+        events_dir: Path,
+        archive: StateArchive | None = None,
+        *,
+        lock_stripes: int = 64,
+        index_entries: int = 1024,
+    ) -> None:
         self.events_dir = events_dir
         self.events_dir.mkdir(parents=True, exist_ok=True)
-        self._lock = threading.Lock()
+        self.archive = archive
+        self._locks = LockStripes(lock_stripes)
+        # Byte offset of every event line and the indexed file size per job (LRU), so cursor reads seek
+        # instead of re-parsing. Evicted jobs are re-indexed from disk on their next read.
+        self._index_cache: OrderedDict[str, tuple[list[int], int]] = OrderedDict()
+        self._index_lock = threading.Lock()
+        self._index_entries = max(1, index_entries)
+        self.notifier = EventNotifier()
+
+    def _path(self, job_id: str) -> Path:
+        legacy = self.events_dir / f"{job_id}.jsonl"
+        return legacy if legacy.exists() else shard_path(self.events_dir, job_id, ".jsonl")
+
+    @staticmethod
+    def _line_offsets(data: bytes) -> list[int]:
+        offsets: list[int] = []
+        size = 0
+        for raw in data.splitlines(keepends=True):
+            if raw.strip():
+                offsets.append(size)
+            size += len(raw)
+        return offsets
+
+    def _index_put(self, job_id: str, offsets: list[int] | None, size: int = 0) -> None:
+        with self._index_lock:
+            if offsets is None:
+                self._index_cache.pop(job_id, None)
+                return
+            self._index_cache[job_id] = (offsets, size)
+            self._index_cache.move_to_end(job_id)
+            while len(self._index_cache) > self._index_entries:
+                self._index_cache.popitem(last=False)
+
+    def _index(self, job_id: str) -> tuple[list[int], int]:
+        # Caller holds the job's stripe lock. Files written before seq/offset existed are indexed once here.
+        with self._index_lock:
+            entry = self._index_cache.get(job_id)
+            if entry is not None:
+                self._index_cache.move_to_end(job_id)
+                return entry
+        offsets: list[int] = []
+        size = 0
+        path = self._path(job_id)
+        if path.exists():
+            with path.open("rb") as fh:
+                for raw in fh:
+                    if raw.strip():
+                        offsets.append(size)
+                    size += len(raw)
+        self._index_put(job_id, offsets, size)
+        return offsets, size
+
+    def append(self, job_id: str, payload: dict[str, Any]) -> dict[str, Any]:
+        path = self._path(job_id)
+        with self._locks.for_job(job_id):
+            if not path.exists() and self.archive is not None and self.archive.has(job_id):
+                # Late event for a compacted job: restore its timeline so seq keeps counting up.
+                path.parent.mkdir(exist_ok=True)
+                path.write_bytes(self.archive.read_events(job_id))
+                self._index_put(job_id, None)
+            offsets, offset = self._index(job_id)
+            event = dict(payload)
+            event["seq"] = len(offsets) + 1
+            event["offset"] = offset
+            line = (compact_json(event) + "\n").encode("utf-8")
+            path.parent.mkdir(exist_ok=True)
+            with path.open("ab") as fh:
+                fh.write(line)
+            offsets.append(offset)
+            self._index_put(job_id, offsets, offset + len(line))
+        self.notifier.publish(job_id, event["seq"])
+        METRICS.inc("bridge_events_appended_total", {"event_type": event.get("event_type") or "event"})
+        return event
+
+    def snapshot(self, job_id: str) -> tuple[bytes, int]:
+        """Raw timeline bytes (live file, else archived copy) and the live size for discard()."""
+        with self._locks.for_job(job_id):
+            size = self._index(job_id)[1]
+            path = self._path(job_id)
+            if path.exists():
+                return path.read_bytes()[:size], size
+        return (self.archive.read_events(job_id) if self.archive else b""), 0
+
+    def discard(self, job_id: str, size: int) -> bool:
+        """Remove the live timeline after archiving unless events were appended in the meantime."""
+        with self._locks.for_job(job_id):
+            path = self._path(job_id)
+            if not size or not path.exists() or path.stat().st_size != size:
+                return False
+            path.unlink()
+            self._index_put(job_id, None)
+            return True
 
-    def append(self, job_id: str, payload: dict[str, Any]) -> None:
-        path = self.events_dir / f"{job_id}.jsonl"
-        line = json.dumps(payload, ensure_ascii=True)
-        with self._lock:
-            with path.open("a", encoding="utf-8") as fh:
-                fh.write(line + "\n")
+    def read_page(
+        self,
+        job_id: str,
+        *,
+        after: int = 0,
+        event_type: str = "",
+        limit: int = 0,
+    ) -> tuple[list[dict[str, Any]], int]:
+        """Return events with seq > after (optionally filtered) and the cursor for the next call."""
+        after = max(0, after)
+        with self._locks.for_job(job_id):
+            offsets, end = self._index(job_id)
+            window = offsets[after:]
+        chunk = b""
+        if window:
+            # Only bytes up to the indexed end are read; concurrent appends land after it.
+            try:
+                with self._path(job_id).open("rb") as fh:
+                    fh.seek(window[0])
+                    chunk = fh.read(end - window[0])
+            except FileNotFoundError:
+                offsets = []
+        if not offsets and self.archive is not None:
+            data = self.archive.read_events(job_id)
+            offsets = self._line_offsets(data)
+            window = offsets[after:]
+            chunk = data[window[0]:] if window else b""
+        if not window:
+            return [], after
 
-    def read(self, job_id: str) -> list[dict[str, Any]]:
-        path = self.events_dir / f"{job_id}.jsonl"
-        if not path.exists():
-            return []
         items: list[dict[str, Any]] = []
-        with self._lock:
-            for raw in path.read_text(encoding="utf-8").splitlines():
-                raw = raw.strip()
-                if not raw:
-                    continue
-                try:
-                    items.append(json.loads(raw))
-                except json.JSONDecodeError:
-                    items.append({"event_type": "parse_error", "raw": raw})
-        return items
+        cursor = after
+        for raw in chunk.splitlines():
+            raw = raw.strip()
+            if not raw:
+                continue
+            cursor += 1
+            try:
+                item = json.loads(raw)
+            except json.JSONDecodeError:
+                item = {"event_type": "parse_error", "raw": raw.decode("utf-8", errors="replace")}
+            item.setdefault("seq", cursor)
+            item.setdefault("offset", window[cursor - after - 1])
+            if event_type and str(item.get("event_type", "")) != event_type:
+                continue
+            items.append(item)
+            if limit and len(items) >= limit:
+                break
+        return items, cursor
+
+    def read(self, job_id: str) -> list[dict[str, Any]]:
+        return self.read_page(job_id)[0]
+
+
+def _task_no(task: str) -> str:
+    match = TASK_NUMBER_RE.search(task or "")
+    return f"{match.group('phase')}.{match.group('task')}" if match else ""
+
+
+def _job_updated_at(payload: dict[str, Any]) -> int:
+    for key in ("finished_at", "started_at", "queued_at"):
+        if payload.get(key):
+            return int(payload[key])
+    return 0
+
+
+def _job_summary(payload: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "job_id": payload.get("job_id"),
+        "status": payload.get("status"),
+        "stage": payload.get("stage"),
+        "task": payload.get("task"),
+        "task_no": _task_no(str(payload.get("task") or "")),
+        "commit": payload.get("commit"),
+        "check_set": payload.get("check_set"),
+        "updated_at": _job_updated_at(payload),
+    }
+
+
+def _job_matches(payload: dict[str, Any], *, commit: str, task_no: str, status: str) -> bool:
+    if commit and not str(payload.get("commit") or "").startswith(commit):
+        return False
+    if task_no and _task_no(str(payload.get("task") or "")) != task_no:
+        return False
+    if status and str(payload.get("status") or "") != status:
+        return False
+    return True
+
+
+class SqliteDatabase:
+    """SQLite state database in WAL mode; connections are borrowed per operation from a bounded idle pool."""
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id TEXT PRIMARY KEY,
+            status TEXT,
+            stage TEXT,
+            task TEXT,
+            task_no TEXT,
+            commit_sha TEXT,
+            check_set TEXT,
+            updated_at INTEGER,
+            payload TEXT NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_jobs_commit ON jobs (commit_sha)",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_task_no ON jobs (task_no)",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_updated ON jobs (updated_at)",
+        """
+        CREATE TABLE IF NOT EXISTS events (
+            job_id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            event_type TEXT,
+            timestamp INTEGER,
+            payload TEXT NOT NULL,
+            PRIMARY KEY (job_id, seq)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_events_type ON events (job_id, event_type, seq)",
+        """
+        CREATE TABLE IF NOT EXISTS check_results (
+            job_id TEXT NOT NULL,
+            idx INTEGER NOT NULL,
+            command TEXT,
+            command_template TEXT,
+            returncode INTEGER,
+            duration_seconds REAL,
+            timed_out INTEGER,
+            PRIMARY KEY (job_id, idx)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_check_results_rc ON check_results (returncode)",
+    )
+
+    def __init__(self, path: Path, *, pool_size: int = 8) -> None:
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.pool_size = max(1, pool_size)
+        self._idle: list[sqlite3.Connection] = []
+        self._idle_lock = threading.Lock()
+        with self.conn() as conn:
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode; multi-statement writes use explicit BEGIN IMMEDIATE.
+        conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn
+
+    @contextmanager
+    def conn(self) -> Iterator[sqlite3.Connection]:
+        # Not thread-local: ThreadingHTTPServer runs every client connection on a new thread, and a
+        # per-thread connection would stay open after that thread exits. Extra connections beyond
+        # pool_size are closed on return instead of kept.
+        with self._idle_lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            with self._idle_lock:
+                keep = len(self._idle) < self.pool_size
+                if keep:
+                    self._idle.append(conn)
+            if not keep:
+                conn.close()
+
+
+class SqliteJobStore:
+    def __init__(self, db: SqliteDatabase) -> None:
+        self.db = db
+        self.waiters = JobWaiters(self.read)
+
+    def write(self, job_id: str, payload: dict[str, Any]) -> None:
+        task = str(payload.get("task") or "")
+        checks = payload.get("checks") if isinstance(payload.get("checks"), list) else []
+        with self.db.conn() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO jobs"
+                    " (job_id, status, stage, task, task_no, commit_sha, check_set, updated_at, payload)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        job_id,
+                        str(payload.get("status") or ""),
+                        str(payload.get("stage") or ""),
+                        task,
+                        _task_no(task),
+                        str(payload.get("commit") or ""),
+                        str(payload.get("check_set") or ""),
+                        _job_updated_at(payload) or int(time.time()),
+                        json.dumps(payload, ensure_ascii=True, separators=(",", ":")),
+                    ),
+                )
+                conn.execute("DELETE FROM check_results WHERE job_id = ?", (job_id,))
+                conn.executemany(
+                    "INSERT INTO check_results"
+                    " (job_id, idx, command, command_template, returncode, duration_seconds, timed_out)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            job_id,
+                            idx,
+                            str(item.get("command") or ""),
+                            str(item.get("command_template") or ""),
+                            int(item.get("returncode") or 0),
+                            float(item.get("duration_seconds") or 0),
+                            1 if item.get("timed_out") else 0,
+                        )
+                        for idx, item in enumerate(checks)
+                        if isinstance(item, dict)
+                    ],
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        self.waiters.publish(job_id, payload)
+
+    def read(self, job_id: str) -> dict[str, Any] | None:
+        with self.db.conn() as conn:
+            row = conn.execute("SELECT payload FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find(
+        self,
+        *,
+        commit: str = "",
+        task_no: str = "",
+        status: str = "",
+        limit: int = 50,
+    ) -> list[dict[str, Any]]:
+        clauses: list[str] = []
+        params: list[Any] = []
+        if commit:
+            # GLOB is case-sensitive, so a prefix pattern can use idx_jobs_commit.
+            clauses.append("commit_sha GLOB ?")
+            params.append(f"{commit}*")
+        if task_no:
+            clauses.append("task_no = ?")
+            params.append(task_no)
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self.db.conn() as conn:
+            rows = conn.execute(
+                "SELECT job_id, status, stage, task, task_no, commit_sha, check_set, updated_at"
+                f" FROM jobs{where} ORDER BY updated_at DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        return [
+            {
+                "job_id": row[0],
+                "status": row[1],
+                "stage": row[2],
+                "task": row[3],
+                "task_no": row[4],
+                "commit": row[5],
+                "check_set": row[6],
+                "updated_at": row[7],
+            }
+            for row in rows
+        ]
+
+    def prune(self, before_ts: int) -> int:
+        with self.db.conn() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "DELETE FROM check_results WHERE job_id IN (SELECT job_id FROM jobs WHERE updated_at < ?)",
+                    (before_ts,),
+                )
+                removed = conn.execute("DELETE FROM jobs WHERE updated_at < ?", (before_ts,)).rowcount
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return removed
+
+
+class SqliteEventStore:
+    def __init__(self, db: SqliteDatabase) -> None:
+        self.db = db
+        self.notifier = EventNotifier()
+
+    def append(self, job_id: str, payload: dict[str, Any]) -> dict[str, Any]:
+        event = dict(payload)
+        with self.db.conn() as conn:
+            # BEGIN IMMEDIATE takes the write lock up front, so concurrent appends get distinct seqs.
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM events WHERE job_id = ?", (job_id,)).fetchone()
+                event["seq"] = int(row[0]) + 1
+                conn.execute(
+                    "INSERT INTO events (job_id, seq, event_type, timestamp, payload) VALUES (?, ?, ?, ?, ?)",
+                    (
+                        job_id,
+                        event["seq"],
+                        str(event.get("event_type") or ""),
+                        int(event.get("timestamp") or time.time()),
+                        json.dumps(event, ensure_ascii=True, separators=(",", ":")),
+                    ),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        self.notifier.publish(job_id, event["seq"])
+        METRICS.inc("bridge_events_appended_total", {"event_type": event.get("event_type") or "event"})
+        return event
+
+    def read_page(
+        self,
+        job_id: str,
+        *,
+        after: int = 0,
+        event_type: str = "",
+        limit: int = 0,
+    ) -> tuple[list[dict[str, Any]], int]:
+        after = max(0, after)
+        with self.db.conn() as conn:
+            last_seq = int(
+                conn.execute("SELECT COALESCE(MAX(seq), 0) FROM events WHERE job_id = ?", (job_id,)).fetchone()[0]
+            )
+            if last_seq <= after:
+                return [], after
+            sql = "SELECT seq, payload FROM events WHERE job_id = ? AND seq > ? AND seq <= ?"
+            params: list[Any] = [job_id, after, last_seq]
+            if event_type:
+                sql += " AND event_type = ?"
+                params.append(event_type)
+            sql += " ORDER BY seq"
+            if limit:
+                sql += " LIMIT ?"
+                params.append(limit)
+            rows = conn.execute(sql, params).fetchall()
+        items = [json.loads(row[1]) for row in rows]
+        cursor = int(rows[-1][0]) if limit and len(rows) >= limit else last_seq
+        return items, cursor
+
+    def read(self, job_id: str) -> list[dict[str, Any]]:
+        return self.read_page(job_id)[0]
+
+    def prune(self, before_ts: int) -> int:
+        # Whole timelines only: a job's events go once its newest event is older than before_ts.
+        with self.db.conn() as conn:
+            return conn.execute(
+                "DELETE FROM events WHERE job_id IN"
+                " (SELECT job_id FROM events GROUP BY job_id HAVING MAX(timestamp) < ?)",
+                (before_ts,),
+            ).rowcount
+
+
+def migrate_files_to_sqlite(config: BridgeConfig) -> int:
+    """Import .bridge-state results/events files into the sqlite store (idempotent)."""
+    db = SqliteDatabase(config.sqlite_path, pool_size=config.sqlite_pool_size)
+    jobs = SqliteJobStore(db)
+    job_count = 0
+    event_count = 0
+    archive = StateArchive(ARCHIVE_DIR)
+    file_jobs = JsonStore(RESULTS_DIR, archive)
+    file_events = EventStore(EVENTS_DIR, archive)
+    job_ids = {path.stem for path in state_files(RESULTS_DIR, ".json")}
+    event_job_ids = {path.stem for path in state_files(EVENTS_DIR, ".jsonl")}
+    job_ids.update(archive.job_ids())
+    for job_id in sorted(job_ids):
+        try:
+            payload = file_jobs.read(job_id)
+        except (OSError, json.JSONDecodeError) as exc:
+            server_log("bridge", f"migrate skip result={job_id} error={exc}")
+            continue
+        if payload is None:
+            continue
+        jobs.write(str(payload.get("job_id") or job_id), payload)
+        job_count += 1
+    event_job_ids.update(job_ids)
+    for job_id in sorted(event_job_ids):
+        raw_events = file_events.snapshot(job_id)[0]
+        if not raw_events:
+            continue
+        rows: list[tuple[Any, ...]] = []
+        seq = 0
+        for raw in raw_events.decode("utf-8", errors="replace").splitlines():
+            raw = raw.strip()
+            if not raw:
+                continue
+            seq += 1
+            try:
+                event = json.loads(raw)
+            except json.JSONDecodeError:
+                event = {"event_type": "parse_error", "raw": raw}
+            event["seq"] = seq
+            event.pop("offset", None)
+            rows.append(
+                (
+                    job_id,
+                    seq,
+                    str(event.get("event_type") or ""),
+                    int(event.get("timestamp") or 0),
+                    json.dumps(event, ensure_ascii=True, separators=(",", ":")),
+                )
+            )
+        with db.conn() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO events (job_id, seq, event_type, timestamp, payload) VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        event_count += len(rows)
+    server_log(
+        "bridge",
+        f"migrate done db={config.sqlite_path} jobs={job_count} events={event_count}",
+    )
+    return 0
+
+
+class QueueJournal:
+    """Append-only JSONL log of JobQueue transitions, replayed on startup to recover queued and leased jobs.
+
+    A worker takes a lease when it picks a job and the lease ends with `done`; a lease still open at startup
+    means the previous process died while running that job.
+    """
+
+    def __init__(self, path: Path, *, compact_after: int = 1000) -> None:
+        self.path = path
+        self.compact_after = max(1, compact_after)
+        self._fh: Any = None
+        self._ops = 0
+
+    def append(self, op: str, **fields: Any) -> None:
+        # Callers hold the queue lock, so the journal order is the queue's order.
+        if self._fh is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fh = self.path.open("a", encoding="utf-8")
+        self._fh.write(compact_json({"op": op, **fields}) + "\n")
+        self._fh.flush()
+        self._ops += 1
+
+    @property
+    def due_for_compaction(self) -> bool:
+        return self._ops >= self.compact_after
+
+    def replay(self) -> tuple[list[dict[str, Any]], dict[str, dict[str, Any]], dict[str, list[str]]]:
+        """(queued triggers in order, leased triggers by job_id, aliases by primary) left by the last process."""
+        pending: dict[str, dict[str, Any]] = {}
+        leased: dict[str, dict[str, Any]] = {}
+        aliases: dict[str, list[str]] = {}
+        try:
+            lines = self.path.read_text(encoding="utf-8").splitlines()
+        except OSError:
+            lines = []
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash can leave a torn last line.
+                continue
+            op = record.get("op")
+            job_id = str(record.get("job_id") or "")
+            if op == "put" and isinstance(record.get("trigger"), dict):
+                pending[str(record["trigger"].get("job_id") or "")] = record["trigger"]
+            elif op == "priority" and job_id in pending:
+                pending[job_id] = {**pending[job_id], "priority": int(record.get("priority") or 0)}
+            elif op == "alias":
+                aliases.setdefault(str(record.get("primary") or ""), []).append(job_id)
+            elif op == "detach":
+                for members in aliases.values():
+                    if job_id in members:
+                        members.remove(job_id)
+            elif op == "drop":
+                pending.pop(job_id, None)
+                aliases.pop(job_id, None)
+            elif op == "lease" and job_id in pending:
+                leased[job_id] = {**pending.pop(job_id), "attempt": int(record.get("attempt") or 1)}
+            elif op == "cancel" and job_id in leased:
+                leased[job_id]["cancelled"] = True
+            elif op == "done":
+                pending.pop(job_id, None)
+                leased.pop(job_id, None)
+                aliases.pop(job_id, None)
+        live = set(pending) | set(leased)
+        return list(pending.values()), leased, {k: v for k, v in aliases.items() if k in live and v}
+
+    def rewrite(
+        self, pending: list[dict[str, Any]], leased: dict[str, dict[str, Any]], aliases: dict[str, list[str]]
+    ) -> None:
+        """Replace the journal with just the live state; finished history is dropped."""
+        records: list[dict[str, Any]] = []
+        for job_id, trigger in leased.items():
+            records.append({"op": "put", "trigger": trigger})
+            records.append({"op": "lease", "job_id": job_id, "attempt": int(trigger.get("attempt") or 1)})
+            if trigger.get("cancelled"):
+                records.append({"op": "cancel", "job_id": job_id})
+        records.extend({"op": "put", "trigger": trigger} for trigger in pending)
+        for primary, members in aliases.items():
+            records.extend({"op": "alias", "job_id": alias, "primary": primary} for alias in members)
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(self.path, "".join(compact_json(record) + "\n" for record in records))
+        self._ops = 0
+
+
+class JobQueue:
+    """Trigger queue for the worker pool: FIFO, but a job waits while a running job holds one of its keys.
+
+    Triggers for a (commit, check_set) that is already queued or running are coalesced into that job
+    (raising a queued job to the higher priority; force_review triggers always run on their own),
+    and a newer commit for the same task supersedes still-queued older ones.
+    """
+
+    def __init__(self, journal: QueueJournal | None = None) -> None:
+        self._cond = threading.Condition()
+        self._pending: list[dict[str, Any]] = []
+        self._running: dict[str, list[str]] = {}
+        self._primary: dict[tuple[str, str], str] = {}
+        self._aliases: dict[str, list[str]] = {}
+        self.journal = journal
+        # Triggers of running jobs, kept so a journal rewrite can carry their leases over.
+        self._leased: dict[str, dict[str, Any]] = {}
+
+    def _journal(self, op: str, **fields: Any) -> None:
+        if self.journal is not None:
+            self.journal.append(op, **fields)
+
+    def restore(self, pending: list[dict[str, Any]], aliases: dict[str, list[str]]) -> None:
+        """Seed the queue with triggers recovered from the journal and compact the journal to match."""
+        with self._cond:
+            for trigger in pending:
+                self._pending.append(trigger)
+                self._primary[self._coalesce_key(trigger)] = str(trigger.get("job_id") or "")
+            for primary, members in aliases.items():
+                self._aliases.setdefault(primary, []).extend(members)
+            if self.journal is not None:
+                self.journal.rewrite(self._pending, self._leased, self._aliases)
+            self._cond.notify_all()
+
+    @staticmethod
+    def _coalesce_key(trigger: dict[str, Any]) -> tuple[str, str]:
+        return str(trigger.get("commit") or ""), str(trigger.get("check_set") or "")
+
+    def _forget_primary(self, trigger: dict[str, Any]) -> None:
+        # Only if it still owns the key: a force_review job queued later may have taken it over.
+        key = self._coalesce_key(trigger)
+        if self._primary.get(key) == trigger.get("job_id"):
+            del self._primary[key]
+
+    def _raise_priority(self, job_id: str, priority: int) -> None:
+        for queued in self._pending:
+            if queued.get("job_id") == job_id and priority > int(queued.get("priority") or 0):
+                queued["priority"] = priority
+                self._journal("priority", job_id=job_id, priority=priority)
+
+    def put(self, trigger: dict[str, Any]) -> dict[str, Any]:
+        """Queue a trigger; returns {"coalesced_into": id} or {"superseded": {old_id: [aliases]}}."""
+        job_id = str(trigger.get("job_id") or "")
+        key = self._coalesce_key(trigger)
+        with self._cond:
+            primary = self._primary.get(key)
+            # force_review asks for a fresh review, which a coalesced alias would never get.
+            if primary and primary != job_id and not trigger.get("force_review"):
+                self._aliases.setdefault(primary, []).append(job_id)
+                self._journal("alias", job_id=job_id, primary=primary)
+                self._raise_priority(primary, int(trigger.get("priority") or 0))
+                self._cond.notify_all()
+                return {"coalesced_into": primary}
+            superseded: dict[str, list[str]] = {}
+            task_key = str(trigger.get("task_key") or "")
+            if task_key:
+                kept: list[dict[str, Any]] = []
+                for queued in self._pending:
+                    if queued.get("task_key") == task_key and queued.get("commit") != trigger.get("commit"):
+                        old_id = str(queued.get("job_id") or "")
+                        self._forget_primary(queued)
+                        superseded[old_id] = self._aliases.pop(old_id, [])
+                        self._journal("drop", job_id=old_id)
+                    else:
+                        kept.append(queued)
+                self._pending = kept
+            self._pending.append(trigger)
+            self._primary[key] = job_id
+            self._journal("put", trigger=trigger)
+            self._cond.notify_all()
+            return {"superseded": superseded}
+
+    def _next_runnable(self) -> int | None:
+        # Caller holds self._cond. Higher priority first; the stable sort keeps FIFO within a priority.
+        busy = {key for keys in self._running.values() for key in keys}
+        order = sorted(range(len(self._pending)), key=lambda pos: -int(self._pending[pos].get("priority") or 0))
+        for pos in order:
+            trigger = self._pending[pos]
+            keys = set(trigger.get("concurrency_keys") or [])
+            if not keys & busy:
+                return pos
+            # Later jobs must not overtake a blocked job on the keys it is waiting for.
+            busy |= keys
+        return None
+
+    def get(self) -> dict[str, Any]:
+        with self._cond:
+            while True:
+                pos = self._next_runnable()
+                if pos is not None:
+                    trigger = self._pending.pop(pos)
+                    job_id = str(trigger.get("job_id") or "")
+                    self._running[job_id] = list(trigger.get("concurrency_keys") or [])
+                    self._leased[job_id] = trigger
+                    self._journal(
+                        "lease",
+                        job_id=job_id,
+                        attempt=int(trigger.get("attempt") or 1),
+                        worker=threading.current_thread().name,
+                        at=int(time.time()),
+                    )
+                    return trigger
+                self._cond.wait()
+
+    def cancel(self, job_id: str) -> tuple[str, list[str]]:
+        """Drop a queued job (or detach an alias); returns (state, aliases) with state queued/alias/running/""."""
+        with self._cond:
+            for pos, trigger in enumerate(self._pending):
+                if trigger.get("job_id") == job_id:
+                    del self._pending[pos]
+                    self._forget_primary(trigger)
+                    self._journal("drop", job_id=job_id)
+                    return "queued", self._aliases.pop(job_id, [])
+            for aliases in self._aliases.values():
+                if job_id in aliases:
+                    aliases.remove(job_id)
+                    self._journal("detach", job_id=job_id)
+                    return "alias", []
+            if job_id in self._running:
+                # A restart before the worker finishes must not retry a job the user cancelled.
+                self._leased[job_id] = {**self._leased[job_id], "cancelled": True}
+                self._journal("cancel", job_id=job_id)
+                return "running", []
+            return "", []
+
+    def done(self, job_id: str) -> list[str]:
+        """Release the job's keys; returns coalesced alias job_ids that should receive its result."""
+        with self._cond:
+            self._running.pop(job_id, None)
+            self._leased.pop(job_id, None)
+            for key in [k for k, primary in self._primary.items() if primary == job_id]:
+                del self._primary[key]
+            self._cond.notify_all()
+            aliases = self._aliases.pop(job_id, [])
+            self._journal("done", job_id=job_id)
+            if self.journal is not None and self.journal.due_for_compaction:
+                self.journal.rewrite(self._pending, self._leased, self._aliases)
+            return aliases
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._cond:
+            return {
+                "depth": len(self._pending),
+                "running": len(self._running),
+                "running_keys": {key: job_id for job_id, keys in self._running.items() for key in keys},
+            }
 
 
 class BridgeServerState:
     def __init__(self, config: BridgeConfig) -> None:
         self.config = config
-        self.jobs = JsonStore(RESULTS_DIR)
-        self.events = EventStore(EVENTS_DIR)
-        self.q: queue.Queue[dict[str, Any]] = queue.Queue()
+        self.jobs: JsonStore | SqliteJobStore
+        self.events: EventStore | SqliteEventStore
+        self.archive: StateArchive | None = None
+        if config.state_backend == "sqlite":
+            db = SqliteDatabase(config.sqlite_path, pool_size=config.sqlite_pool_size)
+            self.jobs = SqliteJobStore(db)
+            self.events = SqliteEventStore(db)
+        else:
+            self.archive = StateArchive(ARCHIVE_DIR)
+            self.jobs = JsonStore(RESULTS_DIR, self.archive)
+            self.events = EventStore(EVENTS_DIR, self.archive)
+        # A terminal result ends open /events/stream connections right away instead of at the next heartbeat.
+        self.jobs.waiters.add_listener(self.events.notifier.finish)
+        queue_cfg = config.job_queue
+        journal = None
+        if queue_cfg.get("journal", True):
+            journal = QueueJournal(QUEUE_JOURNAL_PATH, compact_after=int(queue_cfg.get("compact_after_ops", 1000)))
+        self.q = JobQueue(journal)
+        # Serializes cancel against a worker releasing the job, so a late cancel never flags a finished job_id.
+        self._release_lock = threading.Lock()
+        METRICS.gauge("bridge_queue_depth", "Jobs waiting in the queue.", lambda: [({}, self.q.snapshot()["depth"])])
+        METRICS.gauge("bridge_jobs_running", "Jobs currently held by a worker.", lambda: [({}, self.q.snapshot()["running"])])
+        self.engine = docker_engine_client(config)
+        self.services = ServiceDiscovery(config.service_discovery_ttl_seconds, self.engine)
+        self.analyzer = LogAnalyzer.from_config(config)
+        self.hello = CodexHelloCache(config)
+        self.artifacts: ArtifactStore | None = None
+        if config.artifacts.get("enabled", True):
+            self.artifacts = ArtifactStore(
+                ARTIFACTS_DIR, read_cache_bytes=int(float(config.artifacts.get("read_cache_mb", 256)) * (1 << 20))
+            )
+        # Set by the asyncio server core; None keeps checks on blocking subprocess calls.
+        self.command_runner: AsyncCommandRunner | None = None
+        review_cfg = dict(config.server_codex.get("review_cache") or {})
+        self.review_cache: ReviewCache | None = None
+        if review_cfg.get("enabled", True):
+            self.review_cache = ReviewCache(
+                REVIEW_CACHE_PATH,
+                ttl_seconds=float(review_cfg.get("ttl_seconds", 21600)),
+                max_entries=int(review_cfg.get("max_entries", 256)),
+            )
+
+    def enqueue(self, payload: dict[str, Any]) -> dict[str, Any]:
+        check_set, checks = detect_check_set(
+            str(payload.get("task") or ""), self.config.server_checks, self.config.task_check_mapping
+        )
+        keys = check_set_concurrency_keys(check_set, checks, self.config)
+        task = str(payload.get("task") or "")
+        outcome = self.q.put(
+            {
+                **payload,
+                "check_set": check_set,
+                "concurrency_keys": keys,
+                "task_key": _task_no(task) or task,
+                "enqueued_at": time.time(),
+            }
+        )
+        job_id = str(payload.get("job_id") or "")
+        primary = outcome.get("coalesced_into")
+        if primary:
+            server_log("bridge", f"trigger coalesced job_id={job_id} into={primary} check_set={check_set}")
+            self.jobs.write(job_id, {**(self.jobs.read(job_id) or {}), "stage": "coalesced", "coalesced_into": primary})
+        for old_id, aliases in dict(outcome.get("superseded") or {}).items():
+            server_log("bridge", f"trigger superseded job_id={old_id} by={job_id}")
+            METRICS.inc("bridge_jobs_finished_total", {"status": "superseded"}, 1 + len(aliases))
+            for superseded_id in (old_id, *aliases):
+                self.jobs.write(
+                    superseded_id,
+                    {
+                        **(self.jobs.read(superseded_id) or {}),
+                        "status": "superseded",
+                        "stage": "superseded",
+                        "superseded_by": job_id,
+                        "finished_at": int(time.time()),
+                    },
+                )
+        return outcome
+
+    def cancel(self, job_id: str) -> dict[str, Any]:
+        with self._release_lock:
+            state, aliases = self.q.cancel(job_id)
+            # The worker sees the flag, skips the remaining checks/review and writes the cancelled result.
+            killed = JOB_PROCESSES.cancel(job_id) if state == "running" else 0
+        if state and state != "running":
+            METRICS.inc("bridge_jobs_finished_total", {"status": "cancelled"}, 1 + len(aliases))
+            for cancelled_id in (job_id, *aliases):
+                self.jobs.write(
+                    cancelled_id,
+                    {
+                        **(self.jobs.read(cancelled_id) or {}),
+                        "status": "cancelled",
+                        "stage": "cancelled",
+                        "next_action": "fix_required",
+                        "finished_at": int(time.time()),
+                    },
+                )
+        server_log("bridge", f"cancel job_id={job_id} state={state or 'inactive'} killed={killed}")
+        return {"job_id": job_id, "state": state, "killed": killed}
+
+    def release(self, job_id: str) -> list[str]:
+        """Worker side of a finished job: free its queue keys and cancel flag; returns its coalesced aliases."""
+        with self._release_lock:
+            aliases = self.q.done(job_id)
+            JOB_PROCESSES.clear(job_id)
+        return aliases
+
+    def recover_queue(self) -> dict[str, int]:
+        """Re-queue jobs the previous process left queued; retry or fail the ones it was running."""
+        journal = self.q.journal
+        if journal is None:
+            return {}
+        pending, leased, aliases = journal.replay()
+        queue_cfg = self.config.job_queue
+        retry = bool(queue_cfg.get("retry_interrupted", True))
+        max_attempts = max(1, int(queue_cfg.get("max_attempts", 2)))
+        now = int(time.time())
+        requeued: list[dict[str, Any]] = []
+        stats = {"queued": len(pending), "retried": 0, "failed": 0, "cancelled": 0}
+        for job_id, trigger in leased.items():
+            attempt = int(trigger.get("attempt") or 1)
+            members = aliases.pop(job_id, [])
+            if trigger.get("cancelled"):
+                update = {"status": "cancelled", "stage": "cancelled", "next_action": "fix_required"}
+                stats["cancelled"] += 1
+            elif retry and attempt < max_attempts:
+                # Interrupted jobs go ahead of the ones that were still waiting; they were picked first.
+                requeued.append({**trigger, "attempt": attempt + 1})
+                if members:
+                    aliases[job_id] = members
+                self.jobs.write(
+                    job_id,
+                    {
+                        **(self.jobs.read(job_id) or {}),
+                        "status": "queued",
+                        "stage": "queued",
+                        "attempt": attempt + 1,
+                        "recovered": {"reason": "server restarted while the job was running", "at": now},
+                    },
+                )
+                stats["retried"] += 1
+                continue
+            else:
+                reason = f"bridge server restarted while the job was running (attempt {attempt}/{max_attempts})"
+                update = {
+                    "status": "error",
+                    "stage": "interrupted",
+                    "tests_passed": False,
+                    "errors": [reason],
+                    "suggestions": ["Triggerni qayta yuboring."],
+                    "next_action": "fix_required",
+                    "interrupted": True,
+                }
+                stats["failed"] += 1
+            METRICS.inc("bridge_jobs_finished_total", {"status": update["status"]}, 1 + len(members))
+            for closed_id in (job_id, *members):
+                self.jobs.write(closed_id, {**(self.jobs.read(closed_id) or {}), **update, "finished_at": now})
+        self.q.restore(requeued + pending, aliases)
+        for trigger in requeued + pending:
+            server_log(
+                "bridge",
+                f"recovered job_id={trigger.get('job_id')} attempt={trigger.get('attempt') or 1} "
+                f"check_set={trigger.get('check_set') or '-'}",
+            )
+        return stats
 
-    def enqueue(self, payload: dict[str, Any]) -> None:
-        self.q.put(payload)
+    def mirror_result(self, job_id: str, aliases: list[str]) -> None:
+        """Give coalesced alias jobs a copy of the primary job's final result, keeping each alias's own task."""
+        result = self.jobs.read(job_id)
+        if not result:
+            return
+        for alias in aliases:
+            own = self.jobs.read(alias) or {}
+            self.jobs.write(
+                alias, {**result, "task": own.get("task", result.get("task")), "job_id": alias, "coalesced_into": job_id}
+            )
 
 
 def load_config() -> BridgeConfig:
@@ -234,129 +1841,825 @@ def remote_log_on_server(source: str, channel: str, message: str) -> None:
     print(f"{left}{right} {message}")
 
 
-def run_command(command: str, cwd: Path, timeout: int = 300) -> dict[str, Any]:
+class ProcessRegistry:
+    """Child processes per job, so /cancel can kill whole process groups (shell=True spawns grandchildren)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._procs: dict[str, set[subprocess.Popen[Any]]] = {}
+        self._cancelled: set[str] = set()
+
+    def register(self, job_id: str, proc: subprocess.Popen[Any]) -> None:
+        with self._lock:
+            self._procs.setdefault(job_id, set()).add(proc)
+            cancelled = job_id in self._cancelled
+        if cancelled:
+            kill_process_group(proc)
+
+    def unregister(self, job_id: str, proc: subprocess.Popen[Any]) -> None:
+        with self._lock:
+            procs = self._procs.get(job_id)
+            if procs is not None:
+                procs.discard(proc)
+                if not procs:
+                    del self._procs[job_id]
+
+    def cancel(self, job_id: str) -> int:
+        with self._lock:
+            self._cancelled.add(job_id)
+            procs = list(self._procs.get(job_id, ()))
+        for proc in procs:
+            kill_process_group(proc)
+        return len(procs)
+
+    def is_cancelled(self, job_id: str) -> bool:
+        with self._lock:
+            return job_id in self._cancelled
+
+    def clear(self, job_id: str) -> None:
+        with self._lock:
+            self._cancelled.discard(job_id)
+
+
+def kill_process_group(proc: subprocess.Popen[Any]) -> None:
+    try:
+        if os.name == "nt":
+            if proc.poll() is None:
+                proc.kill()
+        else:
+            # Processes start in their own session, so the group id is the shell's pid; the group
+            # can outlive an exited shell through background grandchildren holding its pipes.
+            os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        if proc.poll() is None:
+            proc.kill()
+
+
+JOB_PROCESSES = ProcessRegistry()
+
+
+class BoundedCapture:
+    """Keeps the first and last max_bytes/2 of a stream and its total size; optionally spools all of it."""
+
+    def __init__(self, max_bytes: int = 0, spool_path: Path | None = None) -> None:
+        self.max_bytes = max(0, max_bytes)
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total = 0
+        self.spool_path = spool_path
+        self._spool = None
+        if spool_path is not None:
+            spool_path.parent.mkdir(parents=True, exist_ok=True)
+            self._spool = spool_path.open("wb")
+
+    def write(self, chunk: bytes) -> None:
+        self.total += len(chunk)
+        if self._spool is not None:
+            self._spool.write(chunk)
+        if not self.max_bytes:
+            self.head += chunk
+            return
+        head_room = self.max_bytes // 2 - len(self.head)
+        if head_room > 0:
+            self.head += chunk[:head_room]
+            chunk = chunk[head_room:]
+        if chunk:
+            self.tail += chunk
+            keep = self.max_bytes - self.max_bytes // 2
+            if len(self.tail) > keep:
+                del self.tail[: len(self.tail) - keep]
+
+    def close(self) -> None:
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+
+    @property
+    def truncated(self) -> bool:
+        return self.total > len(self.head) + len(self.tail)
+
+    def text(self) -> str:
+        head = self.head.decode("utf-8", errors="replace")
+        tail = self.tail.decode("utf-8", errors="replace")
+        if not self.truncated:
+            return head + tail
+        omitted = self.total - len(self.head) - len(self.tail)
+        return f"{head}\n... [{omitted} bytes truncated] ...\n{tail}"
+
+
+def _pump_stream(stream: Any, capture: BoundedCapture) -> None:
+    try:
+        for chunk in iter(lambda: stream.read1(65536), b""):
+            capture.write(chunk)
+    except (OSError, ValueError):
+        pass
+    finally:
+        capture.close()
+
+
+def _capture_fields(stdout: BoundedCapture, stderr: BoundedCapture) -> dict[str, Any]:
+    fields: dict[str, Any] = {
+        "stdout": stdout.text(),
+        "stderr": stderr.text(),
+        "stdout_bytes": stdout.total,
+        "stderr_bytes": stderr.total,
+        "truncated": stdout.truncated or stderr.truncated,
+    }
+    if stdout.spool_path is not None and stderr.spool_path is not None:
+        fields["spool"] = {"stdout": str(stdout.spool_path), "stderr": str(stderr.spool_path)}
+    return fields
+
+
+def check_spool_paths(job_id: str, command: str) -> tuple[Path, Path]:
+    digest = hashlib.sha1(command.encode("utf-8")).hexdigest()[:12]
+    base = SPOOL_DIR / (job_id or "-")
+    return base / f"{digest}.stdout.log", base / f"{digest}.stderr.log"
+
+
+ARTIFACT_HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class ArtifactStore:
+    """sha256-addressed gzip blobs of check output; identical outputs across jobs are stored once."""
+
+    def __init__(self, base_dir: Path, *, read_cache_bytes: int = 256 << 20) -> None:
+        self.base_dir = base_dir
+        # Decompressed copies of recently downloaded blobs: gzip cannot seek, so ranged reads go through these.
+        self.read_cache_dir = base_dir / ".plain"
+        self.read_cache_bytes = max(0, read_cache_bytes)
+
+    def path(self, digest: str) -> Path:
+        return self.base_dir / digest[:2] / f"{digest}.gz"
+
+    def put(self, data: bytes) -> str:
+        return self._store(hashlib.sha256(data).hexdigest(), lambda fh: fh.write(data))
+
+    def put_file(self, source: Path) -> str:
+        """Store a spooled output file without loading it whole: hash in one pass, compress in a second."""
+        digest = hashlib.sha256()
+        with source.open("rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b""):
+                digest.update(chunk)
+
+        def copy(out: Any) -> None:
+            with source.open("rb") as fh:
+                shutil.copyfileobj(fh, out, 1 << 20)
+
+        return self._store(digest.hexdigest(), copy)
+
+    def _store(self, digest: str, write: Callable[[Any], Any]) -> str:
+        path = self.path(digest)
+        try:
+            # Refresh mtime: retention drops blobs no job has referenced for max_age_days.
+            os.utime(path)
+            METRICS.inc("bridge_artifact_writes_total", {"outcome": "deduplicated"})
+            return digest
+        except FileNotFoundError:
+            pass
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+        # mtime=0 keeps the compressed bytes a pure function of the content.
+        with tmp.open("wb") as raw, gzip.GzipFile(filename="", mode="wb", fileobj=raw, mtime=0) as out:
+            write(out)
+        os.replace(tmp, path)
+        METRICS.inc("bridge_artifact_writes_total", {"outcome": "stored"})
+        return digest
+
+    def size(self, digest: str) -> int | None:
+        """Uncompressed size from the gzip ISIZE trailer (blobs are single-member and far below 4 GiB)."""
+        try:
+            with self.path(digest).open("rb") as fh:
+                fh.seek(-4, os.SEEK_END)
+                return int.from_bytes(fh.read(4), "little")
+        except OSError:
+            return None
+
+    def open(self, digest: str, start: int = 0) -> BinaryIO:
+        """Uncompressed blob positioned at start; decompressed once into the read cache, then served by seek."""
+        plain = self.read_cache_dir / digest
+        try:
+            fh = plain.open("rb")
+            # mtime orders the cache for eviction, least recently read first.
+            os.utime(plain)
+        except FileNotFoundError:
+            self.read_cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp = plain.with_name(f".{digest}.{threading.get_ident()}.tmp")
+            try:
+                with gzip.open(self.path(digest), "rb") as src, tmp.open("wb") as out:
+                    shutil.copyfileobj(src, out, 1 << 20)
+                os.replace(tmp, plain)
+            finally:
+                tmp.unlink(missing_ok=True)
+            # Opened before trimming: an evicted copy stays readable through this handle.
+            fh = plain.open("rb")
+            self._trim_read_cache(keep=digest)
+        fh.seek(start)
+        return fh
+
+    def _trim_read_cache(self, keep: str) -> None:
+        entries = []
+        for path in self.read_cache_dir.iterdir():
+            if path.name.startswith("."):
+                continue
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.read_cache_bytes:
+                break
+            if path.name == keep:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def prune(self, before_ts: float) -> int:
+        pruned = 0
+        for path in self.base_dir.glob("*/*.gz"):
+            try:
+                if path.stat().st_mtime >= before_ts:
+                    continue
+                path.unlink()
+            except OSError:
+                continue
+            pruned += 1
+        if self.read_cache_dir.is_dir():
+            # Decompressed copies go with their blob; temp files (".…tmp") belong to a download in progress.
+            for path in self.read_cache_dir.iterdir():
+                if not path.name.startswith(".") and not self.path(path.name).exists():
+                    path.unlink(missing_ok=True)
+        return pruned
+
+
+def _artifact_excerpt(text: str, excerpt_chars: int, digest: str, total: int) -> str:
+    half = max(0, excerpt_chars // 2)
+    if len(text) <= 2 * half:
+        return text
+    return f"{text[:half]}\n... [{total} bytes in artifact {digest[:12]}] ...\n{text[-half:]}"
+
+
+def store_check_artifacts(
+    check_results: list[dict[str, Any]], store: ArtifactStore, policy: dict[str, Any]
+) -> list[dict[str, Any]]:
+    """Result copies of check_results with large stdout/stderr replaced by an excerpt and an artifact ref."""
+    inline_max = max(0, int(policy.get("inline_max_bytes", 2048)))
+    excerpt_chars = max(0, int(policy.get("excerpt_bytes", 512)))
+    stored: list[dict[str, Any]] = []
+    for res in check_results:
+        res = dict(res)
+        spool = res.get("spool") if isinstance(res.get("spool"), dict) else {}
+        refs: dict[str, dict[str, Any]] = {}
+        for stream in ("stdout", "stderr"):
+            text = str(res.get(stream) or "")
+            total = int(res.get(f"{stream}_bytes") or len(text.encode("utf-8")))
+            if total <= inline_max:
+                continue
+            try:
+                # A spool file holds the whole stream; the inline text was already cut to max_bytes.
+                spool_path = Path(spool[stream]) if spool.get(stream) else None
+                if spool_path is not None and spool_path.is_file():
+                    digest = store.put_file(spool_path)
+                else:
+                    data = text.encode("utf-8")
+                    digest, total = store.put(data), len(data)
+            except OSError as exc:
+                server_log("bridge", f"artifact store failed stream={stream} error={exc} cmd={res.get('command')}")
+                continue
+            refs[stream] = {"sha256": digest, "bytes": total}
+            res[stream] = _artifact_excerpt(text, excerpt_chars, digest, total)
+        if refs:
+            res["artifacts"] = refs
+        stored.append(res)
+    return stored
+
+
+def run_command(
+    command: str,
+    cwd: Path,
+    timeout: int = 300,
+    *,
+    job_id: str = "",
+    max_output_bytes: int = 0,
+    spool: bool = False,
+) -> dict[str, Any]:
     started_at = time.time()
+    if job_id and JOB_PROCESSES.is_cancelled(job_id):
+        return _skipped_command_result(command)
+    spool_paths = check_spool_paths(job_id, command) if spool else (None, None)
+    stdout = BoundedCapture(max_output_bytes, spool_paths[0])
+    stderr = BoundedCapture(max_output_bytes, spool_paths[1])
+    proc = subprocess.Popen(
+        command,
+        cwd=str(cwd),
+        shell=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=os.name != "nt",
+    )
+    if job_id:
+        JOB_PROCESSES.register(job_id, proc)
+    # Output is streamed into bounded buffers, so a chatty command never sits in memory whole.
+    pumps = [
+        threading.Thread(target=_pump_stream, args=(proc.stdout, stdout), daemon=True),
+        threading.Thread(target=_pump_stream, args=(proc.stderr, stderr), daemon=True),
+    ]
+    for pump in pumps:
+        pump.start()
+    deadline = time.monotonic() + timeout
+    timed_out = False
     try:
-        completed = subprocess.run(
-            command,
-            cwd=str(cwd),
-            shell=True,
-            capture_output=True,
-            text=True,
-            timeout=timeout,
-        )
-        return {
-            "command": command,
-            "returncode": completed.returncode,
-            "stdout": completed.stdout,
-            "stderr": completed.stderr,
-            "duration_seconds": round(time.time() - started_at, 2),
-            "timed_out": False,
-        }
-    except subprocess.TimeoutExpired as exc:
-        stdout = ""
-        stderr = ""
-        if isinstance(exc.stdout, bytes):
-            stdout = exc.stdout.decode("utf-8", errors="replace")
-        elif isinstance(exc.stdout, str):
-            stdout = exc.stdout
-        if isinstance(exc.stderr, bytes):
-            stderr = exc.stderr.decode("utf-8", errors="replace")
-        elif isinstance(exc.stderr, str):
-            stderr = exc.stderr
+        try:
+            proc.wait(timeout=timeout)
+            for pump in pumps:
+                pump.join(max(0.0, deadline - time.monotonic()))
+            # Orphaned grandchildren can hold the pipes open after the shell exits.
+            timed_out = any(pump.is_alive() for pump in pumps)
+        except subprocess.TimeoutExpired:
+            timed_out = True
+        if timed_out:
+            # Kill the whole group; orphaned grandchildren would otherwise keep the pipes open.
+            kill_process_group(proc)
+            proc.wait()
+            for pump in pumps:
+                pump.join(5)
+    finally:
+        if job_id:
+            JOB_PROCESSES.unregister(job_id, proc)
+    return _command_result(
+        command, proc.returncode, stdout, stderr, started_at=started_at, timed_out=timed_out, timeout=timeout, job_id=job_id
+    )
+
+
+def _skipped_command_result(command: str) -> dict[str, Any]:
+    return {
+        "command": command,
+        "returncode": 130,
+        "stdout": "",
+        "stderr": "Command skipped: job cancelled",
+        "duration_seconds": 0.0,
+        "timed_out": False,
+        "cancelled": True,
+    }
+
+
+def _command_result(
+    command: str,
+    returncode: int | None,
+    stdout: BoundedCapture,
+    stderr: BoundedCapture,
+    *,
+    started_at: float,
+    timed_out: bool,
+    timeout: int,
+    job_id: str,
+) -> dict[str, Any]:
+    result = {
+        "command": command,
+        "returncode": returncode,
+        **_capture_fields(stdout, stderr),
+        "duration_seconds": round(time.time() - started_at, 2),
+        "timed_out": timed_out,
+    }
+    if timed_out:
         timeout_msg = f"Command timed out after {timeout}s"
-        stderr = (stderr + ("\n" if stderr else "") + timeout_msg).strip()
-        return {
-            "command": command,
-            "returncode": 124,
-            "stdout": stdout,
-            "stderr": stderr,
-            "duration_seconds": round(time.time() - started_at, 2),
-            "timed_out": True,
-        }
+        result["returncode"] = 124
+        result["stderr"] = (result["stderr"] + ("\n" if result["stderr"] else "") + timeout_msg).strip()
+    elif job_id and returncode != 0 and JOB_PROCESSES.is_cancelled(job_id):
+        result["returncode"] = 130
+        result["stderr"] = (result["stderr"] + ("\n" if result["stderr"] else "") + "Command cancelled").strip()
+        result["cancelled"] = True
+    return result
 
 
-def run_command_logged(command: str, cwd: Path, timeout: int = 300, *, job_id: str = "-") -> dict[str, Any]:
-    server_log("bridge", f"check start cmd={command}")
-    res = run_command(command, cwd, timeout=timeout)
+class AsyncProcessHandle:
+    """Popen-shaped view of an asyncio subprocess, so ProcessRegistry and kill_process_group accept it."""
+
+    def __init__(self, proc: asyncio.subprocess.Process) -> None:
+        self._proc = proc
+        self.pid = proc.pid
+
+    def poll(self) -> int | None:
+        return self._proc.returncode
+
+    def kill(self) -> None:
+        self._proc.kill()
+
+
+async def _pump_stream_async(stream: asyncio.StreamReader | None, capture: BoundedCapture) -> None:
+    try:
+        while stream is not None:
+            chunk = await stream.read(65536)
+            if not chunk:
+                break
+            capture.write(chunk)
+    finally:
+        capture.close()
+
+
+async def run_command_async(
+    command: str,
+    cwd: Path,
+    timeout: int = 300,
+    *,
+    job_id: str = "",
+    max_output_bytes: int = 0,
+    spool: bool = False,
+) -> dict[str, Any]:
+    """asyncio twin of run_command: same result fields, bounded capture and process-group kill."""
+    started_at = time.time()
+    if job_id and JOB_PROCESSES.is_cancelled(job_id):
+        return _skipped_command_result(command)
+    spool_paths = check_spool_paths(job_id, command) if spool else (None, None)
+    stdout = BoundedCapture(max_output_bytes, spool_paths[0])
+    stderr = BoundedCapture(max_output_bytes, spool_paths[1])
+    proc = await asyncio.create_subprocess_shell(
+        command,
+        cwd=str(cwd),
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=os.name != "nt",
+    )
+    handle = AsyncProcessHandle(proc)
+    if job_id:
+        JOB_PROCESSES.register(job_id, handle)  # type: ignore[arg-type]
+    # Exit and both pipes closing are awaited together, like run_command's wait + pump joins.
+    finished = asyncio.ensure_future(
+        asyncio.gather(proc.wait(), _pump_stream_async(proc.stdout, stdout), _pump_stream_async(proc.stderr, stderr))
+    )
+    timed_out = False
+    try:
+        done, _ = await asyncio.wait({finished}, timeout=timeout)
+        if not done:
+            timed_out = True
+            kill_process_group(handle)  # type: ignore[arg-type]
+            await proc.wait()
+            done, _ = await asyncio.wait({finished}, timeout=5)
+            if not done:
+                finished.cancel()
+    finally:
+        if job_id:
+            JOB_PROCESSES.unregister(job_id, handle)  # type: ignore[arg-type]
+    return _command_result(
+        command, proc.returncode, stdout, stderr, started_at=started_at, timed_out=timed_out, timeout=timeout, job_id=job_id
+    )
+
+
+class AsyncCommandRunner:
+    """Check commands run on the server event loop under a semaphore; worker threads hand them over."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, concurrency: int) -> None:
+        self.loop = loop
+        self.concurrency = concurrency
+        self._slots = asyncio.Semaphore(concurrency)
+
+    async def _run(
+        self,
+        command: str,
+        cwd: Path,
+        timeout: int,
+        *,
+        spans: SpanRecorder | None = None,
+        parent: dict[str, Any] | None = None,
+        span_command: str = "",
+        **kwargs: Any,
+    ) -> dict[str, Any]:
+        async with self._slots:
+            # Timed inside the semaphore, so the span is execution time, not the wait for a slot.
+            with job_span(spans, "check", parent=parent, command=span_command or command) as node:
+                res = await run_command_async(command, cwd, timeout, **kwargs)
+                node["returncode"] = res["returncode"]
+            return res
+
+    def submit(self, command: str, cwd: Path, timeout: int, **kwargs: Any) -> Future[dict[str, Any]]:
+        return asyncio.run_coroutine_threadsafe(self._run(command, cwd, timeout, **kwargs), self.loop)
+
+    def run(self, command: str, cwd: Path, timeout: int, **kwargs: Any) -> dict[str, Any]:
+        return self.submit(command, cwd, timeout, **kwargs).result()
+
+
+def log_check_result(res: dict[str, Any], timeout: int) -> None:
+    command = res["command"]
     server_log(
         "bridge",
         f"check done  rc={res['returncode']} dur={res['duration_seconds']}s cmd={command}",
     )
+    if res.get("truncated"):
+        server_log(
+            "bridge",
+            f"check output truncated stdout_bytes={res['stdout_bytes']} stderr_bytes={res['stderr_bytes']} cmd={command}",
+        )
     if res.get("timed_out"):
         server_log("bridge", f"check timeout after {timeout}s cmd={command}")
     if res["returncode"] != 0 and str(res.get("stderr") or "").strip():
         first_line = str(res["stderr"]).strip().splitlines()[0][:240]
         server_log("bridge", f"check stderr {first_line}")
-    return res
 
 
-def _analyze_docker_service_ps_checks(check_results: list[dict[str, Any]]) -> list[str]:
-    warnings: list[str] = []
-    transitional_tokens = (
-        " preparing ",
-        " pending ",
-        " assigned ",
-        " accepted ",
-        " ready ",
-        " starting ",
-        " shutdown ",
-        " complete ",
-    )
-    failure_tokens = (" failed ", " rejected ", " orphaned ")
+ENGINE_FAILED_TASK_STATES = {"failed", "rejected", "orphaned"}
+
+
+def _analyze_engine_service_tasks(engine: dict[str, Any]) -> str:
+    # Judge only the newest task per slot; older history rows are the previous rollout, not the current state.
+    current: dict[str, dict[str, Any]] = {}
+    for task in engine.get("tasks") or []:
+        slot_key = str(task.get("slot") if task.get("slot") is not None else task.get("node_id"))
+        if slot_key not in current or int(task.get("version") or 0) > int(current[slot_key].get("version") or 0):
+            current[slot_key] = task
+    failed = [t for t in current.values() if t.get("state") in ENGINE_FAILED_TASK_STATES]
+    if failed:
+        preview = f"{failed[0].get('name')} {failed[0].get('state')} {failed[0].get('error') or failed[0].get('message')}"
+        return f"docker service ps ichida failed/rejected task satrlari ko'rindi (rollout xatolari bo'lishi mumkin). preview: {preview.strip()[:180]}"
+    settling = [t for t in current.values() if t.get("desired_state") == "running" and t.get("state") != "running"]
+    if settling:
+        preview = f"{settling[0].get('name')} {settling[0].get('state')}"
+        return (
+            "docker service ps rollout hali transitional holatda ko'rindi (Preparing/Pending/Starting/Ready); deploy to'liq settle bo'lmagan bo'lishi mumkin."
+            + f" preview: {preview[:180]}"
+        )
+    return ""
+
+
+DEFAULT_LOG_RULES: list[dict[str, Any]] = [
+    {
+        "id": "ps_failed_task",
+        "checks": ["service_ps"],
+        "pattern": r"\b(failed|rejected|orphaned)\b",
+        "message": "docker service ps ichida failed/rejected task satrlari ko'rindi (rollout xatolari bo'lishi mumkin).",
+    },
+    {
+        "id": "ps_transitional",
+        "checks": ["service_ps"],
+        "pattern": r"\b(preparing|pending|assigned|accepted|ready|starting|shutdown|complete)\b",
+        "unless": ["ps_failed_task"],
+        "message": "docker service ps rollout hali transitional holatda ko'rindi (Preparing/Pending/Starting/Ready); deploy to'liq settle bo'lmagan bo'lishi mumkin. preview: {sample}",
+    },
+    {"id": "nest_started", "checks": ["service_logs"], "literal": "nest application successfully started", "emit": False},
+    {"id": "polite_sigterm", "checks": ["service_logs"], "literal": "signal sigterm (polite quit request)", "emit": False},
+    {
+        "id": "fatal_signature",
+        "checks": ["service_logs"],
+        "pattern": r"unhandled exception|error: listen eaddrinuse|error: connect econnrefused|fatal error|panic:",
+        "emit": False,
+    },
+    {
+        "id": "graceful_rollout_sigterm",
+        "checks": ["service_logs"],
+        "requires": ["nest_started", "polite_sigterm"],
+        "unless": ["fatal_signature"],
+        "message": "docker service logs snapshotda `Nest application successfully started` dan keyin `SIGTERM (Polite quit request)` ko'rindi; rollout/redeploy paytida bu odatda normal (eski task graceful shutdown).",
+    },
+]
+LOG_RULE_SEVERITIES = {"info", "warning", "error"}
+LOG_RULE_MAX_LINES = 5
 
-    for item in check_results:
-        cmd = str(item.get("command", "")).lower()
-        if "docker service ps " not in cmd:
-            continue
-        stdout = f" {str(item.get('stdout', '')).lower()} "
-        lines = [ln.strip() for ln in str(item.get("stdout", "")).splitlines() if ln.strip()]
-        if any(tok in stdout for tok in failure_tokens):
-            warnings.append("docker service ps ichida failed/rejected task satrlari ko'rindi (rollout xatolari bo'lishi mumkin).")
-            continue
-        if any(tok in stdout for tok in transitional_tokens):
-            # Often normal right after Dokploy hook; surface as rollout-lag warning, not failure.
-            preview = ""
-            if len(lines) > 1:
-                preview = lines[1][:180]
-            warnings.append(
-                "docker service ps rollout hali transitional holatda ko'rindi (Preparing/Pending/Starting/Ready); deploy to'liq settle bo'lmagan bo'lishi mumkin."
-                + (f" preview: {preview}" if preview else "")
-            )
-    return warnings
 
+@dataclass
+class LogRule:
+    id: str
+    source: str
+    regex: re.Pattern[str] | None
+    severity: str
+    message: str
+    checks: frozenset[str]
+    services: frozenset[str]
+    requires: tuple[str, ...]
+    unless: tuple[str, ...]
+    emit: bool
+    lowered: bool
+
+    def applies_to(self, kind: str, service: str, service_name: str) -> bool:
+        if "*" not in self.checks and kind not in self.checks:
+            return False
+        return not self.services or service in self.services or service_name in self.services
 
-def _analyze_docker_service_logs_checks(check_results: list[dict[str, Any]]) -> list[str]:
-    warnings: list[str] = []
-    for item in check_results:
-        cmd = str(item.get("command", "")).lower()
-        if "docker service logs " not in cmd:
-            continue
 
-        text = str(item.get("stdout", "") or "")
-        text_l = text.lower()
+class _TemplateValues(dict):
+    def __missing__(self, key: str) -> str:
+        return "{" + key + "}"
 
-        saw_started = "nest application successfully started" in text_l
-        saw_polite_sigterm = (
-            "signal sigterm (polite quit request)" in text_l
-            or "terminated by signal sigterm (polite quit request)" in text_l
-        )
-        saw_fatal = any(
-            token in text_l
-            for token in (
-                "unhandled exception",
-                "error: listen eaddrinuse",
-                "error: connect econnrefused",
-                "fatal error",
-                "panic:",
-            )
-        )
 
-        if saw_started and saw_polite_sigterm and not saw_fatal:
-            warnings.append(
-                "docker service logs snapshotda `Nest application successfully started` dan keyin `SIGTERM (Polite quit request)` ko'rindi; rollout/redeploy paytida bu odatda normal (eski task graceful shutdown)."
+def check_kind(item: dict[str, Any]) -> str:
+    engine = item.get("engine")
+    if isinstance(engine, dict):
+        op = str(engine.get("op") or "")
+        # Engine logs are the same text the CLI prints, so log rules apply to both.
+        return "service_logs" if op == "service_logs" else f"engine:{op}"
+    cmd = str(item.get("command", "")).lower()
+    if "docker service ps " in cmd:
+        return "service_ps"
+    if "docker service logs " in cmd:
+        return "service_logs"
+    return "command"
+
+
+class LogAnalyzer:
+    """Rules from `log_analyzers` compiled once into one alternation; each check's output is scanned in one pass."""
+
+    def __init__(self, rules: list[LogRule]) -> None:
+        self.rules = rules
+        self._lock = threading.Lock()
+        self._matchers: dict[str, list[tuple[re.Pattern[str], list[LogRule], bool]]] = {}
+
+    @classmethod
+    def from_config(cls, config: BridgeConfig) -> LogAnalyzer:
+        settings = config.log_analyzers
+        entries: dict[str, dict[str, Any]] = {}
+        if settings.get("defaults", True):
+            entries.update((str(rule["id"]), rule) for rule in DEFAULT_LOG_RULES)
+        for idx, rule in enumerate(settings.get("rules") or []):
+            if isinstance(rule, dict):
+                # A config rule with a default's id replaces it ("enabled": false drops it).
+                entries[str(rule.get("id") or f"rule_{idx}")] = rule
+        rules: list[LogRule] = []
+        for rule_id, entry in entries.items():
+            if entry.get("enabled", True) is False:
+                continue
+            parsed = _parse_log_rule(rule_id, entry)
+            if parsed is not None:
+                rules.append(parsed)
+        return cls(rules)
+
+    def _matchers_for(self, kind: str) -> list[tuple[re.Pattern[str], list[LogRule], bool]]:
+        with self._lock:
+            cached = self._matchers.get(kind)
+            if cached is not None:
+                return cached
+            matchers: list[tuple[re.Pattern[str], list[LogRule], bool]] = []
+            for lowered in (True, False):
+                rules = [
+                    rule
+                    for rule in self.rules
+                    if rule.regex is not None and rule.lowered is lowered and ("*" in rule.checks or kind in rule.checks)
+                ]
+                if not rules:
+                    continue
+                try:
+                    combined = re.compile("|".join(f"(?:{rule.source})" for rule in rules))
+                except re.error as exc:
+                    # e.g. the same named group in two rules; every non-empty line then goes to the per-rule check.
+                    server_log("bridge", f"analyzer combined regex failed kind={kind} error={exc}")
+                    combined = re.compile(r"[^\n]+")
+                matchers.append((combined, rules, lowered))
+            self._matchers[kind] = matchers
+            return matchers
+
+    def scan(self, text: str, kind: str, service: str, service_name: str) -> dict[str, dict[str, Any]]:
+        """Return {rule_id: {count, lines, sample}}; only lines hit by a combined matcher are attributed."""
+        hits: dict[str, dict[str, Any]] = {}
+        for combined, rules, lowered in self._matchers_for(kind):
+            rules = [rule for rule in rules if rule.applies_to(kind, service, service_name)]
+            if not rules:
+                continue
+            # Case-insensitive rules run on one lowercased copy; an IGNORECASE alternation is several times slower.
+            haystack = text.lower() if lowered else text
+            # Samples keep the original case whenever lowering did not shift offsets (practically always).
+            original = text if len(haystack) == len(text) else haystack
+            line_no = 1
+            cursor = 0
+            last_start = -1
+            for match in combined.finditer(haystack):
+                start = haystack.rfind("\n", 0, match.start()) + 1
+                if start == last_start:
+                    continue
+                line_no += haystack.count("\n", cursor, start)
+                cursor = last_start = start
+                end = haystack.find("\n", start)
+                line = haystack[start:] if end < 0 else haystack[start:end]
+                for rule in rules:
+                    if rule.regex is not None and rule.regex.search(line):
+                        sample = original[start:] if end < 0 else original[start:end]
+                        hit = hits.setdefault(rule.id, {"count": 0, "lines": [], "sample": sample.strip()[:180]})
+                        hit["count"] += 1
+                        if len(hit["lines"]) < LOG_RULE_MAX_LINES:
+                            hit["lines"].append(line_no)
+        return hits
+
+    def analyze(self, check_results: list[dict[str, Any]], spans: SpanRecorder | None = None) -> list[dict[str, Any]]:
+        findings: list[dict[str, Any]] = []
+        for idx, item in enumerate(check_results):
+            with job_span(spans, "analyze.check", check=idx):
+                self._analyze_one(idx, item, findings)
+        return findings
+
+    def _analyze_one(self, idx: int, item: dict[str, Any], findings: list[dict[str, Any]]) -> None:
+        kind = check_kind(item)
+        command = str(item.get("command_template") or item.get("command") or "")
+        alias_match = SERVICE_TOKEN_RE.search(command)
+        service = alias_match.group("alias") if alias_match else ""
+        engine = item.get("engine") if isinstance(item.get("engine"), dict) else {}
+        service_name = str(engine.get("service") or "")
+        if kind == "engine:service_ps":
+            message = _analyze_engine_service_tasks(engine)
+            if message:
+                findings.append(
+                    {
+                        "rule": "engine_service_tasks",
+                        "severity": "warning",
+                        "check": idx,
+                        "command": command,
+                        "service": service,
+                        "count": 1,
+                        "lines": [],
+                        "message": message,
+                    }
+                )
+            return
+        if engine.get("log_error"):
+            findings.append(
+                {
+                    "rule": "engine_service_logs_unavailable",
+                    "severity": "warning",
+                    "check": idx,
+                    "command": command,
+                    "service": service,
+                    "count": 1,
+                    "lines": [],
+                    "message": f"{service_name or service} loglari olinmadi: {engine['log_error']}",
+                }
+            )
+        text = str(item.get("stdout", "") or "")
+        if kind == "service_logs" and str(item.get("stderr", "") or ""):
+            # Line numbers run through stdout, then continue into stderr.
+            text += "\n" + str(item["stderr"])
+        hits = self.scan(text, kind, service, service_name)
+        for rule in self.rules:
+            if not rule.emit or not rule.applies_to(kind, service, service_name):
+                continue
+            if any(dep not in hits for dep in rule.requires) or any(dep in hits for dep in rule.unless):
+                continue
+            if rule.regex is not None:
+                hit = hits.get(rule.id)
+            elif rule.requires:
+                first = hits[rule.requires[0]]
+                hit = {"count": 1, "lines": first["lines"][:1], "sample": first["sample"]}
+            else:
+                hit = None
+            if not hit:
+                continue
+            values = _TemplateValues(
+                count=hit["count"],
+                line=hit["lines"][0] if hit["lines"] else "",
+                sample=hit["sample"],
+                service=service or service_name,
+                command=command,
+                rule=rule.id,
             )
-    return warnings
+            try:
+                message = rule.message.format_map(values)
+            except (ValueError, IndexError):
+                message = rule.message
+            findings.append(
+                {
+                    "rule": rule.id,
+                    "severity": rule.severity,
+                    "check": idx,
+                    "command": command,
+                    "service": service,
+                    "count": hit["count"],
+                    "lines": hit["lines"],
+                    "message": message,
+                }
+            )
+
+
+def _parse_log_rule(rule_id: str, entry: dict[str, Any]) -> LogRule | None:
+    lowered = not entry.get("case_sensitive")
+    literal = str(entry.get("literal") or "")
+    if literal:
+        source = re.escape(literal.lower() if lowered else literal)
+    else:
+        source = str(entry.get("pattern") or "")
+        # Lowered rules match lowercased text; only patterns with uppercase literals still need IGNORECASE.
+        if lowered and any(ch.isupper() for ch in re.sub(r"\\.", "", source)):
+            source = f"(?i:{source})"
+    regex = None
+    if source:
+        try:
+            regex = re.compile(source)
+        except re.error as exc:
+            server_log("bridge", f"analyzer rule skipped id={rule_id} error={exc}")
+            return None
+    requires = tuple(str(x) for x in entry.get("requires") or [])
+    if regex is None and not requires:
+        server_log("bridge", f"analyzer rule skipped id={rule_id} error=needs pattern, literal or requires")
+        return None
+    severity = str(entry.get("severity") or "warning").lower()
+    checks = entry.get("checks") or ["*"]
+    return LogRule(
+        id=rule_id,
+        source=source,
+        regex=regex,
+        severity=severity if severity in LOG_RULE_SEVERITIES else "warning",
+        message=str(entry.get("message") or rule_id),
+        checks=frozenset(str(x) for x in ([checks] if isinstance(checks, str) else checks)),
+        services=frozenset(str(x) for x in entry.get("services") or []),
+        requires=requires,
+        unless=tuple(str(x) for x in entry.get("unless") or []),
+        emit=bool(entry.get("emit", True)),
+        lowered=lowered,
+    )
 
 
 TASK_NUMBER_RE = re.compile(r"\b(?P<phase>\d+)\.(?P<task>\d+)\b")
@@ -365,9 +2668,9 @@ SERVICE_TOKEN_RE = re.compile(r"\{\{service:(?P<alias>[a-zA-Z0-9_-]+)\}\}")
 
 def detect_check_set(
     task: str,
-    checks: dict[str, list[str]],
+    checks: dict[str, list[Any]],
     task_mapping: dict[str, str],
-) -> tuple[str, list[str]]:
+) -> tuple[str, list[Any]]:
     task_l = task.lower()
 
     match = TASK_NUMBER_RE.search(task)
@@ -386,16 +2689,287 @@ def detect_check_set(
     return "default", checks.get("default", [])
 
 
-def list_docker_services(cwd: Path) -> list[str]:
+class DockerEngineError(RuntimeError):
+    """Docker Engine API call failed: socket unreachable or non-2xx response."""
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """http.client connection over a unix domain socket."""
+
+    def __init__(self, socket_path: str, timeout: float = 20.0) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+
+
+DOCKER_LOG_STREAMS = {0: "stdin", 1: "stdout", 2: "stderr"}
+DOCKER_SINCE_RE = re.compile(r"^(?P<value>\d+(?:\.\d+)?)(?P<unit>[smhd])$")
+DOCKER_SINCE_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def docker_since_timestamp(value: str, now: float | None = None) -> str:
+    """`10m` -> unix timestamp 10 minutes ago; bare numbers are already timestamps (like `docker --since`)."""
+    match = DOCKER_SINCE_RE.match(value.strip())
+    if not match:
+        return value.strip()
+    seconds = float(match.group("value")) * DOCKER_SINCE_UNITS[match.group("unit")]
+    return str(int((time.time() if now is None else now) - seconds))
+
+
+def _read_exact(stream: Any, size: int) -> bytes:
+    buf = b""
+    while len(buf) < size:
+        chunk = stream.read(size - len(buf))
+        if not chunk:
+            break
+        buf += chunk
+    return buf
+
+
+def iter_docker_log_frames(stream: Any) -> Any:
+    """Yield (stream_name, payload) from a multiplexed log body; TTY services send unframed raw output."""
+    header = _read_exact(stream, 8)
+    while header:
+        if len(header) == 8 and header[0] in DOCKER_LOG_STREAMS and header[1:4] == b"\0\0\0":
+            yield DOCKER_LOG_STREAMS[header[0]], _read_exact(stream, int.from_bytes(header[4:8], "big"))
+            header = _read_exact(stream, 8)
+            continue
+        yield "stdout", header + stream.read()
+        return
+
+
+class DockerEngineClient:
+    """Docker Engine API over the unix socket (stdlib only); one short-lived connection per call."""
+
+    def __init__(self, socket_path: str, timeout: float = 20.0) -> None:
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def available(self) -> bool:
+        return os.path.exists(self.socket_path)
+
+    def _open(self, path: str, query: dict[str, Any] | None = None) -> tuple[UnixHTTPConnection, Any]:
+        url = path + (f"?{urlencode(query)}" if query else "")
+        conn = UnixHTTPConnection(self.socket_path, timeout=self.timeout)
+        try:
+            conn.request("GET", url, headers={"Host": "docker"})
+            resp = conn.getresponse()
+        except OSError as exc:
+            conn.close()
+            raise DockerEngineError(f"docker socket {self.socket_path}: {exc}") from exc
+        if resp.status >= 300:
+            body = resp.read().decode("utf-8", errors="replace")
+            conn.close()
+            try:
+                message = str(json.loads(body).get("message") or body)
+            except (json.JSONDecodeError, AttributeError):
+                message = body
+            raise DockerEngineError(f"GET {path} -> {resp.status}: {message.strip()[:300]}")
+        return conn, resp
+
+    def _get_json(self, path: str, query: dict[str, Any] | None = None) -> Any:
+        conn, resp = self._open(path, query)
+        try:
+            return json.loads(resp.read().decode("utf-8"))
+        except (OSError, http.client.HTTPException, json.JSONDecodeError) as exc:
+            raise DockerEngineError(f"GET {path}: {exc}") from exc
+        finally:
+            conn.close()
+
+    def services(self) -> list[dict[str, Any]]:
+        return list(self._get_json("/services"))
+
+    def service_inspect(self, name: str) -> dict[str, Any]:
+        return dict(self._get_json(f"/services/{quote(name, safe='')}"))
+
+    def service_tasks(self, name: str) -> list[dict[str, Any]]:
+        return list(self._get_json("/tasks", {"filters": json.dumps({"service": [name]})}))
+
+    def service_log_frames(self, name: str, *, since: str = "", tail: str = "") -> Any:
+        """Stream (stream_name, payload) frames of `docker service logs` without buffering the whole body."""
+        query: dict[str, Any] = {"stdout": 1, "stderr": 1}
+        if since:
+            query["since"] = docker_since_timestamp(since)
+        if tail:
+            query["tail"] = tail
+        conn, resp = self._open(f"/services/{quote(name, safe='')}/logs", query)
+        try:
+            yield from iter_docker_log_frames(resp)
+        except (OSError, http.client.HTTPException) as exc:
+            # IncompleteRead: the daemon dropped the chunked stream mid-frame.
+            raise DockerEngineError(f"logs {name}: {exc}") from exc
+        finally:
+            conn.close()
+
+    def service_logs(self, name: str, *, since: str = "", tail: str = "") -> list[tuple[str, str]]:
+        pending: dict[str, bytes] = {}
+        lines: list[tuple[str, str]] = []
+        for stream_name, payload in self.service_log_frames(name, since=since, tail=tail):
+            # Frames are not guaranteed to end on a newline; carry partial lines per stream.
+            *complete, pending[stream_name] = (pending.get(stream_name, b"") + payload).split(b"\n")
+            lines.extend((stream_name, raw.decode("utf-8", errors="replace")) for raw in complete)
+        lines.extend((stream_name, raw.decode("utf-8", errors="replace")) for stream_name, raw in pending.items() if raw)
+        return lines
+
+
+def docker_engine_client(config: BridgeConfig) -> DockerEngineClient | None:
+    settings = config.docker_engine
+    if not settings.get("enabled", True):
+        return None
+    return DockerEngineClient(config.docker_socket_path, float(settings.get("timeout_seconds", 20)))
+
+
+def _engine_service_summary(service: dict[str, Any]) -> dict[str, Any]:
+    spec = service.get("Spec") or {}
+    replicated = (spec.get("Mode") or {}).get("Replicated") or {}
+    update = service.get("UpdateStatus") or {}
+    return {
+        "id": service.get("ID", ""),
+        "name": spec.get("Name", ""),
+        "image": ((spec.get("TaskTemplate") or {}).get("ContainerSpec") or {}).get("Image", ""),
+        "replicas": replicated.get("Replicas"),
+        "update_state": update.get("State", ""),
+        "update_message": update.get("Message", ""),
+        "updated_at": service.get("UpdatedAt", ""),
+    }
+
+
+def _engine_task_summary(task: dict[str, Any], service_name: str) -> dict[str, Any]:
+    status = task.get("Status") or {}
+    slot = task.get("Slot")
+    return {
+        "id": task.get("ID", ""),
+        "name": f"{service_name}.{slot if slot is not None else task.get('NodeID', '')}",
+        "slot": slot,
+        "node_id": task.get("NodeID", ""),
+        "version": int((task.get("Version") or {}).get("Index") or 0),
+        "desired_state": str(task.get("DesiredState", "")),
+        "state": str(status.get("State", "")),
+        "message": str(status.get("Message", "")),
+        "error": str(status.get("Err", "")),
+        "updated_at": status.get("Timestamp", ""),
+    }
+
+
+ENGINE_CHECK_PREFIX = "engine:"
+
+
+def run_engine_check(
+    command: str,
+    engine: DockerEngineClient | None,
+    *,
+    job_id: str = "",
+    max_output_bytes: int = 0,
+    spool: bool = False,
+) -> dict[str, Any]:
+    """Run an `engine:<op> [service] [key=value...]` check against the Docker Engine API, no process spawn."""
+    started_at = time.time()
+    parts = command[len(ENGINE_CHECK_PREFIX):].split()
+    op = parts[0] if parts else ""
+    args = [p for p in parts[1:] if "=" not in p]
+    opts = dict(p.split("=", 1) for p in parts[1:] if "=" in p)
+    service = args[0] if args else ""
+    result: dict[str, Any] = {
+        "command": command,
+        "returncode": 0,
+        "stdout": "",
+        "stderr": "",
+        "duration_seconds": 0.0,
+        "timed_out": False,
+        "engine": {"op": op, "service": service},
+    }
+    server_log("bridge", f"check start cmd={command}")
+    try:
+        if job_id and JOB_PROCESSES.is_cancelled(job_id):
+            result.update(returncode=130, stderr="Command skipped: job cancelled", cancelled=True)
+        elif engine is None:
+            raise DockerEngineError("docker_engine.enabled=false")
+        elif op == "service_ls":
+            services = sorted((_engine_service_summary(s) for s in engine.services()), key=lambda s: s["name"])
+            result["engine"]["services"] = services
+            result["stdout"] = "\n".join(s["name"] for s in services)
+        elif op in {"service_ps", "service_inspect", "service_logs"} and not service:
+            raise DockerEngineError(f"{op} needs a service name")
+        elif op == "service_ps":
+            tasks = [_engine_task_summary(t, service) for t in engine.service_tasks(service)]
+            tasks.sort(key=lambda t: (str(t["slot"] if t["slot"] is not None else t["node_id"]), -t["version"]))
+            result["engine"]["tasks"] = tasks
+            result["stdout"] = "\n".join(
+                f"{t['name']}\t{t['desired_state']}\t{t['state']}\t{t['error'] or t['message']}" for t in tasks
+            )
+        elif op == "service_inspect":
+            service_info = engine.service_inspect(service)
+            result["engine"]["service_info"] = _engine_service_summary(service_info)
+            result["stdout"] = compact_json(service_info)
+        elif op == "service_logs":
+            spool_paths = check_spool_paths(job_id, command) if spool else (None, None)
+            captures = {
+                "stdout": BoundedCapture(max_output_bytes, spool_paths[0]),
+                "stderr": BoundedCapture(max_output_bytes, spool_paths[1]),
+            }
+            lines = 0
+            log_error = ""
+            try:
+                for stream_name, payload in engine.service_log_frames(
+                    service, since=opts.get("since", ""), tail=opts.get("tail", "")
+                ):
+                    captures["stderr" if stream_name == "stderr" else "stdout"].write(payload)
+                    lines += payload.count(b"\n")
+            except DockerEngineError as exc:
+                # Logs are evidence, not a health signal (the CLI form ran with `|| true`): a socket hiccup
+                # keeps whatever was read and surfaces as a warning finding instead of failing the job.
+                log_error = str(exc)
+            finally:
+                for capture in captures.values():
+                    capture.close()
+            result["engine"]["lines"] = lines
+            result.update(_capture_fields(captures["stdout"], captures["stderr"]))
+            if log_error:
+                result["engine"]["log_error"] = log_error
+                result["stderr"] = (result["stderr"] + ("\n" if result["stderr"] else "") + log_error).strip()
+                server_log("bridge", f"engine service logs unavailable service={service} error={log_error}")
+        else:
+            raise DockerEngineError(f"unknown engine check op={op or '-'}")
+    except DockerEngineError as exc:
+        result["returncode"] = 1
+        result["stderr"] = str(exc)
+    result["duration_seconds"] = round(time.time() - started_at, 2)
+    server_log("bridge", f"check done  rc={result['returncode']} dur={result['duration_seconds']}s cmd={command}")
+    if result["returncode"] != 0:
+        server_log("bridge", f"check stderr {result['stderr'][:240]}")
+    return result
+
+
+def list_docker_services(cwd: Path, engine: DockerEngineClient | None = None) -> list[str]:
+    if engine is not None and engine.available():
+        try:
+            return sorted(str((s.get("Spec") or {}).get("Name") or "") for s in engine.services())
+        except DockerEngineError as exc:
+            server_log("bridge", f"engine service list failed, using docker cli error={exc}")
     res = run_command('docker service ls --format "{{.Name}}"', cwd, timeout=60)
     if res["returncode"] != 0:
         return []
     return [line.strip() for line in str(res["stdout"]).splitlines() if line.strip()]
 
 
-def resolve_service_alias(alias: str, config: BridgeConfig, cwd: Path) -> str:
+def resolve_service_alias(
+    alias: str,
+    config: BridgeConfig,
+    cwd: Path,
+    services: list[str] | None = None,
+) -> str:
     patterns = config.service_name_patterns.get(alias, [])
-    services = list_docker_services(cwd)
+    if services is None:
+        services = list_docker_services(cwd)
     if not services:
         return alias
 
@@ -419,9 +2993,71 @@ def resolve_service_alias(alias: str, config: BridgeConfig, cwd: Path) -> str:
     return alias
 
 
-def render_check_command(command: str, config: BridgeConfig, cwd: Path) -> str:
+class ServiceDiscovery:
+    """Shared TTL cache of `docker service ls` names used to resolve {{service:alias}} templates."""
+
+    def __init__(self, ttl_seconds: float, engine: DockerEngineClient | None = None) -> None:
+        self.ttl_seconds = max(0.0, ttl_seconds)
+        self.engine = engine
+        self._lock = threading.Lock()
+        self._services: list[str] | None = None
+        self._fetched_at = 0.0
+
+    def services(self, cwd: Path, *, refresh: bool = False) -> list[str]:
+        # One listing at a time: concurrent jobs wait for the in-flight `docker service ls` instead of repeating it.
+        with self._lock:
+            expired = time.monotonic() - self._fetched_at > self.ttl_seconds
+            if refresh or self._services is None or expired:
+                services = list_docker_services(cwd, self.engine)
+                # A failed listing is not cached, so the next job retries right away.
+                self._services = services or None
+                self._fetched_at = time.monotonic()
+                return services
+            return list(self._services)
+
+    def warm_up(self, cwd: Path) -> None:
+        services = self.services(cwd, refresh=True)
+        server_log("bridge", f"service cache warm-up services={len(services)}")
+
+    def invalidate(self, reason: str) -> None:
+        with self._lock:
+            if self._services is not None:
+                server_log("bridge", f"service cache invalidated reason={reason}")
+            self._services = None
+
+    def resolve_all(self, aliases: set[str], config: BridgeConfig, cwd: Path) -> dict[str, str]:
+        if not aliases:
+            return {}
+        cached_at = self._fetched_at
+        services = self.services(cwd)
+        mapping = {alias: resolve_service_alias(alias, config, cwd, services) for alias in sorted(aliases)}
+        from_cache = self._fetched_at == cached_at
+        if from_cache and services and any(name == alias for alias, name in mapping.items()):
+            # An alias with no matching service may be a fresh deploy the cached listing predates.
+            services = self.services(cwd, refresh=True)
+            mapping = {alias: resolve_service_alias(alias, config, cwd, services) for alias in sorted(aliases)}
+        return mapping
+
+
+def check_set_aliases(checks: list[Any]) -> set[str]:
+    return {
+        match.group("alias")
+        for step in plan_check_steps(checks)
+        for cmd in step
+        for match in SERVICE_TOKEN_RE.finditer(cmd)
+    }
+
+
+def render_check_command(
+    command: str,
+    config: BridgeConfig,
+    cwd: Path,
+    service_map: dict[str, str] | None = None,
+) -> str:
     def repl(match: re.Match[str]) -> str:
         alias = match.group("alias")
+        if service_map and alias in service_map:
+            return service_map[alias]
         return resolve_service_alias(alias, config, cwd)
 
     if "{{service:" not in command:
@@ -429,6 +3065,387 @@ def render_check_command(command: str, config: BridgeConfig, cwd: Path) -> str:
     return SERVICE_TOKEN_RE.sub(repl, command)
 
 
+def _expand_check(entry: Any) -> list[str]:
+    if isinstance(entry, str):
+        return [entry]
+    if not isinstance(entry, dict) or not str(entry.get("command") or "").strip():
+        return []
+    command = str(entry["command"])
+    services = entry.get("services")
+    if isinstance(services, list) and "{{service}}" in command:
+        # Per-service fan-out: one check per alias, resolved like {{service:<alias>}}.
+        return [command.replace("{{service}}", f"{{{{service:{alias}}}}}") for alias in services]
+    return [command]
+
+
+def plan_check_steps(checks: list[Any]) -> list[list[str]]:
+    """Group a check set into ordered steps; a step with several commands runs them concurrently.
+
+    Plain strings are sequential steps. ``{"parallel": [...]}`` is one concurrent step; consecutive
+    ``{"command": ..., "parallel": true}`` entries merge into one; ``"services": [...]`` fans a
+    ``{{service}}`` command out per alias.
+    """
+    steps: list[list[str]] = []
+    merge_flagged = False
+    for entry in checks:
+        if isinstance(entry, dict) and isinstance(entry.get("parallel"), list):
+            steps.append([cmd for item in entry["parallel"] for cmd in _expand_check(item)])
+            merge_flagged = False
+            continue
+        commands = _expand_check(entry)
+        if not commands:
+            continue
+        flagged = isinstance(entry, dict) and entry.get("parallel") is True
+        if flagged and merge_flagged:
+            steps[-1].extend(commands)
+        elif flagged or len(commands) > 1:
+            steps.append(commands)
+        else:
+            steps.extend([cmd] for cmd in commands)
+        merge_flagged = flagged
+    return [step for step in steps if step]
+
+
+def check_set_concurrency_keys(check_set: str, checks: list[Any], config: BridgeConfig) -> list[str]:
+    """Services a check set touches; jobs sharing any key are serialized by JobQueue."""
+    override = config.concurrency_keys.get(check_set)
+    if override:
+        return sorted(set(override))
+    aliases = check_set_aliases(checks)
+    return sorted(f"service:{alias}" for alias in aliases) or [f"check_set:{check_set}"]
+
+
+def run_check_step(
+    step: list[str],
+    config: BridgeConfig,
+    workdir: Path,
+    *,
+    job_id: str,
+    service_map: dict[str, str] | None = None,
+    engine: DockerEngineClient | None = None,
+    runner: AsyncCommandRunner | None = None,
+    spans: SpanRecorder | None = None,
+) -> list[dict[str, Any]]:
+    """Run one step; results keep the configured order even when commands finish out of order."""
+    step_span = spans.current() if spans is not None else None
+    timeout = config.server_check_timeout_seconds
+
+    def start(cmd: str) -> dict[str, Any] | Future[dict[str, Any]]:
+        # Shell commands go to the loop when there is a runner and come back as a Future; the rest run here.
+        with job_span(spans, "render", parent=step_span, command=cmd):
+            rendered_cmd = render_check_command(cmd, config, workdir, service_map)
+        output = {"max_output_bytes": config.check_output_max_bytes, "spool": config.check_output_spool}
+        if rendered_cmd.startswith(ENGINE_CHECK_PREFIX):
+            with job_span(spans, "check", parent=step_span, command=cmd) as node:
+                res = run_engine_check(rendered_cmd, engine, job_id=job_id, **output)
+                node["returncode"] = res["returncode"]
+            return res
+        server_log("bridge", f"check start cmd={rendered_cmd}")
+        if runner is not None:
+            return runner.submit(
+                rendered_cmd, workdir, timeout, job_id=job_id, spans=spans, parent=step_span, span_command=cmd, **output
+            )
+        with job_span(spans, "check", parent=step_span, command=cmd) as node:
+            res = run_command(rendered_cmd, workdir, timeout=timeout, job_id=job_id, **output)
+            node["returncode"] = res["returncode"]
+        log_check_result(res, timeout)
+        return res
+
+    def finish(cmd: str, started: dict[str, Any] | Future[dict[str, Any]]) -> dict[str, Any]:
+        if isinstance(started, Future):
+            res = started.result()
+            log_check_result(res, timeout)
+        else:
+            res = started
+        if res["command"] != cmd:
+            res["command_template"] = cmd
+        return res
+
+    def run_one(cmd: str) -> dict[str, Any]:
+        return finish(cmd, start(cmd))
+
+    if len(step) == 1:
+        return [run_one(step[0])]
+    if runner is not None:
+        # The loop's semaphore already bounds concurrent commands; a per-step thread pool would only add threads.
+        server_log("bridge", f"check group start size={len(step)} workers=loop:{runner.concurrency}")
+        pending = [start(cmd) for cmd in step]
+        return [finish(cmd, item) for cmd, item in zip(step, pending)]
+    workers = min(config.server_check_parallelism, len(step))
+    server_log("bridge", f"check group start size={len(step)} workers={workers}")
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bridge-check") as pool:
+        return list(pool.map(run_one, step))
+
+
+# argv between the binary and the prompt, newest CLI first; the capability probe picks one per binary.
+CODEX_ARGV_VARIANTS: list[list[str]] = [
+    ["-s", "danger-full-access", "-a", "never", "exec", "--skip-git-repo-check", "--color", "never"],
+    ["-s", "danger-full-access", "-a", "never", "exec", "--color", "never"],
+    ["exec", "--dangerously-bypass-approvals-and-sandbox", "--skip-git-repo-check", "--color", "never"],
+    ["exec", "--dangerously-bypass-approvals-and-sandbox", "--color", "never"],
+    ["-s", "danger-full-access", "-a", "never", "--no-interactive", "-q"],
+    ["-s", "danger-full-access", "-a", "never", "-q"],
+    ["-s", "danger-full-access", "-a", "never"],
+    ["--no-interactive", "-q"],
+    ["-q"],
+    [],
+]
+CODEX_REJECTED_ARG_MARKERS = (
+    "unexpected argument '--no-interactive'",
+    "unknown option '--no-interactive'",
+    "unexpected argument '-q'",
+    "unknown option '-q'",
+    "unrecognized subcommand 'exec'",
+)
+
+
+def _help_has_flag(help_text: str, flag: str) -> bool:
+    return re.search(rf"(?<![\w-]){re.escape(flag)}(?![\w-])", help_text) is not None
+
+
+class CodexCapabilities:
+    """Argv template per codex binary, chosen from `--help` output; persisted and re-probed when the binary changes."""
+
+    def __init__(self, path: Path, variants: list[list[str]]) -> None:
+        self.path = path
+        self.variants = variants
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict[str, Any]] | None = None
+        # Binaries being probed right now; concurrent callers fall back to walking every variant meanwhile.
+        self._probing: set[str] = set()
+
+    def _load(self) -> dict[str, dict[str, Any]]:
+        if self._entries is None:
+            try:
+                raw = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError):
+                raw = {}
+            self._entries = {str(k): v for k, v in raw.items() if isinstance(v, dict)}
+        return self._entries
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(self.path, json.dumps(self._load(), indent=2))
+
+    @staticmethod
+    def _fingerprint(codex_bin: str) -> tuple[str, str]:
+        # npm installs symlink the shim into the package, so the real path changes mtime on upgrade.
+        real = os.path.realpath(shutil.which(codex_bin) or codex_bin)
+        st = os.stat(real)
+        return real, f"{st.st_mtime_ns}:{st.st_size}"
+
+    def _probe(self, codex_bin: str, cwd: Path) -> dict[str, Any]:
+        def run(args: list[str]) -> str:
+            try:
+                res = subprocess.run(
+                    [codex_bin, *args],
+                    cwd=str(cwd),
+                    capture_output=True,
+                    text=True,
+                    timeout=30,
+                    encoding="utf-8",
+                    errors="replace",
+                )
+            except (OSError, subprocess.TimeoutExpired):
+                return ""
+            return (res.stdout or "") + (res.stderr or "") if res.returncode == 0 else ""
+
+        version = next((line.strip() for line in run(["--version"]).splitlines() if line.strip()), "")
+        top_help = run(["--help"])
+        has_exec = re.search(r"^\s+exec\b", top_help, re.MULTILINE) is not None
+        exec_help = run(["exec", "--help"]) if has_exec else ""
+        argv: list[str] | None = None
+        for variant in self.variants if top_help else []:
+            if "exec" in variant:
+                split = variant.index("exec")
+                before, after = variant[:split], variant[split + 1 :]
+                if not has_exec:
+                    continue
+            else:
+                before, after = variant, []
+            if all(_help_has_flag(top_help, f) for f in before if f.startswith("-")) and all(
+                _help_has_flag(exec_help, f) or _help_has_flag(top_help, f) for f in after if f.startswith("-")
+            ):
+                argv = variant
+                break
+        return {"version": version, "argv": argv, "probed_at": int(time.time())}
+
+    def template(self, codex_bin: str, cwd: Path) -> list[str] | None:
+        """Probed argv for this binary, or None when the probe could not decide (callers walk all variants)."""
+        try:
+            real, fingerprint = self._fingerprint(codex_bin)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._load().get(real)
+            stale = entry is None or entry.get("fingerprint") != fingerprint
+            if stale and real in self._probing:
+                return None
+            if stale:
+                self._probing.add(real)
+        if stale:
+            # The probe spawns codex up to three times; it runs unlocked so other reviews are not held up.
+            try:
+                entry = {**self._probe(codex_bin, cwd), "fingerprint": fingerprint}
+                with self._lock:
+                    self._load()[real] = entry
+                    self._save()
+            finally:
+                with self._lock:
+                    self._probing.discard(real)
+            server_log("codex", f"capability probe version={entry['version'] or '-'} argv={entry['argv']}")
+        argv = (entry or {}).get("argv")
+        return list(argv) if isinstance(argv, list) else None
+
+    def forget(self, codex_bin: str) -> None:
+        try:
+            real, _ = self._fingerprint(codex_bin)
+        except OSError:
+            return
+        with self._lock:
+            if self._load().pop(real, None) is not None:
+                self._save()
+
+
+CODEX_CAPS = CodexCapabilities(CODEX_CAPS_PATH, CODEX_ARGV_VARIANTS)
+
+
+# Codex stream filters, compiled once; each reader line is tested with a single match() per filter.
+CODEX_JSON_FRAGMENT_RE = re.compile(r'[{}\[\]"]')
+CODEX_BANNER_META_RE = re.compile(
+    r"(?:--------|tokens used|\d+)\Z"
+    r"|(?:workdir|model|provider|approval|sandbox|reasoning effort|reasoning summaries|session id):"
+)
+CODEX_STDOUT_NOISE_RE = re.compile(r"/bin/bash -lc|/usr/bin/|total ")
+CODEX_STDERR_NOISE_RE = re.compile(
+    r"(?:exec|codex|thinking)\Z|/bin/bash -lc|succeeded in |exited |total |drwx|-rw"
+)
+CODEX_HEARTBEAT_SECONDS = 5
+
+
+class CodexStreamFilter:
+    """Per-invocation log filter for codex stdout/stderr lines; tracks the suppression notices."""
+
+    def __init__(self, mode: str) -> None:
+        mode = (mode or "normal").strip().lower()
+        self.mode = mode if mode in {"quiet", "normal", "verbose"} else "normal"
+        self.json_notice = {"stdout": False, "stderr": False}
+        self.banner_notice = False
+        self.last_line = ""
+
+    def feed(self, kind: str, line: str) -> str | None:
+        """Log text for one stripped line, a suppression notice, or None when the line is dropped."""
+        if CODEX_JSON_FRAGMENT_RE.match(line):
+            if self.json_notice[kind]:
+                return None
+            self.json_notice[kind] = True
+            # Avoid dumping full JSON payloads to server logs.
+            if kind == "stdout":
+                return "stdout (json stream suppressed; parsed summary follows)"
+            return "stderr (json stream suppressed)"
+        if kind == "stdout":
+            if self.mode == "quiet":
+                return None
+            if self.mode == "normal":
+                # Suppress verbose shell transcript/output spam in normal mode.
+                if CODEX_STDOUT_NOISE_RE.match(line):
+                    return None
+            else:
+                self.json_notice["stdout"] = False
+            self.last_line = line[:240]
+            return f"stdout {line[:240]}"
+        self.json_notice["stderr"] = False
+        if CODEX_BANNER_META_RE.match(line):
+            if self.banner_notice:
+                return None
+            self.banner_notice = True
+            return "stderr (codex banner/meta suppressed)"
+        self.banner_notice = False
+        if self.mode == "quiet":
+            return None
+        # Keep progress narration, hide shell transcript chatter.
+        if self.mode == "normal" and CODEX_STDERR_NOISE_RE.match(line):
+            return None
+        self.last_line = line[:240]
+        return f"stderr {line[:240]}"
+
+
+def supervise_codex_process(
+    proc: subprocess.Popen[str],
+    *,
+    timeout: int,
+    stream_mode: str,
+    progress: Callable[[dict[str, Any]], None] | None = None,
+) -> tuple[int, str, str]:
+    """Wait for codex exit or timeout (no polling) while reader threads filter and count its output."""
+    chunks: dict[str, list[str]] = {"stdout": [], "stderr": []}
+    counts = {"stdout": 0, "stderr": 0}
+    io_lock = threading.Lock()
+    stream_filter = CodexStreamFilter(stream_mode)
+
+    def _reader(stream: Any, kind: str) -> None:
+        if stream is None:
+            return
+        for chunk in iter(stream.readline, ""):
+            line = chunk.strip()
+            with io_lock:
+                chunks[kind].append(chunk)
+                counts[kind] += len(chunk)
+                if not line:
+                    continue
+                message = stream_filter.feed(kind, line)
+            if message is not None:
+                server_log("codex", message)
+
+    readers = [
+        threading.Thread(target=_reader, args=(proc.stdout, "stdout"), daemon=True),
+        threading.Thread(target=_reader, args=(proc.stderr, "stderr"), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+    started = time.monotonic()
+    deadline = started + timeout
+    rc: int | None = None
+    reported_line = ""
+    while rc is None:
+        now = time.monotonic()
+        if now >= deadline:
+            kill_process_group(proc)
+            break
+        try:
+            rc = proc.wait(timeout=min(CODEX_HEARTBEAT_SECONDS, deadline - now))
+        except subprocess.TimeoutExpired:
+            if time.monotonic() >= deadline:
+                continue
+            elapsed = int(time.monotonic() - started)
+            with io_lock:
+                out_len, err_len, line = counts["stdout"], counts["stderr"], stream_filter.last_line
+            server_log("codex", f"invoke waiting elapsed={elapsed}s stdout_chars={out_len} stderr_chars={err_len}")
+            # Timeline events only for new narration; a heartbeat per tick would flood /events and SSE readers.
+            if progress is not None and line != reported_line:
+                reported_line = line
+                progress(
+                    {
+                        "status": "running",
+                        "elapsed": elapsed,
+                        "stdout_chars": out_len,
+                        "stderr_chars": err_len,
+                        "message": line,
+                    }
+                )
+    for reader in readers:
+        reader.join(timeout=2)
+    with io_lock:
+        stdout = "".join(chunks["stdout"])
+        stderr = "".join(chunks["stderr"])
+    rc = proc.poll()
+    if rc is None:
+        rc = 124
+    if rc == 124 and f"Timeout after {timeout}s" not in stderr:
+        stderr = ((stderr or "") + f"\nTimeout after {timeout}s").strip()
+    return rc, stdout, stderr
+
+
 def run_codex_prompt(
     codex_bin: str,
     prompt: str,
@@ -437,166 +3454,58 @@ def run_codex_prompt(
     timeout: int,
     job_id: str = "-",
     stream_mode: str = "normal",
+    progress: Callable[[dict[str, Any]], None] | None = None,
+    spans: SpanRecorder | None = None,
 ) -> subprocess.CompletedProcess[str]:
-    """Run codex prompt with CLI-compat fallback across versions."""
-    variants = [
-        [codex_bin, "-s", "danger-full-access", "-a", "never", "exec", "--skip-git-repo-check", "--color", "never", prompt],
-        [codex_bin, "-s", "danger-full-access", "-a", "never", "exec", "--color", "never", prompt],
-        [codex_bin, "exec", "--dangerously-bypass-approvals-and-sandbox", "--skip-git-repo-check", "--color", "never", prompt],
-        [codex_bin, "-s", "danger-full-access", "-a", "never", "--no-interactive", "-q", prompt],
-        [codex_bin, "-s", "danger-full-access", "-a", "never", "-q", prompt],
-        [codex_bin, "-s", "danger-full-access", "-a", "never", prompt],
-        [codex_bin, "--no-interactive", "-q", prompt],
-        [codex_bin, "-q", prompt],
-        [codex_bin, prompt],
-    ]
+    """Run codex prompt with the probed argv template; CLI-compat variants are walked only if it is rejected."""
+    with job_span(spans, "codex.template"):
+        template = CODEX_CAPS.template(codex_bin, cwd)
+    variants = CODEX_ARGV_VARIANTS
+    if template is not None:
+        variants = [template] + [v for v in CODEX_ARGV_VARIANTS if v != template]
     last_result: subprocess.CompletedProcess[str] | None = None
-    for args in variants:
-        preview = " ".join(args[:8])
-        server_log("codex", f"invoke variant={preview} ...")
-        proc = subprocess.Popen(
-            args,
-            cwd=str(cwd),
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-        )
-        stdout_chunks: list[str] = []
-        stderr_chunks: list[str] = []
-        io_lock = threading.Lock()
-
-        stream_state: dict[str, dict[str, bool]] = {
-            "stdout": {"json_notice": False},
-            "stderr": {"json_notice": False, "banner_notice": False},
-        }
-
-        mode = (stream_mode or "normal").strip().lower()
-        if mode not in {"quiet", "normal", "verbose"}:
-            mode = "normal"
-
-        def _reader(stream: Any, kind: str) -> None:
-            if stream is None:
-                return
-            while True:
-                chunk = stream.readline()
-                if chunk == "":
-                    break
-                with io_lock:
-                    if kind == "stdout":
-                        stdout_chunks.append(chunk)
-                    else:
-                        stderr_chunks.append(chunk)
-                line = chunk.strip()
-                if not line:
-                    continue
-                is_json_fragment = (
-                    line.startswith("{")
-                    or line.startswith("}")
-                    or line.startswith("[")
-                    or line.startswith("]")
-                    or line.startswith('"')
-                )
-                is_banner_meta = line in {"--------", "tokens used"} or line.isdigit() or any(
-                    line.startswith(prefix)
-                    for prefix in (
-                        "workdir:",
-                        "model:",
-                        "provider:",
-                        "approval:",
-                        "sandbox:",
-                        "reasoning effort:",
-                        "reasoning summaries:",
-                        "session id:",
-                    )
-                )
-                if kind == "stdout":
-                    # Avoid dumping full JSON payloads to server logs.
-                    if is_json_fragment:
-                        if not stream_state["stdout"]["json_notice"]:
-                            server_log("codex", "stdout (json stream suppressed; parsed summary follows)")
-                            stream_state["stdout"]["json_notice"] = True
-                        continue
-                    if mode == "quiet":
-                        continue
-                    if mode == "normal":
-                        # Suppress verbose shell transcript/output spam in normal mode.
-                        if line.startswith("/bin/bash -lc") or line.startswith("/usr/bin/") or line.startswith("total "):
-                            continue
-                    else:
-                        stream_state["stdout"]["json_notice"] = False
-                    server_log("codex", f"stdout {line[:240]}")
-                else:
-                    if is_json_fragment:
-                        if not stream_state["stderr"]["json_notice"]:
-                            server_log("codex", "stderr (json stream suppressed)")
-                            stream_state["stderr"]["json_notice"] = True
-                        continue
-                    stream_state["stderr"]["json_notice"] = False
-                    if is_banner_meta:
-                        if not stream_state["stderr"]["banner_notice"]:
-                            server_log("codex", "stderr (codex banner/meta suppressed)")
-                            stream_state["stderr"]["banner_notice"] = True
-                        continue
-                    stream_state["stderr"]["banner_notice"] = False
-                    if mode == "quiet":
-                        continue
-                    if mode == "normal":
-                        # Keep progress narration, hide shell transcript chatter.
-                        if line in {"exec", "codex", "thinking"}:
-                            continue
-                        if line.startswith("/bin/bash -lc"):
-                            continue
-                        if line.startswith("succeeded in ") or line.startswith("exited "):
-                            continue
-                        if line.startswith("total ") or line.startswith("drwx") or line.startswith("-rw"):
-                            continue
-                    server_log("codex", f"stderr {line[:240]}")
-
-        t_out = threading.Thread(target=_reader, args=(proc.stdout, "stdout"), daemon=True)
-        t_err = threading.Thread(target=_reader, args=(proc.stderr, "stderr"), daemon=True)
-        t_out.start()
-        t_err.start()
-        started = time.time()
-        heartbeat_s = 5
-        while True:
-            rc = proc.poll()
-            elapsed = int(time.time() - started)
-            if rc is not None:
-                break
-            if elapsed > 0 and elapsed % heartbeat_s == 0:
-                with io_lock:
-                    out_len = sum(len(x) for x in stdout_chunks)
-                    err_len = sum(len(x) for x in stderr_chunks)
-                server_log("codex", f"invoke waiting elapsed={elapsed}s stdout_chars={out_len} stderr_chars={err_len}")
-            if time.time() - started > timeout:
-                proc.kill()
-                break
-            time.sleep(1)
-        t_out.join(timeout=2)
-        t_err.join(timeout=2)
-        with io_lock:
-            stdout = "".join(stdout_chunks)
-            stderr = "".join(stderr_chunks)
-        rc = proc.poll()
-        if rc is None:
-            rc = 124
-        if rc == 124 and f"Timeout after {timeout}s" not in stderr:
-            stderr = ((stderr or "") + f"\nTimeout after {timeout}s").strip()
+    for argv in variants:
+        args = [codex_bin, *argv, prompt]
+        preview = " ".join(args[:8])
+        server_log("codex", f"invoke variant={preview} ...")
+        with job_span(spans, "codex.invoke", variant=" ".join(argv)) as node:
+            proc = subprocess.Popen(
+                args,
+                cwd=str(cwd),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                start_new_session=os.name != "nt",
+            )
+            JOB_PROCESSES.register(job_id, proc)
+            if progress is not None:
+                progress({"status": "started", "message": preview})
+            try:
+                rc, stdout, stderr = supervise_codex_process(
+                    proc, timeout=timeout, stream_mode=stream_mode, progress=progress
+                )
+            finally:
+                JOB_PROCESSES.unregister(job_id, proc)
+            node["returncode"] = rc
         result = subprocess.CompletedProcess(args=args, returncode=rc, stdout=stdout, stderr=stderr)
         last_result = result
         server_log("codex", f"invoke result rc={result.returncode}")
+        if progress is not None:
+            progress(
+                {
+                    "status": "finished",
+                    "returncode": rc,
+                    "stdout_chars": len(stdout),
+                    "stderr_chars": len(stderr),
+                }
+            )
         stderr_l = (result.stderr or "").lower()
-        if result.returncode == 0:
+        if result.returncode == 0 or JOB_PROCESSES.is_cancelled(job_id):
             return result
-        if "unexpected argument '--no-interactive'" in stderr_l:
-            continue
-        if "unknown option '--no-interactive'" in stderr_l:
-            continue
-        if "unexpected argument '-q'" in stderr_l:
-            continue
-        if "unknown option '-q'" in stderr_l:
-            continue
-        if "unrecognized subcommand 'exec'" in stderr_l:
+        if any(marker in stderr_l for marker in CODEX_REJECTED_ARG_MARKERS):
+            if argv is variants[0] and template is not None:
+                # The persisted template went stale without the binary changing; probe again next time.
+                CODEX_CAPS.forget(codex_bin)
             continue
         # For non-flag errors (real codex/runtime errors), stop and return.
         return result
@@ -604,8 +3513,147 @@ def run_codex_prompt(
     return last_result
 
 
+def observe_codex_call(kind: str, started: float, returncode: int | str) -> None:
+    METRICS.observe("bridge_codex_duration_seconds", time.monotonic() - started, {"kind": kind})
+    METRICS.inc("bridge_codex_invocations_total", {"kind": kind, "returncode": returncode})
+
+
+_POLICY_CACHE: dict[str, tuple[int, str, str]] = {}
+_POLICY_CACHE_LOCK = threading.Lock()
+
+
+def load_server_codex_policy(config: BridgeConfig) -> tuple[str, str]:
+    """Policy text and its fingerprint; the file is re-read only when its mtime changes."""
+    policy_path = config.server_codex_policy_path
+    try:
+        mtime_ns = policy_path.stat().st_mtime_ns
+    except OSError:
+        return "", ""
+    with _POLICY_CACHE_LOCK:
+        cached = _POLICY_CACHE.get(str(policy_path))
+        if cached and cached[0] == mtime_ns:
+            return cached[1], cached[2]
+    try:
+        policy_text = policy_path.read_text(encoding="utf-8").strip()
+    except (OSError, UnicodeDecodeError):
+        return "", ""
+    policy_fp = hashlib.sha256(policy_text.encode("utf-8")).hexdigest()[:12] if policy_text else ""
+    with _POLICY_CACHE_LOCK:
+        _POLICY_CACHE[str(policy_path)] = (mtime_ns, policy_text, policy_fp)
+    return policy_text, policy_fp
+
+
+RELATIVE_TIME_RE = re.compile(
+    r"\b(?:(?:about |less than )?(?:\d+|an?) (?:second|minute|hour|day|week|month|year)s? ago"
+    r"|up (?:about |less than )?(?:\d+|an?) (?:second|minute|hour|day|week|month|year)s?)\b",
+    re.IGNORECASE,
+)
+# Only tokens that change between runs of the same state: timestamps and generated ids. Counts, replica
+# ratios, HTTP codes and ports stay in the digest so a different runtime state never reuses a review.
+VOLATILE_TOKEN_RE = re.compile(
+    r"\b\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:[.,]\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?"  # ISO 8601
+    r"|\b\d{2}:\d{2}:\d{2}(?:[.,]\d+)?\b"  # time of day in log prefixes and Date headers
+    r"|\b\d{10}(?:\d{3})?(?:\.\d+)?\b"  # epoch seconds / milliseconds
+    r"|\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b"  # uuid
+    r"|\b(?=[0-9a-f]*[a-f])[0-9a-f]{8,}\b",  # container/task/commit ids
+    re.IGNORECASE,
+)
+
+
+def check_results_digest(check_results: list[dict[str, Any]]) -> str:
+    """Digest of check outcomes with ids and timestamps masked, so a re-run of the same state matches."""
+
+    def normalize(text: Any) -> str:
+        return VOLATILE_TOKEN_RE.sub("#", RELATIVE_TIME_RE.sub("<ago>", str(text or "")))
+
+    normalized = [
+        {
+            "command": str(item.get("command_template") or item.get("command") or ""),
+            "returncode": item.get("returncode"),
+            "timed_out": bool(item.get("timed_out")),
+            "stdout": normalize(item.get("stdout")),
+            "stderr": normalize(item.get("stderr")),
+        }
+        for item in check_results
+    ]
+    return hashlib.sha256(compact_json(normalized).encode("utf-8")).hexdigest()
+
+
+def review_cache_key(commit: str, checks_digest: str, policy_fp: str, mode: str) -> str:
+    return hashlib.sha256(compact_json([commit, checks_digest, policy_fp, mode]).encode("utf-8")).hexdigest()[:32]
+
+
+class ReviewCache:
+    """Persisted codex review verdicts keyed by (commit, check digest, policy_fp, mode), with TTL and LRU bound."""
+
+    def __init__(self, path: Path, *, ttl_seconds: float, max_entries: int = 256) -> None:
+        self.path = path
+        self.ttl_seconds = max(0.0, ttl_seconds)
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.forced = 0
+        try:
+            raw = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            raw = {}
+        for key, entry in dict(raw.get("entries") or {}).items():
+            if isinstance(entry, dict) and isinstance(entry.get("review"), dict):
+                self._entries[str(key)] = entry
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(self.path, compact_json({"entries": self._entries}))
+
+    def get(self, key: str) -> tuple[dict[str, Any], float] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - float(entry.get("stored_at") or 0) <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(entry["review"]), float(entry["stored_at"])
+            if entry is not None:
+                del self._entries[key]
+                self._save()
+            self.misses += 1
+            return None
+
+    def put(self, key: str, review: dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = {"review": review, "stored_at": time.time()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._save()
+
+    def record_forced(self) -> None:
+        with self._lock:
+            self.forced += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "forced": self.forced,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
 def run_server_codex_review(
-    trigger: dict[str, Any], config: BridgeConfig, workdir: Path, *, mode: str
+    trigger: dict[str, Any],
+    config: BridgeConfig,
+    workdir: Path,
+    *,
+    mode: str,
+    check_results: list[dict[str, Any]] | None = None,
+    cache: ReviewCache | None = None,
+    progress: Callable[[dict[str, Any]], None] | None = None,
+    spans: SpanRecorder | None = None,
 ) -> dict[str, Any] | None:
     codex_cfg = config.server_codex
     if not codex_cfg.get("enabled", False):
@@ -634,17 +3682,20 @@ def run_server_codex_review(
         "Shuning uchun bridge result faylida status=running/stage=starting ko'rinsa bu normal; buni xato deb baholama. "
         "Asosiy signal sifatida deterministic checks natijalari va runtime event/log xulosalarini bahola."
     )
-    policy_text = ""
-    policy_fp = ""
-    try:
-        policy_path = config.server_codex_policy_path
-        if policy_path.exists():
-            policy_text = policy_path.read_text(encoding="utf-8").strip()
-            if policy_text:
-                policy_fp = hashlib.sha256(policy_text.encode("utf-8")).hexdigest()[:12]
-    except Exception:
-        policy_text = ""
-        policy_fp = ""
+    policy_text, policy_fp = load_server_codex_policy(config)
+    commit = str(trigger.get("commit") or "")
+    cache_key = ""
+    if cache is not None and check_results is not None and commit:
+        cache_key = review_cache_key(commit, check_results_digest(check_results), policy_fp, mode)
+        if trigger.get("force_review"):
+            cache.record_forced()
+            server_log("codex", f"review cache bypass force_review key={cache_key[:12]}")
+        else:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                review, stored_at = cached
+                server_log("codex", f"review cache hit key={cache_key[:12]} age={int(time.time() - stored_at)}s")
+                return {**review, "cached": True, "cached_at": int(stored_at), "cache_key": cache_key[:12]}
     policy_block = ""
     if policy_text:
         policy_block = f"\n\nServer Codex review policy (source of truth for this review):\n{policy_text}\n"
@@ -672,6 +3723,7 @@ Qilish kerak:
 }}
 """.strip()
 
+    codex_started = time.monotonic()
     try:
         policy_meta = f" policy_fp={policy_fp}" if policy_fp else ""
         server_log("codex", f"review start mode={mode}{policy_meta}")
@@ -682,8 +3734,12 @@ Qilish kerak:
             timeout=timeout,
             job_id=job_id,
             stream_mode=stream_mode,
+            progress=progress,
+            spans=spans,
         )
+        observe_codex_call("review", codex_started, result.returncode)
     except Exception as exc:  # pragma: no cover - runtime safeguard
+        observe_codex_call("review", codex_started, "exception")
         return {
             "status": "error",
             "message": f"codex invocation failed: {exc}",
@@ -715,6 +3771,8 @@ Qilish kerak:
     if policy_fp:
         parsed["policy_fp"] = policy_fp
     server_log("codex", f"review parsed status={parsed.get('status', 'unknown')}")
+    if cache_key and cache is not None and result.returncode == 0:
+        cache.put(cache_key, parsed)
     return parsed
 
 
@@ -734,10 +3792,13 @@ def run_server_codex_hello(
         "Qisqa 1 jumla javob yozing (o'zbekcha), mazmuni: eshitib turibman va kutaman. "
         "Faqat javob matnini yozing."
     )
+    codex_started = time.monotonic()
     try:
         result = run_codex_prompt(codex_bin, prompt, cwd=workdir, timeout=timeout, stream_mode=stream_mode)
     except Exception as exc:
+        observe_codex_call("hello", codex_started, "exception")
         return "", "server_codex_error", {"message": f"codex invoke failed: {exc}"}
+    observe_codex_call("hello", codex_started, result.returncode)
 
     reply = (result.stdout or "").strip()
     if result.returncode != 0 or not reply:
@@ -755,12 +3816,134 @@ def run_server_codex_hello(
     return first_line, "server_codex", None
 
 
+class CodexHelloCache:
+    """Last codex hello greeting and availability; probes run off the request path, one at a time, only on demand."""
+
+    def __init__(self, config: BridgeConfig) -> None:
+        self.config = config
+        self.enabled = bool(config.server_codex.get("enabled", False))
+        self.ttl_seconds = max(30.0, float(config.server_codex.get("hello_probe_interval_seconds", 600)))
+        self._cond = threading.Condition()
+        self._probing = False
+        self.reply = ""
+        self.replied_at = 0.0
+        self.probed_at = 0.0
+        self.error: dict[str, Any] | None = None
+
+    def _probe(self) -> None:
+        try:
+            reply, _source, error = run_server_codex_hello(self.config, self.config.server_workdir, side="bridge")
+        except Exception as exc:  # pragma: no cover - runtime safeguard
+            reply, error = "", {"message": f"codex hello probe failed: {exc}"}
+        with self._cond:
+            self.probed_at = time.time()
+            self.error = error
+            if reply:
+                self.reply = reply
+                self.replied_at = self.probed_at
+            self._probing = False
+            self._cond.notify_all()
+        server_log("codex", f"hello probe available={error is None} reply={reply or '-'}")
+
+    def probe(self, *, wait: bool) -> None:
+        """Start a probe unless one is in flight; with wait=True block until the current probe finishes."""
+        if not self.enabled:
+            return
+        with self._cond:
+            if not self._probing:
+                self._probing = True
+                threading.Thread(target=self._probe, name="codex-hello-probe", daemon=True).start()
+            while wait and self._probing:
+                self._cond.wait()
+
+    def refresh(self) -> None:
+        """Start a background probe when the last one is older than the TTL; the caller does not wait for it."""
+        with self._cond:
+            stale = time.time() - self.probed_at >= self.ttl_seconds
+        if stale:
+            self.probe(wait=False)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._cond:
+            if not self.enabled:
+                source = "bridge_server_disabled"
+            elif self.reply:
+                source = "server_codex_cached"
+            elif self.error is not None:
+                source = "server_codex_error"
+            else:
+                source = "pending"
+            return {
+                "reply": self.reply or None,
+                "reply_source": source,
+                "reply_age_seconds": int(time.time() - self.replied_at) if self.reply else None,
+                "codex": {
+                    "enabled": self.enabled,
+                    "available": None if not self.probed_at else self.error is None,
+                    "probing": self._probing,
+                    "probed_at": int(self.probed_at) or None,
+                    "error": self.error if self.enabled else {"message": "server_codex.enabled=false"},
+                },
+            }
+
+
+def observe_check_result(check_set: str, res: dict[str, Any]) -> None:
+    # Templates keep the command label stable across resolved service names.
+    command = str(res.get("command_template") or res.get("command") or "")[:120]
+    if res.get("timed_out"):
+        outcome = "timeout"
+    elif res.get("cancelled"):
+        outcome = "cancelled"
+    else:
+        outcome = "ok" if res.get("returncode") == 0 else "failed"
+    METRICS.observe(
+        "bridge_check_duration_seconds",
+        float(res.get("duration_seconds") or 0.0),
+        {"check_set": check_set, "command": command},
+    )
+    METRICS.inc("bridge_checks_total", {"check_set": check_set, "outcome": outcome})
+
+
+def codex_progress_reporter(
+    state: BridgeServerState, job_id: str, commit: str
+) -> Callable[[dict[str, Any]], None]:
+    """Callback that records codex supervisor progress as `codex_progress` bridge events of the job."""
+
+    def report(progress: dict[str, Any]) -> None:
+        now = int(time.time())
+        state.events.append(
+            job_id,
+            {
+                "job_id": job_id,
+                "event_type": "codex_progress",
+                "message": str(progress.get("message") or ""),
+                "commit": commit,
+                "task": "",
+                "workflow": "server_codex",
+                "status": str(progress.get("status") or ""),
+                "conclusion": "",
+                "timestamp": now,
+                "received_at": now,
+                "progress": {k: v for k, v in progress.items() if k not in {"status", "message"}},
+            },
+        )
+
+    return report
+
+
 def process_trigger(trigger: dict[str, Any], state: BridgeServerState) -> None:
     config = state.config
     workdir = config.server_workdir
     mode = config.server_mode
     job_id = str(trigger.get("job_id") or "")
     task = str(trigger.get("task") or "code update")
+    job_started = time.monotonic()
+    timings_policy = config.timings
+    spans = SpanRecorder("job") if timings_policy.get("enabled", True) else None
+    if spans is not None and trigger.get("enqueued_at"):
+        # Queue wait is only known from wall-clock timestamps; it ends where the job's monotonic origin starts.
+        wait_ms = max(0.0, (time.time() - float(trigger["enqueued_at"])) * 1000)
+        spans.add("queue_wait", -wait_ms, wait_ms)
 
     state.jobs.write(
         job_id,
@@ -776,6 +3959,7 @@ def process_trigger(trigger: dict[str, Any], state: BridgeServerState) -> None:
             "job_id": job_id,
             "stage": "starting",
             "started_at": int(time.time()),
+            **({"attempt": trigger["attempt"]} if int(trigger.get("attempt") or 1) > 1 else {}),
             "session_context_meta": trigger.get("session_context", {}),
         },
     )
@@ -784,28 +3968,75 @@ def process_trigger(trigger: dict[str, Any], state: BridgeServerState) -> None:
     git_steps: list[dict[str, Any]] = []
 
     check_set_name, checks = detect_check_set(task, config.server_checks, config.task_check_mapping)
+    # Every {{service:...}} alias of the check set is resolved once, from the shared discovery cache.
+    with job_span(spans, "resolve_services"):
+        service_map = state.services.resolve_all(check_set_aliases(checks), config, workdir)
+    if service_map:
+        server_log("bridge", "services " + " ".join(f"{alias}={name}" for alias, name in service_map.items()))
     check_results: list[dict[str, Any]] = []
     check_errors: list[str] = []
-    for cmd in checks:
-        rendered_cmd = render_check_command(cmd, config, workdir)
-        res = run_command_logged(
-            rendered_cmd,
-            workdir,
-            timeout=config.server_check_timeout_seconds,
-            job_id=job_id,
+    checks_started = time.monotonic()
+    with job_span(spans, "checks", check_set=check_set_name):
+        for step_no, step in enumerate(plan_check_steps(checks)):
+            with job_span(spans, "step", step=step_no, commands=len(step)):
+                step_results = run_check_step(
+                    step,
+                    config,
+                    workdir,
+                    job_id=job_id,
+                    service_map=service_map,
+                    engine=state.engine,
+                    runner=state.command_runner,
+                    spans=spans,
+                )
+            check_results.extend(step_results)
+            for res in step_results:
+                observe_check_result(check_set_name, res)
+                if res["returncode"] != 0:
+                    check_errors.append(f"{res['command']} failed")
+                    if res["stderr"].strip():
+                        check_errors.append(res["stderr"].strip())
+            # Stop on the first failing step; commands of a concurrent step have all finished by now.
+            if check_errors:
+                if any(res["returncode"] != 0 and "command_template" in res for res in step_results):
+                    state.services.invalidate("service_check_failed")
+                break
+    METRICS.observe(
+        "bridge_check_set_duration_seconds", time.monotonic() - checks_started, {"check_set": check_set_name}
+    )
+
+    warnings: list[str] = []
+    with job_span(spans, "analyze"):
+        findings = state.analyzer.analyze(check_results, spans)
+    for finding in findings:
+        server_log(
+            "bridge",
+            f"finding rule={finding['rule']} severity={finding['severity']} check={finding['check']} count={finding['count']}",
         )
-        if rendered_cmd != cmd:
-            res["command_template"] = cmd
-        check_results.append(res)
-        if res["returncode"] != 0:
-            check_errors.append(f"{rendered_cmd} failed")
-            if res["stderr"].strip():
-                check_errors.append(res["stderr"].strip())
-            break
+        if finding["severity"] == "error":
+            check_errors.append(finding["message"])
+        elif finding["severity"] == "warning":
+            warnings.append(finding["message"])
 
     tests_passed = len(check_errors) == 0
 
-    codex_review = run_server_codex_review(trigger, config, workdir, mode=mode)
+    cancelled = JOB_PROCESSES.is_cancelled(job_id)
+    codex_review = None
+    if not cancelled:
+        with job_span(spans, "codex.review") as review_span:
+            codex_review = run_server_codex_review(
+                trigger,
+                config,
+                workdir,
+                mode=mode,
+                check_results=check_results,
+                cache=state.review_cache,
+                progress=codex_progress_reporter(state, job_id, str(trigger.get("commit") or "")),
+                spans=spans,
+            )
+            if codex_review:
+                review_span["cached"] = bool(codex_review.get("cached"))
+    cancelled = cancelled or JOB_PROCESSES.is_cancelled(job_id)
     if codex_review:
         review_status = str(codex_review.get("status", "unknown"))
         review_next = str(codex_review.get("next_action", "unknown"))
@@ -816,9 +4047,6 @@ def process_trigger(trigger: dict[str, Any], state: BridgeServerState) -> None:
             f"review status={review_status} next_action={review_next} errors={review_error_count}",
         )
 
-    warnings: list[str] = []
-    warnings.extend(_analyze_docker_service_ps_checks(check_results))
-    warnings.extend(_analyze_docker_service_logs_checks(check_results))
     suggestions: list[str] = []
     if codex_review:
         warnings.extend([str(x) for x in codex_review.get("warnings", [])])
@@ -835,6 +4063,11 @@ def process_trigger(trigger: dict[str, Any], state: BridgeServerState) -> None:
                 check_errors.extend(review_errors)
                 tests_passed = False
 
+    stored_checks = check_results
+    if state.artifacts is not None:
+        with job_span(spans, "artifacts"):
+            stored_checks = store_check_artifacts(check_results, state.artifacts, config.artifacts)
+
     result_payload = {
         "status": "success" if tests_passed else "failure",
         "tests_passed": tests_passed,
@@ -848,13 +4081,27 @@ def process_trigger(trigger: dict[str, Any], state: BridgeServerState) -> None:
         "stage": "completed",
         "server_mode": mode,
         "git": git_steps,
-        "checks": check_results,
+        "checks": stored_checks,
+        "findings": findings,
         "check_set": check_set_name,
+        "service_map": service_map,
         "codex_review": codex_review,
         "finished_at": int(time.time()),
         "session_context_meta": trigger.get("session_context", {}),
+        **({"attempt": trigger["attempt"]} if int(trigger.get("attempt") or 1) > 1 else {}),
+        **({"timings": spans.finish()} if spans is not None else {}),
     }
+    if cancelled:
+        result_payload.update({"status": "cancelled", "stage": "cancelled", "tests_passed": False, "next_action": "fix_required"})
     state.jobs.write(job_id, result_payload)
+    if spans is not None and timings_policy.get("export", True):
+        export_job_timings(job_id, result_payload)
+    METRICS.inc("bridge_jobs_finished_total", {"status": result_payload["status"]})
+    METRICS.observe(
+        "bridge_job_duration_seconds",
+        time.monotonic() - job_started,
+        {"check_set": check_set_name, "status": result_payload["status"]},
+    )
     server_log(
         "bridge",
         f"job done status={result_payload['status']} next_action={result_payload['next_action']}",
@@ -864,11 +4111,17 @@ def process_trigger(trigger: dict[str, Any], state: BridgeServerState) -> None:
 def worker_loop(state: BridgeServerState) -> None:
     while True:
         trigger = state.q.get()
+        server_log(
+            "bridge",
+            f"job picked worker={threading.current_thread().name} job_id={trigger.get('job_id')} "
+            f"keys={','.join(trigger.get('concurrency_keys') or []) or '-'}",
+        )
         try:
             process_trigger(trigger, state)
         except Exception as exc:  # pragma: no cover - runtime safeguard
             job_id = str(trigger.get("job_id") or "unknown")
             server_log("bridge", f"job exception error={exc}")
+            METRICS.inc("bridge_jobs_finished_total", {"status": "error"})
             state.jobs.write(
                 job_id,
                 {
@@ -884,11 +4137,588 @@ def worker_loop(state: BridgeServerState) -> None:
                 },
             )
         finally:
-            state.q.task_done()
+            job_id = str(trigger.get("job_id") or "")
+            aliases = state.release(job_id)
+            if aliases:
+                state.mirror_result(job_id, aliases)
+
+
+def _state_usage_bytes(paths: list[Path]) -> int:
+    total = 0
+    for path in paths:
+        try:
+            total += path.stat().st_size
+        except OSError:
+            continue
+    return total
+
+
+def _archive_job(
+    state: BridgeServerState,
+    job_id: str,
+    result: dict[str, Any] | None,
+    result_mtime_ns: int | None,
+    updated_at: float,
+) -> None:
+    events_raw, events_size = state.events.snapshot(job_id)
+    day = time.strftime("%Y-%m-%d", time.localtime(updated_at))
+    state.archive.add(job_id, day, result, events_raw)
+    # Live files are only removed if untouched since the snapshot; otherwise the next pass re-archives them.
+    if result_mtime_ns is not None:
+        state.jobs.discard(job_id, result_mtime_ns)
+    state.events.discard(job_id, events_size)
+
+
+def prune_check_spool(before_ts: float) -> int:
+    """Drop per-job spool directories of full check output last written before `before_ts`."""
+    if not SPOOL_DIR.is_dir():
+        return 0
+    pruned = 0
+    for path in SPOOL_DIR.iterdir():
+        try:
+            if path.stat().st_mtime >= before_ts:
+                continue
+        except OSError:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        pruned += 1
+    return pruned
+
+
+def prune_job_timings(before_day: str) -> int:
+    """Drop daily timings exports for days before `before_day` (YYYY-MM-DD)."""
+    pruned = 0
+    for path in TIMINGS_DIR.glob("*.jsonl"):
+        if path.stem >= before_day:
+            continue
+        try:
+            path.unlink()
+        except OSError:
+            continue
+        pruned += 1
+    return pruned
+
+
+def compact_state(state: BridgeServerState) -> dict[str, int]:
+    """One retention pass: archive settled jobs into daily gzip files, then enforce max age and size."""
+    policy = state.config.retention
+    now = time.time()
+    max_age_s = float(policy.get("max_age_days", 30)) * 86400
+    pruned_spool = prune_check_spool(now - max_age_s)
+    cutoff_day = time.strftime("%Y-%m-%d", time.localtime(now - max_age_s))
+    pruned_timings = prune_job_timings(cutoff_day)
+    pruned_artifacts = state.artifacts.prune(now - max_age_s) if state.artifacts is not None else 0
+    if state.archive is None:
+        cutoff = int(now - max_age_s)
+        return {
+            "pruned_jobs": state.jobs.prune(cutoff),
+            "pruned_timelines": state.events.prune(cutoff),
+            "pruned_spool": pruned_spool,
+            "pruned_timings": pruned_timings,
+            "pruned_artifacts": pruned_artifacts,
+        }
+
+    settle_s = float(policy.get("archive_after_hours", 24)) * 3600
+    archived = 0
+    for path in state_files(RESULTS_DIR, ".json"):
+        try:
+            mtime_ns = path.stat().st_mtime_ns
+            payload = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            continue
+        # Terminal jobs settle after archive_after_hours; queued/running leftovers only at max age.
+        if now - mtime_ns / 1e9 < (settle_s if is_terminal_result(payload) else max_age_s):
+            continue
+        _archive_job(state, path.stem, payload, mtime_ns, _job_updated_at(payload) or mtime_ns / 1e9)
+        archived += 1
+    for path in state_files(EVENTS_DIR, ".jsonl"):
+        job_id = path.stem
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            continue
+        # Event-only timelines (ci-/deploy-/feature- ids) settle once they have been quiet long enough.
+        if now - mtime < settle_s or state.jobs.exists(job_id):
+            continue
+        _archive_job(state, job_id, state.archive.read_result(job_id), None, mtime)
+        archived += 1
+
+    live_bytes = _state_usage_bytes(state_files(RESULTS_DIR, ".json") + state_files(EVENTS_DIR, ".jsonl"))
+    max_total = float(policy.get("max_total_mb", 1024)) * 1024 * 1024
+    days = state.archive.days()
+    pruned_days = 0
+    while days and (days[0] < cutoff_day or live_bytes + state.archive.usage_bytes() > max_total):
+        state.archive.drop_day(days.pop(0))
+        pruned_days += 1
+    return {
+        "archived": archived,
+        "pruned_days": pruned_days,
+        "pruned_spool": pruned_spool,
+        "pruned_timings": pruned_timings,
+        "pruned_artifacts": pruned_artifacts,
+        "live_kb": live_bytes // 1024,
+        "archive_kb": state.archive.usage_bytes() // 1024,
+    }
+
+
+def retention_loop(state: BridgeServerState) -> None:
+    interval = max(60, int(state.config.retention.get("interval_seconds", 3600)))
+    while True:
+        try:
+            stats = compact_state(state)
+            server_log("bridge", "retention " + " ".join(f"{k}={v}" for k, v in stats.items()))
+        except Exception as exc:  # pragma: no cover - runtime safeguard
+            server_log("bridge", f"retention error={exc}")
+        time.sleep(interval)
+
+
+EVENT_BATCH_MAX = 500
+
+
+def _event_ack(event_payload: dict[str, Any]) -> str:
+    event_type = event_payload["event_type"]
+    ack = "Qabul qilindi."
+    if event_type == "hello":
+        ack = "Yaxshi, eshitib turibman."
+    elif event_type == "ci_status":
+        conclusion = event_payload["conclusion"].lower()
+        status = event_payload["status"].lower()
+        if conclusion == "success":
+            ack = f"{event_payload['workflow']} success bo'ldi, kutib turaman."
+        elif conclusion in {"skipped", "neutral"}:
+            ack = f"{event_payload['workflow']} CI skip/neutral, keyingi bosqichni kutib turaman."
+        elif conclusion and conclusion != "success":
+            ack = f"{event_payload['workflow']} xato bo'ldi, tuzatib qayta yuboring."
+        elif status in {"queued", "in_progress", "waiting"}:
+            ack = f"{event_payload['workflow']} kuzatilyapti, kutib turaman."
+    elif event_type == "dokploy_status":
+        conclusion = event_payload["conclusion"].lower()
+        status = event_payload["status"].lower()
+        if conclusion == "success":
+            ack = "Dokploy deploy qabul qilindi, runtime natijani kutib turaman."
+        elif conclusion and conclusion != "success":
+            ack = "Dokploy deploy xato bo'ldi, tuzatib qayta yuboring."
+        elif status in {"queued", "in_progress", "waiting"}:
+            ack = "Dokploy deploy ketayapti, kutib turaman."
+    elif event_type == "runtime_status":
+        conclusion = event_payload["conclusion"].lower()
+        if conclusion == "success":
+            ack = f"{event_payload['workflow']} runtime OK, davom eting."
+        elif conclusion == "failure":
+            ack = f"{event_payload['workflow']} runtime xato, tuzatib qayta yuboring."
+    return ack
+
+
+def ingest_event(state: BridgeServerState, payload: dict[str, Any]) -> dict[str, Any]:
+    """Store one laptop event (from /event or /events/batch), log it and return the ack."""
+    job_id = str(payload.get("job_id") or "no-job").strip()
+    event_type = str(payload.get("event_type") or "event").strip()
+    now = int(time.time())
+    try:
+        # Batched/spooled events may arrive late; keep the laptop's timestamp when it sent one.
+        timestamp = int(payload.get("timestamp") or now)
+    except (TypeError, ValueError):
+        timestamp = now
+    event_payload = {
+        "job_id": job_id,
+        "event_type": event_type,
+        "message": str(payload.get("message") or "").strip(),
+        "commit": str(payload.get("commit") or "").strip(),
+        "task": str(payload.get("task") or "").strip(),
+        "workflow": str(payload.get("workflow") or "").strip(),
+        "status": str(payload.get("status") or "").strip(),
+        "conclusion": str(payload.get("conclusion") or "").strip(),
+        "timestamp": timestamp,
+        "received_at": now,
+    }
+    event = state.events.append(job_id, event_payload)
+    if event_type == "dokploy_status" and event_payload["conclusion"].lower() == "success":
+        # A deploy can replace services; the next job re-lists them instead of using the cached names.
+        state.services.invalidate("dokploy_deploy")
+    msg = event_payload["message"] or "-"
+    wf = event_payload["workflow"] or "-"
+    st = event_payload["status"] or "-"
+    cc = event_payload["conclusion"] or "-"
+    remote_log_on_server(
+        "LAPTOP",
+        "event",
+        f"{wf} status={st} conclusion={cc} msg={msg}",
+    )
+    return {"ack": _event_ack(event_payload), "event_type": event_type, "job_id": job_id, "seq": event.get("seq")}
+
+
+@dataclass
+class BridgeRoute:
+    """Transport-neutral outcome of one request: a JSON reply, a /result long-poll or an event stream."""
+
+    code: int = 200
+    payload: dict[str, Any] | None = None
+    # Non-JSON replies (/metrics) carry a ready body and its content type instead of payload.
+    body: bytes | None = None
+    content_type: str = "application/json"
+    headers: list[tuple[str, str]] = field(default_factory=list)
+    # /result carries an ETag (If-None-Match -> 304); /result and /events are gzipped for clients that accept it.
+    etag: bool = False
+    compress: bool = False
+    wait_job: str = ""
+    wait_seconds: float = 0.0
+    stream: tuple[str, int, float] | None = None
+    # Large bodies (/artifact) are sent from an open file, length bytes from its current position, in chunks.
+    file: tuple[BinaryIO, int] | None = None
+
+
+def request_authorized(state: BridgeServerState, headers: dict[str, str]) -> bool:
+    expected = state.config.shared_secret
+    if not expected:
+        return True
+    return headers.get("x-bridge-token", "") == expected
+
+
+def metrics_authorized(state: BridgeServerState, headers: dict[str, str]) -> bool:
+    # Prometheus scrape configs send `authorization: Bearer <token>` rather than custom headers.
+    if not state.config.metrics.get("require_token", True) or request_authorized(state, headers):
+        return True
+    expected = state.config.shared_secret
+    return headers.get("authorization", "") == f"Bearer {expected}"
+
+
+def result_route(state: BridgeServerState, job_id: str) -> BridgeRoute:
+    payload = state.jobs.read(job_id)
+    if payload is None:
+        return BridgeRoute(404, {"status": "pending", "job_id": job_id})
+    return BridgeRoute(200, payload, etag=True, compress=True)
+
+
+GZIP_MIN_BYTES = 1024
+
+
+def accepts_gzip(headers: dict[str, str]) -> bool:
+    for part in headers.get("accept-encoding", "").split(","):
+        coding, _, params = part.partition(";")
+        if coding.strip().lower() not in {"gzip", "*"}:
+            continue
+        q = params.strip().lower()
+        return not (q.startswith("q=") and q[2:].strip() in {"0", "0.0", "0.00", "0.000"})
+    return False
+
+
+def _etag_matches(header: str, tag: str) -> bool:
+    # Weak comparison (RFC 9110 8.8.3.2): W/ prefixes are ignored on both sides.
+    opaque = tag.removeprefix("W/")
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque:
+            return True
+    return False
+
+
+def encode_route(route: BridgeRoute, headers: dict[str, str]) -> tuple[int, bytes, str, list[tuple[str, str]]]:
+    """Wire form of a finished route (code, body, content type, extra headers), shared by both transports."""
+    if route.file is not None:
+        return route.code, b"", route.content_type, list(route.headers)
+    body = route.body if route.body is not None else json.dumps(route.payload or {}, ensure_ascii=True).encode("utf-8")
+    extra = list(route.headers)
+    if route.etag and route.code == 200:
+        # Weak: the same JSON goes out both gzipped and plain, so only the meaning is guaranteed equal.
+        tag = f'W/"{hashlib.sha256(body).hexdigest()[:32]}"'
+        extra += [("ETag", tag), ("Cache-Control", "no-cache")]
+        if _etag_matches(headers.get("if-none-match", ""), tag):
+            return 304, b"", route.content_type, extra
+    if route.compress:
+        extra.append(("Vary", "Accept-Encoding"))
+        if len(body) >= GZIP_MIN_BYTES and accepts_gzip(headers):
+            body = gzip.compress(body, compresslevel=6, mtime=0)
+            extra.append(("Content-Encoding", "gzip"))
+    return route.code, body, route.content_type, extra
+
+
+FILE_CHUNK_BYTES = 1 << 16
+
+
+def iter_file_chunks(fh: BinaryIO, length: int) -> Iterator[bytes]:
+    """Up to length bytes of fh in FILE_CHUNK_BYTES pieces; stops early if the file is shorter."""
+    remaining = length
+    while remaining > 0:
+        chunk = fh.read(min(FILE_CHUNK_BYTES, remaining))
+        if not chunk:
+            return
+        remaining -= len(chunk)
+        yield chunk
+
+
+def sse_end_frame(state: BridgeServerState, job_id: str) -> bytes | None:
+    """Closing `end` frame once the job's result is terminal; None while the job can still emit events."""
+    payload = state.jobs.read(job_id)
+    if not is_terminal_result(payload):
+        return None
+    data = {"job_id": job_id, "status": str((payload or {}).get("status", ""))}
+    return f"event: end\ndata: {json.dumps(data, ensure_ascii=True)}\n\n".encode("utf-8")
+
+
+def sse_frame(item: dict[str, Any], cursor: int) -> bytes:
+    return (
+        f"id: {item.get('seq', cursor)}\n"
+        f"event: {item.get('event_type') or 'event'}\n"
+        f"data: {json.dumps(item, ensure_ascii=True)}\n\n"
+    ).encode("utf-8")
+
+
+def parse_byte_range(header: str, size: int) -> tuple[int, int] | None:
+    """Inclusive (start, end) of a single `bytes=` range; (-1, -1) when unsatisfiable, None to serve it all."""
+    unit, sep, spec = header.partition("=")
+    if not sep or unit.strip().lower() != "bytes" or "," in spec:
+        # Multi-range and unknown units are ignored (RFC 9110 allows serving the full body).
+        return None
+    first, dash, last = spec.strip().partition("-")
+    if not dash or not (first + last).isdigit():
+        return None
+    if not first:
+        length = int(last)
+        return (max(0, size - length), size - 1) if length and size else (-1, -1)
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return (-1, -1)
+    return start, end
+
+
+def artifact_route(state: BridgeServerState, digest: str, headers: dict[str, str]) -> BridgeRoute:
+    store = state.artifacts
+    size = store.size(digest) if store is not None and ARTIFACT_HASH_RE.match(digest) else None
+    if store is None or size is None:
+        return BridgeRoute(404, {"status": "not_found", "artifact": digest})
+    # Content-addressed: the hash is a strong validator and the blob never changes.
+    common = [("Accept-Ranges", "bytes"), ("ETag", f'"{digest}"'), ("Cache-Control", "private, max-age=31536000, immutable")]
+    content_type = "text/plain; charset=utf-8"
+    byte_range = parse_byte_range(headers.get("range", ""), size) if headers.get("range") else None
+    if byte_range == (-1, -1):
+        return BridgeRoute(416, body=b"", content_type=content_type, headers=[*common, ("Content-Range", f"bytes */{size}")])
+    try:
+        if byte_range is None:
+            return BridgeRoute(200, content_type=content_type, headers=common, file=(store.open(digest), size))
+        start, end = byte_range
+        return BridgeRoute(
+            206,
+            content_type=content_type,
+            headers=[*common, ("Content-Range", f"bytes {start}-{end}/{size}")],
+            file=(store.open(digest, start), end - start + 1),
+        )
+    except (OSError, EOFError, gzip.BadGzipFile) as exc:
+        server_log("bridge", f"artifact read failed sha256={digest[:12]} error={exc}")
+        return BridgeRoute(500, {"status": "error", "message": "artifact unreadable"})
+
+
+def route_get(state: BridgeServerState, target: str, headers: dict[str, str]) -> BridgeRoute:
+    """GET routing shared by the threaded handler and the asyncio core; header names are lowercase."""
+    parsed = urlparse(target)
+    params = parse_qs(parsed.query)
+    if parsed.path == "/health":
+        return BridgeRoute(
+            200,
+            {
+                "status": "ok",
+                "workers": state.config.worker_count,
+                "queue": state.q.snapshot(),
+                "review_cache": state.review_cache.stats() if state.review_cache else None,
+            },
+        )
+
+    if parsed.path == "/hello":
+        side = (params.get("side") or ["unknown"])[0]
+        probe_codex = (params.get("probe_codex") or ["0"])[0] in {"1", "true", "yes"}
+        remote_log_on_server(side.upper(), "hello", "bridge hello request keldi")
+        hello = state.hello
+        if probe_codex:
+            # A forced probe runs a codex session and holds this request until it ends: token required.
+            if not request_authorized(state, headers):
+                return BridgeRoute(401, {"status": "unauthorized"})
+            hello.probe(wait=True)
+        else:
+            # No periodic probing: a greeting older than the TTL is refreshed when someone asks for it.
+            hello.refresh()
+        snapshot = hello.snapshot()
+        if probe_codex and snapshot["reply_source"] == "server_codex_cached":
+            # The probe that just finished produced this greeting.
+            snapshot["reply_source"] = "server_codex"
+        server_log("bridge", f"hello reply source={snapshot['reply_source']} reply={snapshot['reply'] or '-'}")
+        body = {
+            "status": "ok",
+            "message": f"bridge-server eshitayapti ({side})",
+            **snapshot,
+            "workers": state.config.worker_count,
+            "queue": state.q.snapshot(),
+            "server_time": int(time.time()),
+        }
+        if probe_codex and snapshot["codex"]["error"]:
+            server_log("bridge", f"hello codex error={snapshot['codex']['error']}")
+            return BridgeRoute(
+                503,
+                {
+                    **body,
+                    "status": "error",
+                    "reply": None,
+                    "reply_source": "server_codex_error",
+                    "error": snapshot["codex"]["error"],
+                },
+            )
+        return BridgeRoute(200, body)
+
+    if parsed.path == "/metrics":
+        if not metrics_authorized(state, headers):
+            return BridgeRoute(401, {"status": "unauthorized"})
+        return BridgeRoute(
+            200, body=METRICS.render().encode("utf-8"), content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+
+    if not request_authorized(state, headers):
+        return BridgeRoute(401, {"status": "unauthorized"})
+
+    if parsed.path == "/result":
+        job_id = (params.get("job_id") or [""])[0]
+        if not job_id:
+            return BridgeRoute(400, {"status": "error", "message": "job_id is required"})
+        try:
+            wait_s = float((params.get("wait") or ["0"])[0] or 0)
+        except ValueError:
+            return BridgeRoute(400, {"status": "error", "message": "wait must be numeric"})
+        wait_s = min(max(wait_s, 0.0), float(state.config.result_wait_max_seconds))
+        route = result_route(state, job_id)
+        if wait_s > 0 and not is_terminal_result(route.payload if route.code == 200 else None):
+            # Long-poll: the transport parks the request until jobs.write publishes a terminal result.
+            return BridgeRoute(wait_job=job_id, wait_seconds=wait_s)
+        return route
+
+    if parsed.path.startswith("/artifact/"):
+        return artifact_route(state, parsed.path[len("/artifact/") :], headers)
+
+    if parsed.path == "/jobs":
+        try:
+            limit = int((params.get("limit") or ["50"])[0] or 50)
+        except ValueError:
+            return BridgeRoute(400, {"status": "error", "message": "limit must be an integer"})
+        jobs = state.jobs.find(
+            commit=(params.get("commit") or [""])[0].strip(),
+            task_no=(params.get("task_no") or [""])[0].strip(),
+            status=(params.get("status") or [""])[0].strip(),
+            limit=max(1, min(limit, 500)),
+        )
+        return BridgeRoute(200, {"status": "ok", "jobs": jobs})
+
+    if parsed.path == "/events/stream":
+        job_id = (params.get("job_id") or [""])[0]
+        if not job_id:
+            return BridgeRoute(400, {"status": "error", "message": "job_id is required"})
+        stream_cfg = state.config.event_stream
+        try:
+            # Last-Event-ID is sent by EventSource-style clients on reconnect; it wins over ?after=.
+            after = int(headers.get("last-event-id") or (params.get("after") or ["0"])[0] or 0)
+            heartbeat_s = float((params.get("heartbeat") or [stream_cfg.get("heartbeat_seconds", 15)])[0])
+        except ValueError:
+            return BridgeRoute(400, {"status": "error", "message": "Last-Event-ID/after/heartbeat must be numeric"})
+        return BridgeRoute(stream=(job_id, max(0, after), min(max(heartbeat_s, 1.0), 60.0)))
+
+    if parsed.path == "/events":
+        job_id = (params.get("job_id") or [""])[0]
+        if not job_id:
+            return BridgeRoute(400, {"status": "error", "message": "job_id is required"})
+        try:
+            after = int((params.get("after") or ["0"])[0] or 0)
+            limit = int((params.get("limit") or ["0"])[0] or 0)
+        except ValueError:
+            return BridgeRoute(400, {"status": "error", "message": "after/limit must be integers"})
+        event_type = (params.get("event_type") or [""])[0].strip()
+        events, cursor = state.events.read_page(job_id, after=after, event_type=event_type, limit=max(0, limit))
+        return BridgeRoute(
+            200, {"status": "ok", "job_id": job_id, "events": events, "next_after": cursor}, compress=True
+        )
+
+    return BridgeRoute(404, {"status": "not_found"})
+
+
+def route_post(state: BridgeServerState, target: str, headers: dict[str, str], body: bytes) -> BridgeRoute:
+    """POST routing shared by the threaded handler and the asyncio core."""
+    if not request_authorized(state, headers):
+        return BridgeRoute(401, {"status": "unauthorized"})
+    parsed = urlparse(target)
+    if parsed.path == "/cancel":
+        params = parse_qs(parsed.query)
+        job_id = (params.get("job_id") or [""])[0].strip()
+        if not job_id:
+            return BridgeRoute(400, {"status": "error", "message": "job_id is required"})
+        outcome = state.cancel(job_id)
+        if not outcome["state"]:
+            return BridgeRoute(409, {"status": "error", "message": "job is not queued or running", **outcome})
+        return BridgeRoute(200, {"status": "ok", **outcome})
+
+    if target not in ("/trigger", "/event", "/events/batch"):
+        return BridgeRoute(404, {"status": "not_found"})
+
+    try:
+        payload = json.loads(body or b"{}")
+    except Exception as exc:
+        return BridgeRoute(400, {"status": "error", "message": f"invalid json: {exc}"})
+
+    if target == "/event":
+        return BridgeRoute(200, {"status": "ok", **ingest_event(state, payload)})
+
+    if target == "/events/batch":
+        items = payload.get("events")
+        if not isinstance(items, list):
+            return BridgeRoute(400, {"status": "error", "message": "events list is required"})
+        if len(items) > EVENT_BATCH_MAX:
+            return BridgeRoute(400, {"status": "error", "message": f"at most {EVENT_BATCH_MAX} events per batch"})
+        results = [
+            ingest_event(state, item) if isinstance(item, dict) else {"status": "error", "ack": ""}
+            for item in items
+        ]
+        return BridgeRoute(200, {"status": "ok", "accepted": len(results), "results": results})
+
+    task = str(payload.get("task") or "").strip()
+    commit = str(payload.get("commit") or "").strip()
+    job_id = str(payload.get("job_id") or "").strip()
+    if not task or not commit or not job_id:
+        return BridgeRoute(400, {"status": "error", "message": "task, commit, job_id are required"})
+
+    state_payload = {
+        "status": "queued",
+        "tests_passed": False,
+        "errors": [],
+        "warnings": [],
+        "suggestions": [],
+        "next_action": "fix_required",
+        "task": task,
+        "commit": commit,
+        "job_id": job_id,
+        "stage": "queued",
+        "queued_at": int(time.time()),
+    }
+    state.jobs.write(job_id, state_payload)
+    try:
+        priority = int(payload.get("priority") or 0)
+    except (TypeError, ValueError):
+        priority = 0
+    outcome = state.enqueue(
+        {
+            "task": task,
+            "commit": commit,
+            "job_id": job_id,
+            "priority": priority,
+            "force_review": bool(payload.get("force_review")),
+        }
+    )
+    server_log("bridge", f"trigger queued task={task} commit={commit[:8]}")
+    response = {"status": "triggered", "job_id": job_id, "ack": "Trigger olindi, kutib turaman."}
+    if outcome.get("coalesced_into"):
+        response["coalesced_into"] = outcome["coalesced_into"]
+    if outcome.get("superseded"):
+        response["superseded"] = sorted(outcome["superseded"])
+    return BridgeRoute(200, response)
 
 
 class Handler(BaseHTTPRequestHandler):
     server_version = "TalimyBridge/1.0"
+    # Every reply carries Content-Length (or closes, like the event stream), so connections can be reused.
+    protocol_version = "HTTP/1.1"
     state: BridgeServerState
 
     def log_message(self, format: str, *args: Any) -> None:
@@ -898,185 +4728,417 @@ class Handler(BaseHTTPRequestHandler):
         server_log("bridge", message)
 
     def _json(self, code: int, payload: dict[str, Any]) -> None:
-        body = json.dumps(payload, ensure_ascii=True).encode("utf-8")
+        self._send_body(code, json.dumps(payload, ensure_ascii=True).encode("utf-8"), "application/json")
+
+    def _send_body(
+        self,
+        code: int,
+        body: bytes,
+        content_type: str,
+        headers: list[tuple[str, str]] | None = None,
+        *,
+        length: int | None = None,
+    ) -> None:
         self.send_response(code)
-        self.send_header("Content-Type", "application/json")
-        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Content-Type", content_type)
+        if code != 304:
+            self.send_header("Content-Length", str(len(body) if length is None else length))
+        for name, value in headers or ():
+            self.send_header(name, value)
         self.end_headers()
-        self.wfile.write(body)
-
-    def _authorized(self) -> bool:
-        expected = self.state.config.shared_secret
-        if not expected:
-            return True
-        actual = self.headers.get("X-Bridge-Token", "")
-        return actual == expected
-
-    def do_GET(self) -> None:  # noqa: N802
-        parsed = urlparse(self.path)
-        if parsed.path == "/health":
-            self._json(200, {"status": "ok"})
-            return
-
-        if parsed.path == "/hello":
-            params = parse_qs(parsed.query)
-            side = (params.get("side") or ["unknown"])[0]
-            remote_log_on_server(side.upper(), "hello", "bridge hello request keldi")
-            reply, reply_source, hello_error = run_server_codex_hello(
-                self.state.config, self.state.config.server_workdir, side=side
-            )
-            self._console(f"hello reply source={reply_source} reply={reply or '-'}")
-            if hello_error:
-                self._console(f"hello codex error={hello_error}")
-                self._json(
-                    503,
-                    {
-                        "status": "error",
-                        "message": f"bridge-server eshitayapti ({side})",
-                        "reply": None,
-                        "reply_source": reply_source,
-                        "error": hello_error,
-                        "server_time": int(time.time()),
-                    },
-                )
-                return
-            self._json(
-                200,
-                {
-                    "status": "ok",
-                    "message": f"bridge-server eshitayapti ({side})",
-                    "reply": reply,
-                    "reply_source": reply_source,
-                    "server_time": int(time.time()),
-                },
-            )
-            return
-
-        if not self._authorized():
-            self._json(401, {"status": "unauthorized"})
+        if code != 304:
+            self.wfile.write(body)
+
+    def _stream_events(self, job_id: str, after: int, heartbeat_s: float) -> None:
+        events = self.state.events
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        cursor = after
+        end: bytes | None = None
+        try:
+            self.wfile.write(b"retry: 3000\n\n")
+            self.wfile.flush()
+            with events.notifier.subscribe(job_id):
+                while True:
+                    items, cursor = events.read_page(job_id, after=cursor)
+                    for item in items:
+                        self.wfile.write(sse_frame(item, cursor))
+                    if items:
+                        self.wfile.flush()
+                        continue
+                    if end is not None:
+                        self.wfile.write(end)
+                        self.wfile.flush()
+                        return
+                    end = sse_end_frame(self.state, job_id)
+                    if end is not None:
+                        # One more read sends events appended before the terminal result, then the stream ends.
+                        continue
+                    if not events.notifier.wait(job_id, cursor, heartbeat_s):
+                        # Heartbeat keeps proxies from idling out and surfaces dead clients as write errors.
+                        self.wfile.write(b": heartbeat\n\n")
+                        self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError, TimeoutError):
             return
 
-        if parsed.path == "/result":
-            params = parse_qs(parsed.query)
-            job_id = (params.get("job_id") or [""])[0]
-            if not job_id:
-                self._json(400, {"status": "error", "message": "job_id is required"})
-                return
-            payload = self.state.jobs.read(job_id)
-            if payload is None:
-                self._json(404, {"status": "pending", "job_id": job_id})
-                return
-            self._json(200, payload)
+    def _headers(self) -> dict[str, str]:
+        return {key.lower(): value for key, value in self.headers.items()}
+
+    def _send_route(self, route: BridgeRoute) -> None:
+        if route.stream is not None or route.file is not None:
+            # self.timeout bounds the wait for the next request; a stream or a large file body may
+            # block on a slow reader for longer than that between writes.
+            self.connection.settimeout(self.state.config.send_timeout_seconds)
+        if route.stream is not None:
+            job_id, after, heartbeat_s = route.stream
+            self._console(f"event stream open job_id={job_id} after={after}")
+            self._stream_events(job_id, after, heartbeat_s)
+            self._console(f"event stream closed job_id={job_id}")
             return
-
-        if parsed.path == "/events":
-            params = parse_qs(parsed.query)
-            job_id = (params.get("job_id") or [""])[0]
-            if not job_id:
-                self._json(400, {"status": "error", "message": "job_id is required"})
-                return
-            self._json(200, {"status": "ok", "job_id": job_id, "events": self.state.events.read(job_id)})
+        if route.wait_job:
+            self.state.jobs.waiters.wait(route.wait_job, route.wait_seconds)
+            route = result_route(self.state, route.wait_job)
+        code, body, content_type, headers = encode_route(route, self._headers())
+        if route.file is not None:
+            fh, length = route.file
+            with fh:
+                self._send_body(code, b"", content_type, headers, length=length)
+                sent = 0
+                for chunk in iter_file_chunks(fh, length):
+                    self.wfile.write(chunk)
+                    sent += len(chunk)
+            self.connection.settimeout(self.timeout)
+            if sent < length:
+                # The file came up short; the declared Content-Length can only be honoured by closing.
+                self.close_connection = True
+            observe_http_request(self.command, self.path, code, self._started, sent, "identity")
             return
+        self._send_body(code, body, content_type, headers)
+        encoding = dict(headers).get("Content-Encoding", "identity")
+        observe_http_request(self.command, self.path, code, self._started, len(body), encoding)
 
-        self._json(404, {"status": "not_found"})
+    def do_GET(self) -> None:  # noqa: N802
+        self._started = time.monotonic()
+        self._send_route(route_get(self.state, self.path, self._headers()))
 
     def do_POST(self) -> None:  # noqa: N802
-        if not self._authorized():
-            self._json(401, {"status": "unauthorized"})
-            return
-        if self.path not in ("/trigger", "/event"):
-            self._json(404, {"status": "not_found"})
-            return
-
+        self._started = time.monotonic()
         try:
             length = int(self.headers.get("Content-Length", "0"))
-            payload = json.loads(self.rfile.read(length) or b"{}")
-        except Exception as exc:
+        except ValueError as exc:
+            # The unread body would be parsed as the next request on a kept-alive connection.
+            self.close_connection = True
             self._json(400, {"status": "error", "message": f"invalid json: {exc}"})
             return
+        if "Transfer-Encoding" in self.headers:
+            self.close_connection = True
+            self._json(411, {"status": "error", "message": "Content-Length is required"})
+            return
+        body = self.rfile.read(length) if length > 0 else b""
+        self._send_route(route_post(self.state, self.path, self._headers(), body))
 
-        if self.path == "/event":
-            job_id = str(payload.get("job_id") or "no-job").strip()
-            event_type = str(payload.get("event_type") or "event").strip()
-            event_payload = {
-                "job_id": job_id,
-                "event_type": event_type,
-                "message": str(payload.get("message") or "").strip(),
-                "commit": str(payload.get("commit") or "").strip(),
-                "task": str(payload.get("task") or "").strip(),
-                "workflow": str(payload.get("workflow") or "").strip(),
-                "status": str(payload.get("status") or "").strip(),
-                "conclusion": str(payload.get("conclusion") or "").strip(),
-                "timestamp": int(time.time()),
-            }
-            self.state.events.append(job_id, event_payload)
-            msg = event_payload["message"] or "-"
-            wf = event_payload["workflow"] or "-"
-            st = event_payload["status"] or "-"
-            cc = event_payload["conclusion"] or "-"
-            remote_log_on_server(
-                "LAPTOP",
-                "event",
-                f"{wf} status={st} conclusion={cc} msg={msg}",
-            )
 
-            ack = "Qabul qilindi."
-            if event_type == "hello":
-                ack = "Yaxshi, eshitib turibman."
-            elif event_type == "ci_status":
-                conclusion = event_payload["conclusion"].lower()
-                status = event_payload["status"].lower()
-                if conclusion == "success":
-                    ack = f"{event_payload['workflow']} success bo'ldi, kutib turaman."
-                elif conclusion in {"skipped", "neutral"}:
-                    ack = f"{event_payload['workflow']} CI skip/neutral, keyingi bosqichni kutib turaman."
-                elif conclusion and conclusion != "success":
-                    ack = f"{event_payload['workflow']} xato bo'ldi, tuzatib qayta yuboring."
-                elif status in {"queued", "in_progress", "waiting"}:
-                    ack = f"{event_payload['workflow']} kuzatilyapti, kutib turaman."
-            elif event_type == "dokploy_status":
-                conclusion = event_payload["conclusion"].lower()
-                status = event_payload["status"].lower()
-                if conclusion == "success":
-                    ack = "Dokploy deploy qabul qilindi, runtime natijani kutib turaman."
-                elif conclusion and conclusion != "success":
-                    ack = "Dokploy deploy xato bo'ldi, tuzatib qayta yuboring."
-                elif status in {"queued", "in_progress", "waiting"}:
-                    ack = "Dokploy deploy ketayapti, kutib turaman."
-            elif event_type == "runtime_status":
-                conclusion = event_payload["conclusion"].lower()
-                if conclusion == "success":
-                    ack = f"{event_payload['workflow']} runtime OK, davom eting."
-                elif conclusion == "failure":
-                    ack = f"{event_payload['workflow']} runtime xato, tuzatib qayta yuboring."
-
-            self._json(200, {"status": "ok", "ack": ack, "event_type": event_type, "job_id": job_id})
+class BridgeHTTPServer(ThreadingHTTPServer):
+    # Several pipelines post events concurrently; the stdlib default backlog of 5 resets connections.
+    request_queue_size = 64
+    daemon_threads = True
+
+
+ASYNC_MAX_HEADER_BYTES = 64 * 1024
+ASYNC_MAX_BODY_BYTES = 8 * 1024 * 1024
+
+
+class AsyncWakeups:
+    """asyncio.Event per parked request, keyed by job; set from store threads through notifier listeners."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+        self._events: dict[str, set[asyncio.Event]] = {}
+
+    def listener(self, job_id: str) -> None:
+        # Runs on the publishing thread; a request parks (watch) before re-reading state, so skipping
+        # jobs nobody watches cannot lose a wakeup.
+        if job_id in self._events:
+            self.loop.call_soon_threadsafe(self._wake, job_id)
+
+    def _wake(self, job_id: str) -> None:
+        for event in self._events.get(job_id, ()):
+            event.set()
+
+    def watch(self, job_id: str) -> asyncio.Event:
+        event = asyncio.Event()
+        self._events.setdefault(job_id, set()).add(event)
+        return event
+
+    def unwatch(self, job_id: str, event: asyncio.Event) -> None:
+        events = self._events.get(job_id)
+        if events is not None:
+            events.discard(event)
+            if not events:
+                del self._events[job_id]
+
+
+class AsyncBridgeServer:
+    """asyncio HTTP/1.1 core: the same routes as Handler, keep-alive, bounded connections, parked waits."""
+
+    def __init__(self, state: BridgeServerState, loop: asyncio.AbstractEventLoop) -> None:
+        config = state.config
+        self.state = state
+        self.loop = loop
+        self.max_connections = config.async_max_connections
+        self.keepalive_s = config.keepalive_seconds
+        self.connections = 0
+        self.results = AsyncWakeups(loop)
+        self.events = AsyncWakeups(loop)
+        state.jobs.waiters.add_listener(self.results.listener)
+        state.events.notifier.add_listener(self.events.listener)
+
+    async def serve(self, host: str, port: int) -> None:
+        server = await asyncio.start_server(
+            self._connection, host, port, backlog=BridgeHTTPServer.request_queue_size, limit=ASYNC_MAX_HEADER_BYTES
+        )
+        async with server:
+            await server.serve_forever()
+
+    async def _call(self, func: Callable[..., Any], *args: Any) -> Any:
+        # Store reads/writes and routing block on disk or sqlite; they run on the fixed io thread pool.
+        return await self.loop.run_in_executor(None, func, *args)
+
+    async def _connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        if self.connections >= self.max_connections:
+            server_log("bridge", f"async connection rejected active={self.connections}")
+            await self._reply(writer, 503, {"status": "error", "message": "too many connections"}, keep_alive=False)
+            await self._close(writer)
             return
+        self.connections += 1
+        try:
+            while True:
+                request = await self._read_request(reader, writer)
+                if request is None:
+                    break
+                method, target, headers, body, keep_alive = request
+                if not await self._dispatch(writer, method, target, headers, body, keep_alive):
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connections -= 1
+            await self._close(writer)
+
+    async def _close(self, writer: asyncio.StreamWriter) -> None:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+
+    async def _read_request(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> tuple[str, str, dict[str, str], bytes, bool] | None:
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.keepalive_s)
+        except (TimeoutError, asyncio.IncompleteReadError):
+            return None
+        except asyncio.LimitOverrunError:
+            await self._reply(writer, 431, {"status": "error", "message": "request headers too large"}, keep_alive=False)
+            return None
+        lines = head.decode("latin-1").split("\r\n")
+        parts = lines[0].split()
+        if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+            await self._reply(writer, 400, {"status": "error", "message": "bad request line"}, keep_alive=False)
+            return None
+        method, target, version = parts
+        headers: dict[str, str] = {}
+        for line in lines[1:]:
+            name, sep, value = line.partition(":")
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        if "transfer-encoding" in headers:
+            await self._reply(writer, 411, {"status": "error", "message": "Content-Length is required"}, keep_alive=False)
+            return None
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError as exc:
+            await self._reply(writer, 400, {"status": "error", "message": f"invalid json: {exc}"}, keep_alive=False)
+            return None
+        if length > ASYNC_MAX_BODY_BYTES:
+            await self._reply(writer, 413, {"status": "error", "message": "request body too large"}, keep_alive=False)
+            return None
+        try:
+            # Same idle limit as the header read: a client that stalls mid-body must not hold a connection slot.
+            body = await asyncio.wait_for(reader.readexactly(length), self.keepalive_s) if length > 0 else b""
+        except TimeoutError:
+            await self._reply(writer, 408, {"status": "error", "message": "request body timed out"}, keep_alive=False)
+            return None
+        return method, target, headers, body, keep_alive
+
+    async def _dispatch(
+        self,
+        writer: asyncio.StreamWriter,
+        method: str,
+        target: str,
+        headers: dict[str, str],
+        body: bytes,
+        keep_alive: bool,
+    ) -> bool:
+        started = time.monotonic()
+        if method == "GET":
+            route = await self._call(route_get, self.state, target, headers)
+        elif method == "POST":
+            route = await self._call(route_post, self.state, target, headers, body)
+        else:
+            route = BridgeRoute(501, {"status": "error", "message": f"unsupported method {method}"})
+        if route.stream is not None:
+            job_id, after, heartbeat_s = route.stream
+            server_log("bridge", f"event stream open job_id={job_id} after={after}")
+            try:
+                await self._stream_events(writer, job_id, after, heartbeat_s)
+            finally:
+                server_log("bridge", f"event stream closed job_id={job_id}")
+            return False
+        if route.wait_job:
+            route = await self._wait_result(route.wait_job, route.wait_seconds)
+        code, body, content_type, extra = encode_route(route, headers)
+        if route.file is not None:
+            fh, length = route.file
+            sent = await self._send_file(writer, route, fh, length, keep_alive=keep_alive)
+            observe_http_request(method, target, code, started, sent, "identity")
+            # A short file leaves the declared Content-Length unmet; only closing the connection ends the body.
+            return keep_alive and sent == length
+        await self._send(writer, code, body, content_type, keep_alive=keep_alive, headers=extra)
+        encoding = dict(extra).get("Content-Encoding", "identity")
+        observe_http_request(method, target, code, started, len(body), encoding)
+        return keep_alive
+
+    async def _send_file(
+        self, writer: asyncio.StreamWriter, route: BridgeRoute, fh: BinaryIO, length: int, *, keep_alive: bool
+    ) -> int:
+        sent = 0
+        try:
+            head = [("Content-Type", route.content_type), ("Content-Length", str(length)), *route.headers]
+            writer.write(self._head(route.code, head, keep_alive=keep_alive))
+            chunks = iter_file_chunks(fh, length)
+            while True:
+                # File reads run on the io pool; drain() applies backpressure from slow clients.
+                chunk = await self._call(next, chunks, b"")
+                if not chunk:
+                    break
+                writer.write(chunk)
+                sent += len(chunk)
+                await writer.drain()
+        finally:
+            fh.close()
+        return sent
 
-        task = str(payload.get("task") or "").strip()
-        commit = str(payload.get("commit") or "").strip()
-        job_id = str(payload.get("job_id") or "").strip()
-        if not task or not commit or not job_id:
-            self._json(400, {"status": "error", "message": "task, commit, job_id are required"})
+    async def _wait_result(self, job_id: str, wait_s: float) -> BridgeRoute:
+        event = self.results.watch(job_id)
+        try:
+            # Re-read after watching: a result written in between would otherwise be missed.
+            route = await self._call(result_route, self.state, job_id)
+            if route.code == 200 and is_terminal_result(route.payload):
+                return route
+            try:
+                await asyncio.wait_for(event.wait(), wait_s)
+            except TimeoutError:
+                pass
+        finally:
+            self.results.unwatch(job_id, event)
+        return await self._call(result_route, self.state, job_id)
+
+    async def _stream_events(self, writer: asyncio.StreamWriter, job_id: str, after: int, heartbeat_s: float) -> None:
+        events = self.state.events
+        writer.write(
+            self._head(200, [("Content-Type", "text/event-stream"), ("Cache-Control", "no-cache")], keep_alive=False)
+            + b"retry: 3000\n\n"
+        )
+        cursor = after
+        end: bytes | None = None
+        try:
+            await writer.drain()
+            while True:
+                wakeup = self.events.watch(job_id)
+                try:
+                    items, cursor = await self._call(lambda: events.read_page(job_id, after=cursor))
+                    if items:
+                        writer.write(b"".join(sse_frame(item, cursor) for item in items))
+                        await writer.drain()
+                        continue
+                    if end is not None:
+                        writer.write(end)
+                        await writer.drain()
+                        return
+                    end = await self._call(sse_end_frame, self.state, job_id)
+                    if end is not None:
+                        # One more read sends events appended before the terminal result, then the stream ends.
+                        continue
+                    try:
+                        await asyncio.wait_for(wakeup.wait(), heartbeat_s)
+                    except TimeoutError:
+                        # Heartbeat keeps proxies from idling out and surfaces dead clients as write errors.
+                        writer.write(b": heartbeat\n\n")
+                        await writer.drain()
+                finally:
+                    self.events.unwatch(job_id, wakeup)
+        except (ConnectionError, OSError):
             return
 
-        state_payload = {
-            "status": "queued",
-            "tests_passed": False,
-            "errors": [],
-            "warnings": [],
-            "suggestions": [],
-            "next_action": "fix_required",
-            "task": task,
-            "commit": commit,
-            "job_id": job_id,
-            "stage": "queued",
-            "queued_at": int(time.time()),
-        }
-        self.state.jobs.write(job_id, state_payload)
-        self.state.enqueue({"task": task, "commit": commit, "job_id": job_id})
-        self._console(f"trigger queued task={task} commit={commit[:8]}")
-        self._json(200, {"status": "triggered", "job_id": job_id, "ack": "Trigger olindi, kutib turaman."})
+    @staticmethod
+    def _head(code: int, headers: list[tuple[str, str]], *, keep_alive: bool) -> bytes:
+        try:
+            reason = HTTPStatus(code).phrase
+        except ValueError:
+            reason = ""
+        lines = [
+            f"HTTP/1.1 {code} {reason}",
+            f"Server: {Handler.server_version}",
+            f"Date: {formatdate(usegmt=True)}",
+            *(f"{name}: {value}" for name, value in headers),
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def _reply(self, writer: asyncio.StreamWriter, code: int, payload: dict[str, Any], *, keep_alive: bool) -> None:
+        body = json.dumps(payload, ensure_ascii=True).encode("utf-8")
+        await self._send(writer, code, body, "application/json", keep_alive=keep_alive)
+
+    async def _send(
+        self,
+        writer: asyncio.StreamWriter,
+        code: int,
+        body: bytes,
+        content_type: str,
+        *,
+        keep_alive: bool,
+        headers: list[tuple[str, str]] | None = None,
+    ) -> None:
+        # 304 has no body by definition; a Content-Length there would describe the unsent representation.
+        length = [] if code == 304 else [("Content-Length", str(len(body)))]
+        head = self._head(code, [("Content-Type", content_type), *length, *(headers or ())], keep_alive=keep_alive)
+        writer.write(head + body)
+        await writer.drain()
+
+
+def serve_asyncio(state: BridgeServerState, loop: asyncio.AbstractEventLoop) -> None:
+    """Run the asyncio core on loop until interrupted; blocking store calls use a fixed io thread pool."""
+    config = state.config
+    asyncio.set_event_loop(loop)
+    if sys.version_info < (3, 12) and hasattr(os, "pidfd_open"):
+        # The 3.11 default child watcher starts one thread per subprocess; pidfd keeps checks on the loop.
+        watcher = asyncio.PidfdChildWatcher()
+        watcher.attach_loop(loop)
+        asyncio.set_child_watcher(watcher)
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=config.async_io_threads, thread_name_prefix="bridge-io"))
+    server = AsyncBridgeServer(state, loop)
+    try:
+        loop.run_until_complete(server.serve("0.0.0.0", config.bridge_port))
+    finally:
+        loop.close()
 
 
 def main() -> int:
@@ -1084,22 +5146,63 @@ def main() -> int:
     STATE_DIR.mkdir(parents=True, exist_ok=True)
     RESULTS_DIR.mkdir(parents=True, exist_ok=True)
     EVENTS_DIR.mkdir(parents=True, exist_ok=True)
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "migrate-sqlite":
+        return migrate_files_to_sqlite(config)
+    if command == "compact-state":
+        stats = compact_state(BridgeServerState(config))
+        server_log("bridge", "retention " + " ".join(f"{k}={v}" for k, v in stats.items()))
+        return 0
+    if command:
+        print("Usage: python3 bridge/bridge_server.py [migrate-sqlite|compact-state]")
+        return 1
 
     state = BridgeServerState(config)
-    worker = threading.Thread(target=worker_loop, args=(state,), daemon=True)
-    worker.start()
-
-    class BoundHandler(Handler):
-        pass
-
-    BoundHandler.state = state
-    server = ThreadingHTTPServer(("0.0.0.0", config.bridge_port), BoundHandler)
+    loop: asyncio.AbstractEventLoop | None = None
+    if config.server_core_mode == "asyncio":
+        loop = asyncio.new_event_loop()
+        # Workers stay fixed threads; their check commands are handed to the loop and awaited there.
+        state.command_runner = AsyncCommandRunner(loop, config.async_check_concurrency)
+    recovered = state.recover_queue()
+    if any(recovered.values()):
+        server_log("bridge", "queue recovery " + " ".join(f"{k}={v}" for k, v in recovered.items()))
+    for idx in range(config.worker_count):
+        threading.Thread(target=worker_loop, args=(state,), name=f"worker-{idx + 1}", daemon=True).start()
+    if config.retention.get("enabled", True):
+        threading.Thread(target=retention_loop, args=(state,), daemon=True).start()
+    threading.Thread(target=state.services.warm_up, args=(config.server_workdir,), daemon=True).start()
+
+    server: BridgeHTTPServer | None = None
+    if loop is None:
+
+        class BoundHandler(Handler):
+            pass
+
+        BoundHandler.state = state
+        # Idle keep-alive connections each hold a thread; the socket timeout ends them.
+        BoundHandler.timeout = config.keepalive_seconds
+        server = BridgeHTTPServer(("0.0.0.0", config.bridge_port), BoundHandler)
 
     server_log("bridge", f"listening on 0.0.0.0:{config.bridge_port}")
+    server_log("bridge", f"server_core={config.server_core_mode}")
     server_log("bridge", f"mode={config.server_mode}")
     server_log("bridge", f"workdir={config.server_workdir}")
+    server_log("bridge", f"state_backend={config.state_backend}")
+    server_log("bridge", f"workers={config.worker_count}")
     server_log("bridge", f"secret_fp={secret_fingerprint(config.shared_secret)}")
     server_log("bridge", "checks: configured deterministic commands + optional codex review")
+    if server is None:
+        assert loop is not None
+        server_log(
+            "bridge",
+            f"async max_connections={config.async_max_connections} io_threads={config.async_io_threads} "
+            f"check_concurrency={config.async_check_concurrency}",
+        )
+        try:
+            serve_asyncio(state, loop)
+        except KeyboardInterrupt:
+            server_log("bridge", "shutting down")
+        return 0
     try:
         server.serve_forever()
     except KeyboardInterrupt:
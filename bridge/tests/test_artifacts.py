@@ -0,0 +1,120 @@
+"""Byte-range parsing, ArtifactStore dedupe/read cache and /artifact Range replies."""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bridge_server import ArtifactStore, artifact_route, parse_byte_range  # noqa: E402
+
+BLOB = b"".join(b"%06d\n" % i for i in range(20000))
+
+
+class ParseByteRangeTest(unittest.TestCase):
+    def test_ranges(self) -> None:
+        cases = {
+            "bytes=0-9": (0, 9),
+            "bytes=10-": (10, 99),
+            "bytes=90-200": (90, 99),
+            "bytes=-10": (90, 99),
+            "bytes=-500": (0, 99),
+            "BYTES = 5-5": (5, 5),
+        }
+        for header, expected in cases.items():
+            with self.subTest(header=header):
+                self.assertEqual(parse_byte_range(header, 100), expected)
+
+    def test_unsatisfiable(self) -> None:
+        for header in ("bytes=100-", "bytes=50-10", "bytes=-0"):
+            with self.subTest(header=header):
+                self.assertEqual(parse_byte_range(header, 100), (-1, -1))
+        self.assertEqual(parse_byte_range("bytes=-5", 0), (-1, -1))
+
+    def test_ignored_forms_serve_everything(self) -> None:
+        for header in ("items=0-5", "bytes=0-1,5-6", "bytes=a-b", "bytes=5", "garbage"):
+            with self.subTest(header=header):
+                self.assertIsNone(parse_byte_range(header, 100))
+
+
+class ArtifactStoreTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = ArtifactStore(Path(self.tmp.name) / "artifacts", read_cache_bytes=(len(BLOB) + 1) * 2)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_put_dedupes_and_reports_size(self) -> None:
+        digest = self.store.put(BLOB)
+        source = Path(self.tmp.name) / "spool.out"
+        source.write_bytes(BLOB)
+        self.assertEqual(self.store.put_file(source), digest)
+        self.assertEqual(len(list(self.store.base_dir.glob("*/*.gz"))), 1)
+        self.assertEqual(self.store.size(digest), len(BLOB))
+        self.assertIsNone(self.store.size("0" * 64))
+
+    def test_open_seeks_in_the_decompressed_copy(self) -> None:
+        digest = self.store.put(BLOB)
+        with self.store.open(digest, 70000) as fh:
+            self.assertEqual(fh.read(14), BLOB[70000:70014])
+        self.assertTrue((self.store.read_cache_dir / digest).exists())
+
+    def test_read_cache_evicts_least_recently_read(self) -> None:
+        first, second, third = (self.store.put(BLOB + bytes([n])) for n in range(3))
+        for digest in (first, second, third):
+            self.store.open(digest).close()
+        cached = {path.name for path in self.store.read_cache_dir.iterdir()}
+        self.assertEqual(cached, {second, third})
+
+    def test_prune_drops_cached_copy_with_blob(self) -> None:
+        digest = self.store.put(BLOB)
+        self.store.open(digest).close()
+        self.assertEqual(self.store.prune(before_ts=2**40), 1)
+        self.assertEqual(list(self.store.read_cache_dir.iterdir()), [])
+
+
+class ArtifactRouteTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.state = SimpleNamespace(artifacts=ArtifactStore(Path(self.tmp.name)))
+        self.digest = self.state.artifacts.put(BLOB)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def _get(self, headers: dict[str, str]) -> tuple[int, dict[str, str], bytes]:
+        route = artifact_route(self.state, self.digest, headers)
+        body = route.body or b""
+        if route.file is not None:
+            fh, length = route.file
+            with fh:
+                body = fh.read(length)
+        return route.code, dict(route.headers), body
+
+    def test_full_body(self) -> None:
+        code, headers, body = self._get({})
+        self.assertEqual((code, body), (200, BLOB))
+        self.assertEqual(headers["ETag"], f'"{self.digest}"')
+        self.assertEqual(headers["Accept-Ranges"], "bytes")
+
+    def test_ranges(self) -> None:
+        code, headers, body = self._get({"range": "bytes=7-13"})
+        self.assertEqual((code, body), (206, BLOB[7:14]))
+        self.assertEqual(headers["Content-Range"], f"bytes 7-13/{len(BLOB)}")
+        code, headers, body = self._get({"range": "bytes=-7"})
+        self.assertEqual((code, body), (206, BLOB[-7:]))
+
+    def test_unsatisfiable_and_missing(self) -> None:
+        code, headers, _ = self._get({"range": f"bytes={len(BLOB)}-"})
+        self.assertEqual((code, headers["Content-Range"]), (416, f"bytes */{len(BLOB)}"))
+        self.assertEqual(artifact_route(self.state, "0" * 64, {}).code, 404)
+        self.assertEqual(artifact_route(self.state, "../etc/passwd", {}).code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""BoundedCapture head+tail retention, spooling, and run_command output bounds."""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bridge_server import BoundedCapture, run_command  # noqa: E402
+
+
+class BoundedCaptureTest(unittest.TestCase):
+    def test_unbounded_keeps_everything(self) -> None:
+        capture = BoundedCapture()
+        for chunk in (b"abc", b"def"):
+            capture.write(chunk)
+        self.assertEqual((capture.text(), capture.total, capture.truncated), ("abcdef", 6, False))
+
+    def test_keeps_head_and_tail_across_chunks(self) -> None:
+        capture = BoundedCapture(10)
+        data = bytes(range(48, 48 + 40))
+        for start in range(0, len(data), 3):
+            capture.write(data[start : start + 3])
+        self.assertEqual(bytes(capture.head), data[:5])
+        self.assertEqual(bytes(capture.tail), data[-5:])
+        self.assertEqual(capture.total, 40)
+        self.assertTrue(capture.truncated)
+        self.assertEqual(
+            capture.text(), f"{data[:5].decode()}\n... [30 bytes truncated] ...\n{data[-5:].decode()}"
+        )
+
+    def test_output_at_the_bound_is_not_truncated(self) -> None:
+        capture = BoundedCapture(10)
+        capture.write(b"0123456789")
+        self.assertFalse(capture.truncated)
+        self.assertEqual(capture.text(), "0123456789")
+
+    def test_odd_bound_splits_without_losing_a_byte(self) -> None:
+        capture = BoundedCapture(7)
+        capture.write(b"abcdefg")
+        self.assertEqual((bytes(capture.head), bytes(capture.tail)), (b"abc", b"defg"))
+        self.assertFalse(capture.truncated)
+
+    def test_spool_keeps_the_full_stream(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            spool = Path(tmp) / "job" / "out.log"
+            capture = BoundedCapture(4, spool)
+            capture.write(b"hello ")
+            capture.write(b"world")
+            capture.close()
+            self.assertEqual(spool.read_bytes(), b"hello world")
+            self.assertEqual(capture.text(), "he\n... [7 bytes truncated] ...\nld")
+
+
+class RunCommandBoundTest(unittest.TestCase):
+    def test_large_output_is_bounded(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            result = run_command(
+                "seq 1 100000; echo oops >&2", Path(tmp), timeout=30, max_output_bytes=64
+            )
+        self.assertEqual(result["returncode"], 0)
+        self.assertTrue(result["truncated"])
+        self.assertTrue(result["stdout"].startswith("1\n2\n3\n"))
+        self.assertTrue(result["stdout"].endswith("99999\n100000\n"))
+        self.assertEqual(result["stdout_bytes"], len("".join(f"{n}\n" for n in range(1, 100001))))
+        self.assertEqual(result["stderr"], "oops\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""CodexCapabilities probing against a fake codex binary, for both the server and the client copy."""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import bridge_client  # noqa: E402
+import bridge_server  # noqa: E402
+
+FAKE_CODEX = """#!/bin/sh
+sleep "${FAKE_CODEX_DELAY:-0}"
+case "$1 $2" in
+  "--version "*) echo "codex-cli 0.99.0" ;;
+  "exec --help") printf 'Usage: codex exec\\n  --skip-git-repo-check\\n  --color <COLOR>\\n' ;;
+  "--help "*) printf 'Commands:\\n  exec  Run non-interactively\\nOptions:\\n  -s, --sandbox\\n  -a, --ask-for-approval\\n' ;;
+  *) exit 2 ;;
+esac
+"""
+
+
+class CodexCapabilitiesTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.codex = Path(self.tmp.name) / "codex"
+        self.codex.write_text(FAKE_CODEX, encoding="utf-8")
+        self.codex.chmod(0o755)
+        os.environ.pop("FAKE_CODEX_DELAY", None)
+
+    def tearDown(self) -> None:
+        os.environ.pop("FAKE_CODEX_DELAY", None)
+        self.tmp.cleanup()
+
+    def test_client_and_server_share_variants(self) -> None:
+        self.assertEqual(bridge_client.CODEX_ARGV_VARIANTS, bridge_server.CODEX_ARGV_VARIANTS)
+
+    def test_probe_picks_first_supported_variant_and_persists(self) -> None:
+        for module in (bridge_server, bridge_client):
+            with self.subTest(module=module.__name__):
+                path = Path(self.tmp.name) / f"{module.__name__}.json"
+                caps = module.CodexCapabilities(path, module.CODEX_ARGV_VARIANTS)
+                argv = caps.template(str(self.codex), Path(self.tmp.name))
+                self.assertEqual(argv, module.CODEX_ARGV_VARIANTS[0])
+                saved = json.loads(path.read_text(encoding="utf-8"))
+                self.assertEqual(saved[str(self.codex)]["version"], "codex-cli 0.99.0")
+                # A fresh instance reads the persisted entry instead of probing again.
+                self.codex.chmod(0o644)
+                self.assertEqual(module.CodexCapabilities(path, module.CODEX_ARGV_VARIANTS).template(
+                    str(self.codex), Path(self.tmp.name)
+                ), argv)
+                self.codex.chmod(0o755)
+
+    def test_probe_does_not_block_other_callers(self) -> None:
+        os.environ["FAKE_CODEX_DELAY"] = "0.5"
+        caps = bridge_server.CodexCapabilities(Path(self.tmp.name) / "caps.json", bridge_server.CODEX_ARGV_VARIANTS)
+        probed: list[list[str] | None] = []
+        prober = threading.Thread(target=lambda: probed.append(caps.template(str(self.codex), Path(self.tmp.name))))
+        prober.start()
+        time.sleep(0.2)
+        started = time.monotonic()
+        # While the probe runs, other callers get None (walk all variants) instead of waiting for it.
+        self.assertIsNone(caps.template(str(self.codex), Path(self.tmp.name)))
+        self.assertLess(time.monotonic() - started, 0.3)
+        prober.join()
+        self.assertEqual(probed, [bridge_server.CODEX_ARGV_VARIANTS[0]])
+
+
+if __name__ == "__main__":
+    unittest.main()
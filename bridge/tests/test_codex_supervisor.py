@@ -0,0 +1,51 @@
+"""supervise_codex_process progress reporting and timeout handling."""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+from typing import Any
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import bridge_server  # noqa: E402
+from bridge_server import supervise_codex_process  # noqa: E402
+
+
+def spawn(script: str) -> subprocess.Popen[str]:
+    return subprocess.Popen(
+        ["sh", "-c", script], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, start_new_session=True
+    )
+
+
+class SuperviseCodexProcessTest(unittest.TestCase):
+    def setUp(self) -> None:
+        patcher = mock.patch.object(bridge_server, "CODEX_HEARTBEAT_SECONDS", 0.1)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.events: list[dict[str, Any]] = []
+
+    def test_progress_only_when_narration_changes(self) -> None:
+        proc = spawn(
+            "sleep 0.3; echo 'Reading compose file' >&2; sleep 0.6; echo 'Checking replicas' >&2; sleep 0.6; echo done"
+        )
+        rc, stdout, stderr = supervise_codex_process(proc, timeout=10, stream_mode="normal", progress=self.events.append)
+        self.assertEqual((rc, stdout), (0, "done\n"))
+        self.assertIn("Checking replicas", stderr)
+        self.assertEqual([e["message"] for e in self.events], ["Reading compose file", "Checking replicas"])
+        self.assertTrue(all(e["status"] == "running" for e in self.events))
+
+    def test_silent_process_reports_nothing(self) -> None:
+        rc, _, _ = supervise_codex_process(spawn("sleep 0.6"), timeout=10, stream_mode="normal", progress=self.events.append)
+        self.assertEqual((rc, self.events), (0, []))
+
+    def test_timeout_kills_the_group(self) -> None:
+        rc, _, _ = supervise_codex_process(spawn("sleep 30 & sleep 30"), timeout=1, stream_mode="normal")
+        self.assertNotEqual(rc, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
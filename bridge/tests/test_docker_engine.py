@@ -0,0 +1,179 @@
+"""DockerEngineClient and engine: checks against canned Engine API responses on a local AF_UNIX socket."""
+
+from __future__ import annotations
+
+import json
+import os
+import socketserver
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import bridge_server  # noqa: E402
+from bridge_server import DockerEngineClient, DockerEngineError, LogAnalyzer, run_engine_check  # noqa: E402
+
+SERVICES = [
+    {
+        "ID": "s1",
+        "Spec": {
+            "Name": "talimy-web-abc",
+            "Mode": {"Replicated": {"Replicas": 2}},
+            "TaskTemplate": {"ContainerSpec": {"Image": "ghcr.io/talimy/web:1"}},
+        },
+        "UpdateStatus": {"State": "completed"},
+    },
+]
+TASKS = {
+    "talimy-web-abc": [
+        {"ID": "t1", "Slot": 1, "Version": {"Index": 10}, "DesiredState": "shutdown", "Status": {"State": "failed"}},
+        {"ID": "t2", "Slot": 1, "Version": {"Index": 20}, "DesiredState": "running", "Status": {"State": "running"}},
+    ],
+}
+
+
+def _frame(stream: int, data: bytes) -> bytes:
+    return bytes([stream, 0, 0, 0]) + len(data).to_bytes(4, "big") + data
+
+
+LOG_BODY = (
+    _frame(1, b"Nest application successfully ")
+    + _frame(1, b"started\nline2\n")
+    + _frame(2, b"signal SIGTERM\n")
+    + _frame(1, b"tail-no-newline")
+)
+
+
+class FakeEngineHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Set per test: "ok", "logs_500" or "logs_cut" (connection dropped mid-stream).
+    mode = "ok"
+
+    def address_string(self) -> str:
+        return "unix"
+
+    def log_message(self, format: str, *args: object) -> None:
+        return
+
+    def _json(self, code: int, payload: object) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:  # noqa: N802
+        parsed = urlparse(self.path)
+        params = parse_qs(parsed.query)
+        if parsed.path == "/services":
+            return self._json(200, SERVICES)
+        if parsed.path == "/tasks":
+            name = json.loads(params["filters"][0])["service"][0]
+            return self._json(200, TASKS.get(name, []))
+        parts = parsed.path.strip("/").split("/")
+        service = next((s for s in SERVICES if len(parts) > 1 and parts[1] == s["Spec"]["Name"]), None)
+        if parts[0] != "services" or service is None:
+            return self._json(404, {"message": f"service {parts[1] if len(parts) > 1 else ''} not found"})
+        if len(parts) == 2:
+            return self._json(200, service)
+        if self.mode == "logs_500":
+            return self._json(500, {"message": "rpc error: code = Unavailable"})
+        self.send_response(200)
+        self.send_header("Content-Type", "application/vnd.docker.multiplexed-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        body = LOG_BODY[:20] if self.mode == "logs_cut" else LOG_BODY
+        # Odd chunk size: frame headers and payloads straddle chunk boundaries.
+        for i in range(0, len(body), 7):
+            chunk = body[i : i + 7]
+            self.wfile.write(f"{len(chunk):x}\r\n".encode("ascii") + chunk + b"\r\n")
+        if self.mode == "logs_cut":
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class FakeEngineServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class DockerEngineTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.socket_path = os.path.join(cls.tmp.name, "docker.sock")
+        cls.server = FakeEngineServer(cls.socket_path, FakeEngineHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.tmp.cleanup()
+
+    def setUp(self) -> None:
+        FakeEngineHandler.mode = "ok"
+        self.engine = DockerEngineClient(self.socket_path, timeout=5)
+
+    def test_services_and_tasks(self) -> None:
+        self.assertTrue(self.engine.available())
+        self.assertEqual([s["Spec"]["Name"] for s in self.engine.services()], ["talimy-web-abc"])
+        self.assertEqual([t["ID"] for t in self.engine.service_tasks("talimy-web-abc")], ["t1", "t2"])
+        self.assertEqual(self.engine.service_inspect("talimy-web-abc")["ID"], "s1")
+
+    def test_missing_service_raises(self) -> None:
+        with self.assertRaisesRegex(DockerEngineError, "404: service nope not found"):
+            self.engine.service_inspect("nope")
+
+    def test_service_logs_demuxes_chunked_frames(self) -> None:
+        lines = self.engine.service_logs("talimy-web-abc")
+        self.assertEqual(
+            lines,
+            [
+                ("stdout", "Nest application successfully started"),
+                ("stdout", "line2"),
+                ("stderr", "signal SIGTERM"),
+                ("stdout", "tail-no-newline"),
+            ],
+        )
+
+    def test_service_ps_check(self) -> None:
+        res = run_engine_check("engine:service_ps talimy-web-abc", self.engine)
+        self.assertEqual(res["returncode"], 0)
+        self.assertEqual([t["id"] for t in res["engine"]["tasks"]], ["t2", "t1"])
+
+    def test_service_logs_check(self) -> None:
+        res = run_engine_check("engine:service_logs talimy-web-abc tail=50", self.engine)
+        self.assertEqual(res["returncode"], 0)
+        self.assertIn("line2", res["stdout"])
+        self.assertEqual(res["stderr"], "signal SIGTERM\n")
+        self.assertNotIn("log_error", res["engine"])
+
+    def test_service_logs_engine_error_is_not_fatal(self) -> None:
+        analyzer = LogAnalyzer.from_config(bridge_server.BridgeConfig({}))
+        for mode in ("logs_500", "logs_cut"):
+            with self.subTest(mode=mode):
+                FakeEngineHandler.mode = mode
+                res = run_engine_check("engine:service_logs talimy-web-abc", self.engine)
+                self.assertEqual(res["returncode"], 0)
+                self.assertTrue(res["engine"]["log_error"])
+                self.assertIn(res["engine"]["log_error"], res["stderr"])
+                findings = analyzer.analyze([res])
+                self.assertIn("engine_service_logs_unavailable", [f["rule"] for f in findings])
+
+    def test_unreachable_socket_fails_other_ops(self) -> None:
+        engine = DockerEngineClient(os.path.join(self.tmp.name, "missing.sock"), timeout=1)
+        res = run_engine_check("engine:service_ps talimy-web-abc", engine)
+        self.assertEqual(res["returncode"], 1)
+        self.assertIn("docker socket", res["stderr"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""EventStore cursor paging (after/limit/event_type), legacy files, index eviction and archived timelines."""
+
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bridge_server import EventStore, StateArchive  # noqa: E402
+
+
+class EventStoreTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.base = Path(self.tmp.name)
+        self.store = EventStore(self.base / "events", index_entries=1)
+        for n in range(6):
+            self.store.append("j1", {"event_type": "ci_status" if n % 2 else "hello", "n": n})
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def seqs(self, items: list[dict[str, object]]) -> list[object]:
+        return [item["seq"] for item in items]
+
+    def test_after_and_limit_cursor(self) -> None:
+        items, cursor = self.store.read_page("j1", after=2, limit=2)
+        self.assertEqual((self.seqs(items), cursor), ([3, 4], 4))
+        items, cursor = self.store.read_page("j1", after=cursor)
+        self.assertEqual((self.seqs(items), cursor), ([5, 6], 6))
+        self.assertEqual(self.store.read_page("j1", after=6), ([], 6))
+        self.assertEqual(self.store.read_page("j1", after=99), ([], 99))
+        self.assertEqual(self.store.read_page("missing"), ([], 0))
+
+    def test_event_type_filter_advances_past_skipped_events(self) -> None:
+        items, cursor = self.store.read_page("j1", event_type="ci_status", limit=2)
+        self.assertEqual((self.seqs(items), cursor), ([2, 4], 4))
+        items, cursor = self.store.read_page("j1", after=4, event_type="hello")
+        self.assertEqual((self.seqs(items), cursor), ([5], 6))
+
+    def test_offsets_point_at_their_lines(self) -> None:
+        raw = self.store._path("j1").read_bytes()
+        for item in self.store.read("j1"):
+            line = raw[item["offset"] :].split(b"\n", 1)[0]
+            self.assertEqual(json.loads(line)["seq"], item["seq"])
+
+    def test_evicted_index_is_rebuilt_and_seq_keeps_counting(self) -> None:
+        self.store.append("j2", {"event_type": "hello"})
+        # index_entries=1: j1's index was evicted by j2.
+        self.assertEqual(self.store.append("j1", {"event_type": "hello"})["seq"], 7)
+        self.assertEqual(self.seqs(self.store.read_page("j1", after=5)[0]), [6, 7])
+
+    def test_legacy_lines_without_seq_get_line_numbers(self) -> None:
+        legacy = self.base / "events" / "old.jsonl"
+        legacy.write_text('{"event_type":"a"}\n\n{"event_type":"b"}\n', encoding="utf-8")
+        items, cursor = self.store.read_page("old", after=1)
+        self.assertEqual((self.seqs(items), cursor, items[0]["offset"]), ([2], 2, 20))
+        self.assertEqual(self.store.append("old", {"event_type": "c"})["seq"], 3)
+
+    def test_archived_timeline_pages_like_a_live_one(self) -> None:
+        archive = StateArchive(self.base / "archive")
+        store = EventStore(self.base / "events", archive)
+        data, size = store.snapshot("j1")
+        archive.add("j1", "2026-10-17", None, data)
+        self.assertTrue(store.discard("j1", size))
+        items, cursor = store.read_page("j1", after=3, limit=2)
+        self.assertEqual((self.seqs(items), cursor), ([4, 5], 5))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""CodexHelloCache on-demand TTL refresh and /hello probe_codex authorization."""
+
+from __future__ import annotations
+
+import sys
+import threading
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import bridge_server  # noqa: E402
+from bridge_server import BridgeConfig, CodexHelloCache, JobQueue, route_get  # noqa: E402
+
+
+class CodexHelloCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.calls = 0
+        self.release = threading.Event()
+
+        def fake_hello(*args: object, **kwargs: object) -> tuple[str, str, None]:
+            self.calls += 1
+            self.release.wait(5)
+            return "salom", "server_codex", None
+
+        patcher = mock.patch.object(bridge_server, "run_server_codex_hello", fake_hello)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.release.set)
+        config = BridgeConfig({"shared_secret": "s3cret", "server_codex": {"enabled": True}})
+        self.state = SimpleNamespace(config=config, hello=CodexHelloCache(config), q=JobQueue())
+
+    def _hello(self, query: str = "", headers: dict[str, str] | None = None) -> bridge_server.BridgeRoute:
+        return route_get(self.state, f"/hello?side=laptop{query}", headers or {})
+
+    def test_nothing_probes_until_asked(self) -> None:
+        self.assertEqual(self.calls, 0)
+        self.assertEqual(self._hello().payload["reply_source"], "pending")
+        self.release.set()
+        self.state.hello.probe(wait=True)
+        self.assertEqual(self.calls, 1)
+
+    def test_fresh_greeting_is_served_without_probing(self) -> None:
+        self.release.set()
+        self.state.hello.probe(wait=True)
+        for _ in range(3):
+            self.assertEqual(self._hello().payload["reply_source"], "server_codex_cached")
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_greeting_refreshes_in_background(self) -> None:
+        self.release.set()
+        self.state.hello.probe(wait=True)
+        self.state.hello.probed_at -= self.state.hello.ttl_seconds
+        self.release.clear()
+        payload = self._hello().payload
+        # The request is answered from the cache while the refresh runs.
+        self.assertEqual(payload["reply"], "salom")
+        self.assertTrue(payload["codex"]["probing"])
+        self.release.set()
+        self.state.hello.probe(wait=True)
+        self.assertEqual(self.calls, 2)
+
+    def test_forced_probe_requires_token(self) -> None:
+        self.release.set()
+        self.assertEqual(self._hello("&probe_codex=1").code, 401)
+        self.assertEqual(self.calls, 0)
+        route = self._hello("&probe_codex=1", {"x-bridge-token": "s3cret"})
+        self.assertEqual((route.code, route.payload["reply_source"]), (200, "server_codex"))
+        self.assertEqual(self.calls, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
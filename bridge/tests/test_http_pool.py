@@ -0,0 +1,128 @@
+"""Client HTTPConnectionPool reuse/retry and the ETag cache behind http_json."""
+
+from __future__ import annotations
+
+import json
+import sys
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import bridge_client  # noqa: E402
+from bridge_client import ETagCache, HTTPConnectionPool  # noqa: E402
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    posts = 0
+
+    def log_message(self, format: str, *args: object) -> None:
+        return
+
+    def _reply(self, code: int, body: bytes, headers: dict[str, str] | None = None) -> None:
+        self.send_response(code)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:  # noqa: N802
+        if self.path == "/result":
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.send_header("ETag", '"v1"')
+                self.end_headers()
+                return
+            self._reply(200, b'{"status": "success"}', {"ETag": '"v1"'})
+            return
+        self._reply(200, str(self.client_address[1]).encode())
+
+    def do_POST(self) -> None:  # noqa: N802
+        self.rfile.read(int(self.headers.get("Content-Length", "0")))
+        type(self).posts += 1
+        if self.path == "/drop":
+            # Accept the request, then drop the connection without replying.
+            self.close_connection = True
+            self.connection.shutdown(2)
+            return
+        self._reply(200, b"{}")
+
+
+class HTTPConnectionPoolTest(unittest.TestCase):
+    def setUp(self) -> None:
+        _Handler.posts = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.pool = HTTPConnectionPool()
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_keep_alive_connection_is_reused(self) -> None:
+        ports = {self.pool.request("GET", f"{self.base}/port", None, {}, 5)[2] for _ in range(3)}
+        self.assertEqual(len(ports), 1)
+
+    def test_sent_post_is_not_replayed(self) -> None:
+        self.pool.request("GET", f"{self.base}/port", None, {}, 5)
+        with self.assertRaises((ConnectionError, OSError)):
+            self.pool.request("POST", f"{self.base}/drop", b"{}", {"Content-Type": "application/json"}, 5)
+        self.assertEqual(_Handler.posts, 1)
+
+    def test_etag_reply_is_replayed_from_cache(self) -> None:
+        cache = ETagCache()
+        original_pool, original_cache = bridge_client.HTTP_POOL, bridge_client.HTTP_ETAG_CACHE
+        bridge_client.HTTP_POOL, bridge_client.HTTP_ETAG_CACHE = self.pool, cache
+        try:
+            first = bridge_client.http_json("GET", f"{self.base}/result", None, 5, "", cache_key="result:j1")
+            self.assertEqual(cache.get("result:j1"), ('"v1"', b'{"status": "success"}'))
+            second = bridge_client.http_json("GET", f"{self.base}/result", None, 5, "", cache_key="result:j1")
+        finally:
+            bridge_client.HTTP_POOL, bridge_client.HTTP_ETAG_CACHE = original_pool, original_cache
+        self.assertEqual(first, (200, {"status": "success"}))
+        self.assertEqual(second, first)
+
+
+class ETagCacheTest(unittest.TestCase):
+    def test_lru_by_entries(self) -> None:
+        cache = ETagCache(max_entries=2)
+        cache.put("a", "1", b"a")
+        cache.put("b", "1", b"b")
+        cache.get("a")
+        cache.put("c", "1", b"c")
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+
+    def test_bounded_by_bytes(self) -> None:
+        cache = ETagCache(max_bytes=10)
+        cache.put("a", "1", b"x" * 6)
+        cache.put("b", "1", b"y" * 6)
+        self.assertIsNone(cache.get("a"))
+        cache.put("huge", "1", b"z" * 11)
+        self.assertIsNone(cache.get("huge"))
+        self.assertEqual(cache.get("b"), ("1", b"y" * 6))
+
+    def test_concurrent_puts_keep_the_bound(self) -> None:
+        cache = ETagCache(max_entries=8)
+
+        def fill(prefix: str) -> None:
+            for n in range(500):
+                cache.put(f"{prefix}{n}", "1", json.dumps(n).encode())
+
+        threads = [threading.Thread(target=fill, args=(p,)) for p in "abcd"]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(cache._entries), 8)
+        self.assertEqual(cache._bytes, sum(len(body) for _, body in cache._entries.values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+"""JobQueue coalescing, supersede, priority and key scheduling, and cancel vs worker release."""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bridge_server import JOB_PROCESSES, BridgeServerState, JobQueue, JsonStore, QueueJournal  # noqa: E402
+
+
+def trigger(job_id: str, commit: str = "c1", **fields: object) -> dict[str, object]:
+    return {"job_id": job_id, "commit": commit, "check_set": "web", "task_key": "3.1", **fields}
+
+
+class JobQueueTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.journal = QueueJournal(Path(self.tmp.name) / "queue.jsonl")
+        self.q = JobQueue(self.journal)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_same_commit_and_check_set_coalesces(self) -> None:
+        self.assertEqual(self.q.put(trigger("a")), {"superseded": {}})
+        self.assertEqual(self.q.put(trigger("b")), {"coalesced_into": "a"})
+        self.assertEqual(self.q.snapshot()["depth"], 1)
+        self.assertEqual(self.q.get()["job_id"], "a")
+        self.assertEqual(self.q.done("a"), ["b"])
+
+    def test_coalesce_into_running_job(self) -> None:
+        self.q.put(trigger("a"))
+        self.q.get()
+        self.assertEqual(self.q.put(trigger("b")), {"coalesced_into": "a"})
+        self.assertEqual(self.q.done("a"), ["b"])
+        # The key is free again once the primary finished.
+        self.assertEqual(self.q.put(trigger("c")), {"superseded": {}})
+
+    def test_coalesce_raises_queued_priority(self) -> None:
+        self.q.put(trigger("batch", priority=0))
+        self.q.put(trigger("other", commit="c2", task_key="4.1", priority=5))
+        self.assertEqual(self.q.put(trigger("manual", priority=10)), {"coalesced_into": "batch"})
+        self.assertEqual(self.q.get()["job_id"], "batch")
+        pending, _, aliases = self.journal.replay()
+        self.assertEqual([t["job_id"] for t in pending], ["other"])
+        self.assertEqual(aliases, {"batch": ["manual"]})
+
+    def test_raised_priority_survives_journal_replay(self) -> None:
+        self.q.put(trigger("batch", priority=0))
+        self.q.put(trigger("manual", priority=10))
+        pending, _, _ = self.journal.replay()
+        self.assertEqual([(t["job_id"], t["priority"]) for t in pending], [("batch", 10)])
+
+    def test_force_review_never_coalesces(self) -> None:
+        self.q.put(trigger("a"))
+        self.assertEqual(self.q.put(trigger("b", force_review=True)), {"superseded": {}})
+        self.assertEqual(self.q.snapshot()["depth"], 2)
+        # Later plain triggers ride on the newest job for the key.
+        self.assertEqual(self.q.put(trigger("c")), {"coalesced_into": "b"})
+        # Cancelling the older job leaves the newer one owning the key.
+        self.assertEqual(self.q.cancel("a"), ("queued", []))
+        self.assertEqual(self.q.put(trigger("d")), {"coalesced_into": "b"})
+
+    def test_newer_commit_supersedes_queued_task(self) -> None:
+        self.q.put(trigger("old", commit="c1"))
+        self.q.put(trigger("alias", commit="c1"))
+        self.assertEqual(self.q.put(trigger("new", commit="c2")), {"superseded": {"old": ["alias"]}})
+        self.assertEqual(self.q.get()["job_id"], "new")
+        self.assertEqual(self.q.snapshot()["depth"], 0)
+
+    def test_running_job_is_not_superseded(self) -> None:
+        self.q.put(trigger("old", commit="c1"))
+        self.q.get()
+        self.assertEqual(self.q.put(trigger("new", commit="c2")), {"superseded": {}})
+
+    def test_mirror_result_keeps_alias_task(self) -> None:
+        jobs = JsonStore(Path(self.tmp.name) / "results", cache_entries=0)
+        jobs.write("p", {"job_id": "p", "task": "task 3.1", "status": "success", "stage": "completed"})
+        jobs.write("a", {"job_id": "a", "task": "task 3.1 hotfix", "stage": "coalesced"})
+        BridgeServerState.mirror_result(SimpleNamespace(jobs=jobs), "p", ["a"])
+        mirrored = jobs.read("a") or {}
+        self.assertEqual(mirrored["task"], "task 3.1 hotfix")
+        self.assertEqual(mirrored["job_id"], "a")
+        self.assertEqual(mirrored["coalesced_into"], "p")
+        self.assertEqual(mirrored["status"], "success")
+
+
+class NextRunnableTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.q = JobQueue()
+
+    def test_priority_then_fifo(self) -> None:
+        for job_id, priority in (("low", 0), ("high", 5), ("mid", 1), ("high2", 5)):
+            self.q.put(trigger(job_id, commit=job_id, task_key=job_id, priority=priority))
+        self.assertEqual([self.q.get()["job_id"] for _ in range(4)], ["high", "high2", "mid", "low"])
+
+    def test_busy_keys_block_and_are_not_overtaken(self) -> None:
+        self.q.put(trigger("run", commit="c1", task_key="1", concurrency_keys=["service:web"]))
+        self.q.get()
+        self.q.put(trigger("blocked", commit="c2", task_key="2", concurrency_keys=["service:web"], priority=9))
+        self.q.put(trigger("later", commit="c3", task_key="3", concurrency_keys=["service:web", "service:api"]))
+        self.q.put(trigger("free", commit="c4", task_key="4", concurrency_keys=["service:worker"]))
+        self.assertEqual(self.q.get()["job_id"], "free")
+        with self.q._cond:
+            self.assertIsNone(self.q._next_runnable())
+        self.q.done("run")
+        self.assertEqual(self.q.get()["job_id"], "blocked")
+        self.q.done("blocked")
+        self.assertEqual(self.q.get()["job_id"], "later")
+
+
+class CancelReleaseTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.state = SimpleNamespace(
+            q=JobQueue(), jobs=JsonStore(Path(self.tmp.name) / "results", cache_entries=0), _release_lock=threading.Lock()
+        )
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_cancel_after_release_leaves_no_flag(self) -> None:
+        self.state.q.put(trigger("cr-late"))
+        self.state.q.get()
+        BridgeServerState.release(self.state, "cr-late")
+        self.assertEqual(BridgeServerState.cancel(self.state, "cr-late")["state"], "")
+        self.assertFalse(JOB_PROCESSES.is_cancelled("cr-late"))
+
+    def test_cancel_of_running_job_is_cleared_on_release(self) -> None:
+        self.state.q.put(trigger("cr-run"))
+        self.state.q.get()
+        self.assertEqual(BridgeServerState.cancel(self.state, "cr-run")["state"], "running")
+        self.assertTrue(JOB_PROCESSES.is_cancelled("cr-run"))
+        BridgeServerState.release(self.state, "cr-run")
+        self.assertFalse(JOB_PROCESSES.is_cancelled("cr-run"))
+
+
+if __name__ == "__main__":
+    unittest.main()
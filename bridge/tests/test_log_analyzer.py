@@ -0,0 +1,100 @@
+"""LogAnalyzer default rules, config overrides, requires/unless and line attribution."""
+
+from __future__ import annotations
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bridge_server import BridgeConfig, LogAnalyzer  # noqa: E402
+
+PS = "docker service ps {{service:web}} --no-trunc"
+LOGS = "docker service logs --tail 200 {{service:web}}"
+
+
+def check(command: str, stdout: str, stderr: str = "") -> dict[str, str]:
+    return {"command": command, "command_template": command, "stdout": stdout, "stderr": stderr}
+
+
+def rules(findings: list[dict[str, object]]) -> list[object]:
+    return [finding["rule"] for finding in findings]
+
+
+class LogAnalyzerTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.analyzer = LogAnalyzer.from_config(BridgeConfig({}))
+
+    def test_failed_task_suppresses_transitional(self) -> None:
+        findings = self.analyzer.analyze([check(PS, "t1 web.1 Running\nt0 \\_ web.1 Shutdown Failed 2 min ago\n")])
+        self.assertEqual(rules(findings), ["ps_failed_task"])
+        self.assertEqual(findings[0]["lines"], [2])
+        self.assertEqual(findings[0]["service"], "web")
+
+    def test_transitional_sample_keeps_original_case(self) -> None:
+        findings = self.analyzer.analyze([check(PS, "ok\nt2 web.1 Preparing 3s ago\n")])
+        self.assertEqual(rules(findings), ["ps_transitional"])
+        self.assertIn("preview: t2 web.1 Preparing 3s ago", findings[0]["message"])
+
+    def test_graceful_sigterm_needs_both_lines_and_no_fatal(self) -> None:
+        started = "[Nest] LOG Nest application successfully started"
+        sigterm = "signal SIGTERM (Polite quit request)"
+        self.assertEqual(
+            rules(self.analyzer.analyze([check(LOGS, started, sigterm)])), ["graceful_rollout_sigterm"]
+        )
+        self.assertEqual(rules(self.analyzer.analyze([check(LOGS, started)])), [])
+        self.assertEqual(
+            rules(self.analyzer.analyze([check(LOGS, f"{started}\nError: listen EADDRINUSE :::3000", sigterm)])), []
+        )
+
+    def test_rules_only_apply_to_their_check_kind(self) -> None:
+        self.assertEqual(rules(self.analyzer.analyze([check("echo failed", "task failed")])), [])
+
+    def test_config_rules_override_and_extend_defaults(self) -> None:
+        analyzer = LogAnalyzer.from_config(
+            BridgeConfig(
+                {
+                    "log_analyzers": {
+                        "rules": [
+                            {"id": "ps_failed_task", "enabled": False},
+                            {
+                                "id": "oom",
+                                "literal": "OutOfMemory",
+                                "severity": "error",
+                                "services": ["web"],
+                                "message": "{service}: {count} OOM, line {line}",
+                            },
+                            {"id": "broken", "pattern": "(unclosed"},
+                        ]
+                    }
+                }
+            )
+        )
+        self.assertNotIn("broken", [rule.id for rule in analyzer.rules])
+        findings = analyzer.analyze(
+            [
+                check(PS, "t0 web.1 Shutdown Failed\nkilled: outofmemory\nOUTOFMEMORY again\n"),
+                check("curl {{service:api}}/health", "OutOfMemory"),
+            ]
+        )
+        self.assertEqual(rules(findings), ["ps_transitional", "oom"])
+        self.assertEqual(findings[1]["severity"], "error")
+        self.assertEqual(findings[1]["message"], "web: 2 OOM, line 2")
+
+    def test_case_sensitive_rule(self) -> None:
+        analyzer = LogAnalyzer.from_config(
+            BridgeConfig({"log_analyzers": {"defaults": False, "rules": [{"id": "err", "pattern": "ERROR", "case_sensitive": True}]}})
+        )
+        findings = analyzer.analyze([check("run", "error\nERROR\n")])
+        self.assertEqual([(f["rule"], f["lines"]) for f in findings], [("err", [2])])
+
+    def test_scan_attributes_line_numbers_once_per_line(self) -> None:
+        text = "\n".join(["panic: a panic: b", "ok", "fatal error"] * 3)
+        hits = self.analyzer.scan(text.lower(), "service_logs", "web", "")
+        self.assertEqual(hits["fatal_signature"]["count"], 6)
+        self.assertEqual(hits["fatal_signature"]["lines"], [1, 3, 4, 6, 7])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+"""QueueJournal replay/rewrite and BridgeServerState.recover_queue after a simulated restart."""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bridge_server import BridgeConfig, BridgeServerState, JobQueue, JsonStore, QueueJournal  # noqa: E402
+
+
+def trigger(job_id: str, commit: str, **fields: object) -> dict[str, object]:
+    return {"job_id": job_id, "commit": commit, "check_set": "web", "task_key": job_id, **fields}
+
+
+class QueueJournalTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "queue.jsonl"
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_replay_follows_queue_transitions(self) -> None:
+        q = JobQueue(QueueJournal(self.path))
+        q.put(trigger("run", "c1"))
+        q.put(trigger("wait", "c2"))
+        q.put(trigger("wait-alias", "c2", task_key="x"))
+        q.put(trigger("gone", "c3"))
+        q.cancel("gone")
+        q.put(trigger("fin", "c4"))
+        self.assertEqual(q.get()["job_id"], "run")
+        self.assertEqual(q.get()["job_id"], "wait")
+        q.done("wait")
+        q.cancel("run")
+
+        pending, leased, aliases = QueueJournal(self.path).replay()
+        self.assertEqual([t["job_id"] for t in pending], ["fin"])
+        self.assertEqual(sorted(leased), ["run"])
+        self.assertTrue(leased["run"]["cancelled"])
+        self.assertEqual(leased["run"]["attempt"], 1)
+        # The alias of a finished primary is dropped with it.
+        self.assertEqual(aliases, {})
+
+    def test_torn_last_line_is_ignored(self) -> None:
+        q = JobQueue(QueueJournal(self.path))
+        q.put(trigger("a", "c1"))
+        with self.path.open("a", encoding="utf-8") as fh:
+            fh.write('{"op":"put","trigger":{"job_id":"b"')
+        pending, leased, _ = QueueJournal(self.path).replay()
+        self.assertEqual([t["job_id"] for t in pending], ["a"])
+        self.assertEqual(leased, {})
+
+    def test_rewrite_keeps_only_live_state(self) -> None:
+        journal = QueueJournal(self.path, compact_after=1)
+        q = JobQueue(journal)
+        q.put(trigger("a", "c1"))
+        q.put(trigger("a2", "c1", task_key="y"))
+        q.put(trigger("b", "c2"))
+        q.get()
+        q.put(trigger("c", "c3"))
+        q.get()
+        q.done("b")
+        lines = self.path.read_text(encoding="utf-8").splitlines()
+        self.assertEqual(len(lines), 4)  # put+lease for a, alias a2, put c
+        pending, leased, aliases = QueueJournal(self.path).replay()
+        self.assertEqual([t["job_id"] for t in pending], ["c"])
+        self.assertEqual(sorted(leased), ["a"])
+        self.assertEqual(aliases, {"a": ["a2"]})
+
+
+class RecoverQueueTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "queue.jsonl"
+        self.jobs = JsonStore(Path(self.tmp.name) / "results", cache_entries=0)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def _restart(self, **queue_cfg: object) -> tuple[SimpleNamespace, dict[str, int]]:
+        state = SimpleNamespace(
+            q=JobQueue(QueueJournal(self.path)),
+            config=BridgeConfig({"job_queue": queue_cfg}),
+            jobs=self.jobs,
+        )
+        return state, BridgeServerState.recover_queue(state)
+
+    def _crash_with(self, *, attempt: int = 1, cancelled: bool = False) -> None:
+        q = JobQueue(QueueJournal(self.path))
+        q.put(trigger("run", "c1", attempt=attempt))
+        q.put(trigger("run-alias", "c1", task_key="z"))
+        q.put(trigger("wait", "c2"))
+        q.get()
+        if cancelled:
+            q.cancel("run")
+
+    def test_interrupted_job_is_retried_ahead_of_queued_ones(self) -> None:
+        self._crash_with()
+        state, stats = self._restart()
+        self.assertEqual(stats, {"queued": 1, "retried": 1, "failed": 0, "cancelled": 0})
+        first = state.q.get()
+        self.assertEqual((first["job_id"], first["attempt"]), ("run", 2))
+        self.assertEqual(state.q.get()["job_id"], "wait")
+        self.assertEqual(state.q.done("run"), ["run-alias"])
+        self.assertEqual(self.jobs.read("run")["stage"], "queued")
+
+    def test_last_attempt_fails_job_and_aliases(self) -> None:
+        self._crash_with(attempt=2)
+        _, stats = self._restart(max_attempts=2)
+        self.assertEqual(stats["failed"], 1)
+        for job_id in ("run", "run-alias"):
+            self.assertEqual(self.jobs.read(job_id)["stage"], "interrupted")
+
+    def test_cancelled_running_job_is_not_retried(self) -> None:
+        self._crash_with(cancelled=True)
+        state, stats = self._restart()
+        self.assertEqual(stats["cancelled"], 1)
+        self.assertEqual(self.jobs.read("run")["status"], "cancelled")
+        self.assertEqual(state.q.get()["job_id"], "wait")
+        self.assertEqual(state.q.snapshot()["depth"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
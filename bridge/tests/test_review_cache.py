@@ -0,0 +1,90 @@
+"""check_results_digest masking and ReviewCache TTL/LRU/persistence."""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bridge_server import ReviewCache, check_results_digest  # noqa: E402
+
+
+def digest(stdout: str, **fields: object) -> str:
+    return check_results_digest([{"command": "docker service ps web", "returncode": 0, "stdout": stdout, **fields}])
+
+
+class CheckResultsDigestTest(unittest.TestCase):
+    def test_volatile_tokens_are_masked(self) -> None:
+        pairs = [
+            ("web.1 Running 5 minutes ago", "web.1 Running about an hour ago"),
+            ("Up 3 hours", "Up about a minute"),
+            ("2026-10-17T08:15:02.123Z started", "2026-10-18 09:00:00+05:00 started"),
+            ("[12:00:01] ready", "[23:59:59] ready"),
+            ("ts=1792209913 ok", "ts=1792209999123 ok"),
+            ("task k3x9 id 0f1e2d3c4b5a", "task k3x9 id a1b2c3d4e5f6"),
+            ("req 123e4567-e89b-12d3-a456-426614174000", "req 00000000-0000-4000-8000-00000000000a"),
+        ]
+        for first, second in pairs:
+            with self.subTest(first=first):
+                self.assertEqual(digest(first), digest(second))
+
+    def test_runtime_state_numbers_are_kept(self) -> None:
+        pairs = [
+            ("web replicated 0/1", "web replicated 1/1"),
+            ("HTTP 200", "HTTP 502"),
+            ("errors=0", "errors=3"),
+            ("listening on :3000", "listening on :3001"),
+            # All-digit ids are not hex-masked: they could be counts.
+            ("count 12345678", "count 87654321"),
+        ]
+        for first, second in pairs:
+            with self.subTest(first=first):
+                self.assertNotEqual(digest(first), digest(second))
+
+    def test_outcome_fields_change_the_digest(self) -> None:
+        self.assertNotEqual(digest("ok"), digest("ok", returncode=1))
+        self.assertNotEqual(digest("ok"), digest("ok", timed_out=True))
+        self.assertNotEqual(digest("ok"), digest("ok", stderr="warn"))
+
+
+class ReviewCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "review_cache.json"
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_hit_miss_and_persistence(self) -> None:
+        cache = ReviewCache(self.path, ttl_seconds=60)
+        self.assertIsNone(cache.get("k"))
+        cache.put("k", {"verdict": "ok"})
+        self.assertEqual(cache.get("k")[0], {"verdict": "ok"})
+        reloaded = ReviewCache(self.path, ttl_seconds=60)
+        self.assertEqual(reloaded.get("k")[0], {"verdict": "ok"})
+        self.assertEqual(cache.stats()["hit_rate"], 0.5)
+
+    def test_expired_entries_are_dropped(self) -> None:
+        cache = ReviewCache(self.path, ttl_seconds=0.05)
+        cache.put("k", {"verdict": "ok"})
+        time.sleep(0.1)
+        self.assertIsNone(cache.get("k"))
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_lru_bound(self) -> None:
+        cache = ReviewCache(self.path, ttl_seconds=60, max_entries=2)
+        cache.put("a", {})
+        cache.put("b", {})
+        cache.get("a")
+        cache.put("c", {})
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+
+
+if __name__ == "__main__":
+    unittest.main()
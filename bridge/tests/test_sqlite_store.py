@@ -0,0 +1,68 @@
+"""SqliteDatabase connection pool bound and the sqlite job/event stores."""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bridge_server import SqliteDatabase, SqliteEventStore, SqliteJobStore  # noqa: E402
+
+
+class SqliteStoreTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = SqliteDatabase(Path(self.tmp.name) / "state.sqlite3", pool_size=2)
+        self.jobs = SqliteJobStore(self.db)
+        self.events = SqliteEventStore(self.db)
+
+    def tearDown(self) -> None:
+        for conn in self.db._idle:
+            conn.close()
+        self.tmp.cleanup()
+
+    def test_short_lived_threads_do_not_leak_connections(self) -> None:
+        self.jobs.write("j1", {"job_id": "j1", "status": "success", "task": "2.12 x", "commit": "abc"})
+        barrier = threading.Barrier(6)
+        seen: list[object] = []
+
+        def handler() -> None:
+            with self.db.conn() as conn:
+                barrier.wait()
+                seen.append(conn.execute("SELECT payload FROM jobs WHERE job_id = 'j1'").fetchone())
+
+        threads = [threading.Thread(target=handler) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(seen), 6)
+        self.assertEqual(len(self.db._idle), 2)
+
+    def test_failed_transaction_is_rolled_back_before_reuse(self) -> None:
+        with self.assertRaises(RuntimeError):
+            with self.db.conn() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                raise RuntimeError("boom")
+        with self.db.conn() as conn:
+            self.assertFalse(conn.in_transaction)
+        # The write lock was released, so another write goes through.
+        self.jobs.write("j2", {"job_id": "j2", "status": "running"})
+        self.assertEqual(self.jobs.read("j2")["status"], "running")
+
+    def test_events_page_by_seq(self) -> None:
+        for n in range(5):
+            self.events.append("j1", {"event_type": "check" if n % 2 else "stage", "n": n})
+        items, cursor = self.events.read_page("j1", after=1, limit=2)
+        self.assertEqual(([e["seq"] for e in items], cursor), ([2, 3], 3))
+        items, cursor = self.events.read_page("j1", after=cursor, event_type="check")
+        self.assertEqual(([e["seq"] for e in items], cursor), ([4], 5))
+        self.assertEqual(self.events.read_page("j1", after=5), ([], 5))
+
+
+if __name__ == "__main__":
+    unittest.main()